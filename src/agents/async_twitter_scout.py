@@ -0,0 +1,328 @@
+import asyncio
+import os
+import queue
+import re
+import threading
+import time
+from typing import AsyncIterator, Callable, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+from urllib.parse import quote
+from playwright.async_api import async_playwright
+from src.agents.tweet_parser import harvest_tweets_async, to_found, to_interaction
+from src.agents.twitter_graphql import SearchTimelineCapture
+from src.database import advance_watermark, get_watermark, save_interactions_bulk
+from src.utils.pacing import Pacer
+from src.utils.query_planner import split_terms
+from src.utils.tracing import tracer
+from src.utils.watermarks import is_seen, newest, scoped_query, snowflake
+
+# A fixed tag, or a function giving each tweet its tag (merged multi-keyword searches)
+Tag = Union[Optional[str], Callable[[Dict], Optional[str]]]
+# (query, tag) pairs; each becomes one search tab
+SearchSpec = Tuple[str, Tag]
+
+_DONE = object()
+
+
+class SearchResult(list):
+    """
+    The tweets one search found. caught_up is True when the search ran fine
+    but nothing was newer than its watermark, the normal steady-state empty
+    result, as opposed to finding nothing at all (no matches, logged out).
+    """
+
+    def __init__(self, tweets=(), caught_up: bool = False):
+        super().__init__(tweets)
+        self.caught_up = caught_up
+
+
+def search_url_for(query: str) -> str:
+    return f"https://twitter.com/search?q={quote(query)}&src=typed_query&f=live"
+
+
+class AsyncTwitterScout:
+    """
+    asyncio search backend: many search tabs open at once in one browser context.
+
+    It runs on its own event-loop thread so sync callers (web routes, worker
+    threads) can use it without an event loop of their own. The context is
+    built from the logged-in session exported by the sync scout (cookies +
+    local storage), so it never has to log in itself. `max_concurrency` caps
+    the tabs open at once for the account.
+
+    capture_mode "graphql" reads tweets from the SearchTimeline responses
+    (falling back to the DOM if none arrive); "dom" always scrapes articles.
+    With record_dir set, captured responses are saved as replayable fixtures.
+
+    With use_watermarks, each query remembers the newest tweet it returned:
+    the next run asks only for newer tweets (since_id:) and stops harvesting
+    at the first one already seen, so a steady-state cycle handles just the
+    delta. A run that fills `limit` before reaching the watermark leaves it
+    where it was, so the uncovered part of the delta is searched again rather
+    than skipped. A merged `"a" OR "b"` query keeps one watermark per term,
+    shared with single-term searches: it is scoped from the oldest of them,
+    and every term's advances after a run that covered its delta.
+    Watermarks move only once the tweets are archived, and an empty scoped
+    result comes back as SearchResult(caught_up=True).
+    """
+
+    # Parsed tweets are written in batches of this size (one transaction each)
+    SAVE_BATCH_SIZE = 25
+
+    def __init__(
+        self,
+        storage_state: Callable[[], Dict],
+        context_options: Optional[Dict] = None,
+        max_concurrency: int = 3,
+        headless: bool = True,
+        capture_mode: str = "graphql",
+        record_dir: Optional[str] = None,
+        pacer: Optional[Pacer] = None,
+        use_watermarks: bool = True
+    ):
+        self._storage_state = storage_state
+        self._context_options = context_options or {}
+        self.max_concurrency = max_concurrency
+        self.headless = headless
+        self.capture_mode = capture_mode
+        self.record_dir = record_dir
+        self.pacer = pacer or Pacer(enabled=False)
+        self.use_watermarks = use_watermarks
+
+        self._loop = None
+        self._loop_lock = threading.Lock()
+
+        # Only touched from the loop thread
+        self._playwright = None
+        self._browser = None
+        self._context = None
+        self._context_lock = None
+        self._semaphore = None
+
+    # --- Event loop plumbing ---
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        with self._loop_lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                threading.Thread(target=self._loop.run_forever, name="twitter-async", daemon=True).start()
+            return self._loop
+
+    def _submit(self, coro):
+        return asyncio.run_coroutine_threadsafe(coro, self._ensure_loop())
+
+    # --- Browser lifecycle ---
+
+    async def _open_context(self):
+        """Launches a headless browser and a context carrying the exported session."""
+        # Exporting goes through the sync browser thread; don't block the loop on it
+        state = await asyncio.to_thread(self._storage_state)
+        with tracer.span("browser.launch", engine="async"):
+            self._playwright = await async_playwright().start()
+            self._browser = await self._playwright.chromium.launch(
+                headless=self.headless,
+                args=["--disable-blink-features=AutomationControlled", "--no-sandbox"]
+            )
+            return await self._browser.new_context(storage_state=state, **self._context_options)
+
+    async def _get_context(self):
+        if self._context_lock is None:
+            self._context_lock = asyncio.Lock()
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        async with self._context_lock:
+            if self._context is None:
+                print("  [Async Scout] Opening search context...")
+                self._context = await self._open_context()
+            return self._context
+
+    async def _close(self):
+        for closer in (
+            lambda: self._context and self._context.close(),
+            lambda: self._browser and self._browser.close(),
+            lambda: self._playwright and self._playwright.stop(),
+        ):
+            try:
+                pending = closer()
+                if pending:
+                    await pending
+            except Exception as e:
+                print(f"  [Async Scout] Error during shutdown: {e}")
+        self._playwright = None
+        self._browser = None
+        self._context = None
+
+    # --- Searching ---
+
+    async def search(self, query: str, limit: int = 10, tag: Tag = None) -> SearchResult:
+        """Runs one search in its own tab, archives the tweets and returns them."""
+        with tracer.span("search", query=query) as span:
+            context = await self._get_context()
+            async with self._semaphore:
+                page = await context.new_page()
+                try:
+                    found = await self._search_on_page(page, query, limit, tag)
+                    span.set(count=len(found))
+                    return found
+                finally:
+                    try:
+                        await page.close()
+                    except Exception:
+                        pass
+
+    async def _oldest_watermark(self, terms: List[str]):
+        """(id, timestamp) covering every term, or (None, None) if any term has never run."""
+        marks = [await asyncio.to_thread(get_watermark, term) for term in terms]
+        if not marks or any(m is None for m in marks):
+            return None, None
+        oldest = min(marks, key=lambda m: snowflake(m.newest_id) or 0)
+        return snowflake(oldest.newest_id), oldest.newest_at
+
+    async def _search_on_page(self, page, query: str, limit: int, tag: Tag) -> SearchResult:
+        terms = split_terms(query)
+        newest_id, newest_at = await self._oldest_watermark(terms) if self.use_watermarks else (None, None)
+        stop = (lambda t: is_seen(t, newest_id)) if newest_id is not None else None
+
+        search_url = search_url_for(scoped_query(query, newest_id, newest_at))
+        print(f"  [Async Scout] Searching: {search_url}")
+
+        # The listener has to be registered before navigation to see the first page
+        capture = SearchTimelineCapture(page) if self.capture_mode == "graphql" else None
+        # Tabs run concurrently, but searches still go out at the account's pace
+        await self.pacer.wait_async("search")
+        with tracer.span("search.navigate"):
+            await page.goto(search_url)
+
+        # With a watermark, one tweet past the limit tells a run cut off by `limit` from one
+        # that covered the delta
+        harvest_limit = limit + 1 if newest_id is not None else limit
+        tweets = None
+        if capture:
+            tweets = await capture.collect(harvest_limit, accept=lambda t: not t.get("media"), stop=stop)
+            self._save_recording(capture, query)
+            if tweets is None:
+                print(f"  [Async Scout] No SearchTimeline response for '{query}'; scraping the DOM instead.")
+
+        if tweets is None:
+            tweets = await self._scrape_tweets(page, query, harvest_limit, stop)
+        # The page never showed a timeline (most likely logged out): a failure, not "nothing new"
+        if tweets is None:
+            return SearchResult()
+        capped = newest_id is not None and len(tweets) > limit
+        tweets = tweets[:limit]
+
+        found_tweets = []
+        pending = []
+        archived = 0
+        for tweet in tweets:
+            if len(found_tweets) >= limit:
+                break
+            if tweet.get("media"):
+                print(f"  Skipping Tweet {tweet['id']} (Has Image)")
+                continue
+
+            pending.append(to_interaction(tweet, tag(tweet) if callable(tag) else tag))
+            if len(pending) >= self.SAVE_BATCH_SIZE:
+                with tracer.span("db.write", count=len(pending)):
+                    await asyncio.to_thread(save_interactions_bulk, list(pending))
+                archived += len(pending)
+                pending.clear()
+            found_tweets.append(to_found(tweet))
+
+        if pending:
+            with tracer.span("db.write", count=len(pending)):
+                await asyncio.to_thread(save_interactions_bulk, pending)
+            archived += len(pending)
+        print(f"  [Async Scout] '{query}': archived {archived} tweets")
+
+        # Only once the tweets are safely archived: a failed write must not skip them next run.
+        # And only if the harvest covered the whole delta: when `limit` cut it off before the
+        # old watermark, moving past the gap would lose the rest of it for good
+        if capped:
+            print(f"  [Async Scout] '{query}': hit the limit before tweet {newest_id}; watermark kept.")
+        if self.use_watermarks and not capped:
+            top_id, top_at = newest(tweets)
+            if top_id is not None:
+                for term in terms:
+                    await asyncio.to_thread(advance_watermark, term, top_id, top_at)
+            if newest_id is not None:
+                print(f"  [Async Scout] '{query}': {len(tweets)} new since tweet {newest_id}")
+        return SearchResult(found_tweets, caught_up=newest_id is not None and not found_tweets)
+
+    async def _scrape_tweets(self, page, query: str, limit: int, stop=None) -> Optional[List[Dict]]:
+        """Tweets from the DOM; [] for a logged-in empty result, None if the page failed."""
+        try:
+            await page.wait_for_selector('article[data-testid="tweet"]', timeout=15000)
+        except Exception:
+            # Nothing new since the watermark is a normal, logged-in empty result
+            if await page.query_selector('[data-testid="emptyState"]'):
+                print(f"  [Async Scout] No new tweets for '{query}'.")
+                return []
+            # Otherwise most likely the exported session expired; pick up a fresh one next time
+            print(f"  [Async Scout] No tweets for '{query}'. Session will be re-exported.")
+            await self._expire_context()
+            return None
+
+        return await harvest_tweets_async(page, limit, accept=lambda t: not t.get("media"), stop=stop)
+
+    def _save_recording(self, capture: SearchTimelineCapture, query: str):
+        if not self.record_dir or not capture.recorded:
+            return
+        os.makedirs(self.record_dir, exist_ok=True)
+        slug = re.sub(r"[^a-z0-9]+", "_", query.lower()).strip("_")[:40]
+        path = os.path.join(self.record_dir, f"search_{slug}_{int(time.time())}.json")
+        capture.save_recording(path)
+        print(f"  [Async Scout] Recorded {len(capture.recorded)} SearchTimeline pages to {path}")
+
+    async def _expire_context(self):
+        async with self._context_lock:
+            context, self._context = self._context, None
+        if context is not None:
+            try:
+                await context.close()
+            except Exception:
+                pass
+
+    async def search_many(self, searches: Sequence[SearchSpec], limit: int = 10) -> AsyncIterator[Tuple[SearchSpec, SearchResult]]:
+        """Runs the searches concurrently and yields (spec, tweets) as each one finishes."""
+        async def run(spec: SearchSpec):
+            try:
+                return spec, await self.search(spec[0], limit, spec[1])
+            except Exception as e:
+                print(f"  [Async Scout] Search '{spec[0]}' failed: {e}")
+                return spec, SearchResult()
+
+        for next_done in asyncio.as_completed([run(spec) for spec in searches]):
+            yield await next_done
+
+    # --- Sync bridge ---
+
+    def iter_search(self, searches: Sequence[SearchSpec], limit: int = 10) -> Iterator[Tuple[SearchSpec, SearchResult]]:
+        """Blocking generator over search_many for callers without an event loop."""
+        results = queue.Queue()
+        # The loop thread has its own context; searches should still join the caller's trace
+        parent = tracer.current()
+
+        async def pump():
+            try:
+                with tracer.attach(parent):
+                    async for item in self.search_many(searches, limit):
+                        results.put(item)
+            finally:
+                results.put(_DONE)
+
+        future = self._submit(pump())
+        while True:
+            item = results.get()
+            if item is _DONE:
+                break
+            yield item
+        future.result()
+
+    def shutdown(self):
+        """Closes the search browser and stops the loop thread."""
+        if self._loop is None:
+            return
+        try:
+            self._submit(self._close()).result(timeout=30)
+        finally:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._loop = None
@@ -0,0 +1,113 @@
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional, TypeVar
+from playwright.sync_api import sync_playwright, Page, BrowserContext, Playwright
+from src.utils.tracing import tracer
+
+T = TypeVar("T")
+
+
+class BrowserService:
+    """
+    Keeps one warm persistent browser context alive across scout calls.
+
+    Playwright's sync objects can only be used from the thread that created
+    them, so the service owns a single worker thread and callers hand it work:
+    `service.run(lambda page: ...)` runs on that thread with the shared page and
+    returns the result. The context is launched on first use, health-checked
+    before every task, restarted if it died, and recycled after
+    `max_navigations` page loads to cap Chromium's memory.
+    """
+
+    def __init__(
+        self,
+        launch: Callable[[Playwright], BrowserContext],
+        on_start: Optional[Callable[[Page], None]] = None,
+        max_navigations: int = 200,
+        name: str = "browser"
+    ):
+        self._launch = launch
+        self._on_start = on_start
+        self.max_navigations = max_navigations
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=name)
+
+        # Only touched from the worker thread
+        self._playwright = None
+        self._context = None
+        self._page = None
+        self.navigations = 0
+        self.restarts = 0
+
+    def run(self, task: Callable[[Page], T]) -> T:
+        """Runs task(page) on the browser thread and returns (or raises) its result."""
+        # The caller's trace context goes along, so spans on the browser thread join its trace
+        return self._executor.submit(contextvars.copy_context().run, self._run, task).result()
+
+    def _run(self, task: Callable[[Page], T]) -> T:
+        if self.navigations >= self.max_navigations:
+            print(f"  [Browser] Recycling context after {self.navigations} navigations.")
+            self._stop()
+
+        if not self._healthy():
+            self._start()
+
+        try:
+            return task(self._page)
+        except Exception:
+            # A crashed page or context shouldn't poison the next caller
+            if not self._healthy():
+                print("  [Browser] Context died during task; it will be restarted on next use.")
+                self._stop()
+            raise
+
+    def _healthy(self) -> bool:
+        if self._page is None:
+            return False
+        try:
+            self._page.evaluate("1")
+            return True
+        except Exception:
+            return False
+
+    def _on_navigated(self, frame):
+        # Events fire on the worker thread, so no lock is needed
+        if frame.parent_frame is None:
+            self.navigations += 1
+
+    def _start(self):
+        if self._context is not None:
+            print("  [Browser] Context unhealthy. Restarting...")
+            self.restarts += 1
+        self._stop()
+
+        print("  [Browser] Launching browser context...")
+        with tracer.span("browser.launch", engine="sync"):
+            self._playwright = sync_playwright().start()
+            self._context = self._launch(self._playwright)
+        # A persistent context opens with a blank tab; reuse it rather than leaving it around
+        self._page = self._context.pages[0] if self._context.pages else self._context.new_page()
+        self._page.on("framenavigated", self._on_navigated)
+        self.navigations = 0
+
+        if self._on_start:
+            self._on_start(self._page)
+
+    def _stop(self):
+        for closer in (
+            lambda: self._context and self._context.close(),
+            lambda: self._playwright and self._playwright.stop(),
+        ):
+            try:
+                closer()
+            except Exception as e:
+                print(f"  [Browser] Error during shutdown: {e}")
+        self._playwright = None
+        self._context = None
+        self._page = None
+
+    def shutdown(self):
+        """Closes the browser and stops the worker thread."""
+        try:
+            self._executor.submit(self._stop).result(timeout=30)
+        finally:
+            self._executor.shutdown(wait=False)
@@ -1,84 +1,413 @@
+import asyncio
 import os
-from typing import List, Optional
+import random
+import threading
+import time
+from collections import deque
+from typing import Dict, List, Optional
 import anthropic
 from dotenv import load_dotenv
-from src.database import Interaction
+from src.database import (
+    Interaction, get_interactions_by_post_ids, get_interactions_to_draft, get_recent_replies,
+    get_status_count, save_interaction
+)
+from src.utils.reply_cache import ReplyCache
+from src.utils.tracing import tracer
 
 load_dotenv()
 
+# Worth retrying: rate limits, overload/5xx, timeouts and dropped connections
+RETRYABLE_ERRORS = (anthropic.APIStatusError, anthropic.APIConnectionError)
+
+# Batch custom_ids carry the tweet id so results can be matched back
+BATCH_ID_PREFIX = "draft-"
+
+# Identical for every reply, so it is sent as a cached system block. Anything
+# per-tweet goes in the user message, after the cache breakpoints.
+SYSTEM_PROMPT = """You are a tech-savvy Twitter user. You are NOT an AI assistant. You are a real person interacting on social media.
+
+TASK: Write a reply to the target post.
+
+GUIDELINES:
+1. Be ultra-casual, human, and authentic. Lowercase is preferred but not mandatory.
+2. NO bullet points. NO leading hyphens (-). Write like a text message or a quick tweet.
+3. No hashtags. Max 1 emoji (only if it really fits).
+4. If the post is technical, ask a specific relevant question or share a quick, insightful thought.
+5. Avoid generic praise like "Great post!" or "Awesome!". Be specific to the content.
+6. Keep it short (1-2 sentences).
+7. NEVER use quotes around your reply.
+8. STRICTLY FORBIDDEN: Starting the reply with a hyphen or dash.
+9. If the author is mentioned, talk TO them, not AT them.
+10. Respond to the *meaning* of the post, not just the keywords.
+
+Reply text only."""
+
+# Past replies shown as style examples; more of them also lengthens the cacheable prefix
+STYLE_HISTORY_SIZE = int(os.getenv("STYLE_HISTORY_SIZE", "5"))
+# New posted replies before the style history is re-rendered; every re-render
+# changes the cached prefix, so refreshing per post would never hit the cache
+STYLE_HISTORY_REFRESH = int(os.getenv("STYLE_HISTORY_REFRESH", "10"))
+
+
+def render_history(posts: List[Interaction]) -> str:
+    """The past-replies block that shows the model our voice."""
+    lines = [
+        f"Context Post: {(p.post_content or '')[:80]}... -> My Reply: {p.bot_comment}"
+        for p in posts[:STYLE_HISTORY_SIZE]
+        if p.bot_comment
+    ]
+    if not lines:
+        return ""
+    return "MY PAST COMMENTS (match this vibe - casual, lowercase often, direct):\n" + "\n".join(lines)
+
+
+class StyleHistory:
+    """
+    The rendered past-replies block, reused across calls. It is rebuilt once
+    `refresh_every` more replies have been POSTED (or while it is still
+    empty), so generating a reply costs one counter lookup instead of a
+    history query, and the block's bytes stay identical across many posts
+    (which is what lets the prompt cache hit).
+    """
+
+    def __init__(self, size: int = STYLE_HISTORY_SIZE, refresh_every: int = STYLE_HISTORY_REFRESH):
+        self.size = size
+        self.refresh_every = max(1, refresh_every)
+        self._lock = threading.Lock()
+        self._posted = None
+        self._block = ""
+
+    def block(self) -> str:
+        posted = get_status_count("POSTED")
+        with self._lock:
+            stale = (
+                self._posted is None
+                or posted < self._posted
+                or posted - self._posted >= self.refresh_every
+                or (not self._block and posted != self._posted)
+            )
+            if stale:
+                self._block = render_history(get_recent_replies(self.size))
+                self._posted = posted
+            return self._block
+
+
+class UsageStats:
+    """Token, latency and prompt-cache counters across every reply request."""
+
+    def __init__(self, window: int = 500):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.input_tokens = 0
+        self.cache_write_tokens = 0
+        self.cache_read_tokens = 0
+        self.output_tokens = 0
+        self._latencies = deque(maxlen=window)
+
+    def record(self, usage, latency: Optional[float] = None):
+        def tokens(name):
+            value = getattr(usage, name, None)
+            return value if isinstance(value, int) else 0
+
+        with self._lock:
+            self.requests += 1
+            self.input_tokens += tokens("input_tokens")
+            self.cache_write_tokens += tokens("cache_creation_input_tokens")
+            self.cache_read_tokens += tokens("cache_read_input_tokens")
+            self.output_tokens += tokens("output_tokens")
+            if latency is not None:
+                self._latencies.append(latency)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            prompt_tokens = self.input_tokens + self.cache_write_tokens + self.cache_read_tokens
+            latencies = sorted(self._latencies)
+            return {
+                "requests": self.requests,
+                "input_tokens": self.input_tokens,
+                "cache_write_tokens": self.cache_write_tokens,
+                "cache_read_tokens": self.cache_read_tokens,
+                "output_tokens": self.output_tokens,
+                # Share of prompt tokens served from the cache
+                "cache_hit_ratio": round(self.cache_read_tokens / prompt_tokens, 3) if prompt_tokens else 0.0,
+                "avg_latency_ms": round(1000 * sum(latencies) / len(latencies), 1) if latencies else None,
+                "p95_latency_ms": round(1000 * latencies[int(0.95 * (len(latencies) - 1))], 1) if latencies else None,
+            }
+
+
 class InteractionAgent:
-    def __init__(self):
+    def __init__(self, api_key: Optional[str] = None, base_url: Optional[str] = None):
         self.client = None
-        api_key = os.getenv("ANTHROPIC_API_KEY")
-        if api_key:
-            self.client = anthropic.Anthropic(api_key=api_key)
+        self.api_key = api_key or os.getenv("ANTHROPIC_API_KEY")
+        self.base_url = base_url or os.getenv("ANTHROPIC_BASE_URL") or None
+        self.model = os.getenv("ANTHROPIC_MODEL", "claude-3-haiku-20240307")
+
+        # Concurrent generation settings
+        self.concurrency = int(os.getenv("LLM_CONCURRENCY", "4"))
+        self.request_timeout = float(os.getenv("LLM_TIMEOUT_SECONDS", "30"))
+        self.max_retries = int(os.getenv("LLM_MAX_RETRIES", "4"))
+        self.backoff_base = 0.5
+        self.backoff_cap = 20.0
+
+        self.history = StyleHistory()
+        self.usage = UsageStats()
+        self.reply_cache = _build_reply_cache(self.model)
+
+        if self.api_key:
+            self.client = anthropic.Anthropic(api_key=self.api_key, base_url=self.base_url)
         else:
             print("ANTHROPIC_API_KEY not found. InteractionAgent will not generate comments.")
 
-    def generate_comment(self, target_post: Interaction, context_posts: List[Interaction]) -> Optional[str]:
+    def generate_comment(self, target_post: Interaction, context_posts: Optional[List[Interaction]] = None) -> Optional[str]:
         """
         Generates a comment for the target post using Claude (Anthropic), 
-        referencing previous interactions for style/context.
+        referencing previous interactions for style/context. Without
+        context_posts the cached history of our latest posted replies is used.
         """
         if not self.client:
             print("Error: AI Agent not configured (missing Anthropic API key).")
             return None
 
-        # Prepare context string (last 5 interactions for better style matching)
-        history_context = ""
-        if context_posts:
-            history_context = "MY PAST COMMENTS (match this vibe - casual, lowercase often, direct):\n"
-            history_context += "\n".join([
-                f"Context Post: {p.post_content[:80]}... -> My Reply: {p.bot_comment}" 
-                for p in context_posts[:5] 
-                if p.bot_comment
-            ])
+        cached = self._cached_reply(target_post)
+        if cached is not None:
+            return cached.reply
+
+        try:
+            params = self._request_params(target_post, self._history_block(context_posts))
+            start = time.perf_counter()
+            with tracer.span("llm.reply", model=self.model) as span:
+                response = self.client.messages.create(**params)
+                span.set(output_tokens=getattr(response.usage, "output_tokens", None))
+            elapsed = time.perf_counter() - start
+            self.usage.record(response.usage, elapsed)
+            reply = self.clean_reply(response.content[0].text)
+            self._remember_reply(target_post, reply, elapsed)
+            return reply
+            
+        except Exception as e:
+            print(f"Error generating comment with Claude: {e}")
+            return None
+
+    def _cached_reply(self, target_post: Interaction):
+        """A reply from the reply cache (None inside means: skip this duplicate)."""
+        if not self.reply_cache or not target_post.post_content:
+            return None
+        cached = self.reply_cache.lookup(target_post.external_post_id, target_post.post_content, target_post.tag)
+        if cached is not None:
+            if cached.reply is None:
+                print(f"  Skipping {target_post.external_post_id}: duplicate of {cached.source_post_id}.")
+            else:
+                print(f"  Reusing cached reply ({cached.kind} match of {cached.source_post_id}).")
+        return cached
+
+    def _remember_reply(self, target_post: Interaction, reply: str, seconds: Optional[float] = None):
+        if self.reply_cache and reply and target_post.post_content:
+            self.reply_cache.store(target_post.external_post_id, target_post.post_content, target_post.tag, reply, seconds)
+
+    def _history_block(self, context_posts: Optional[List[Interaction]]) -> str:
+        if context_posts is None:
+            return self.history.block()
+        return render_history(context_posts)
+
+    def _request_params(self, target_post: Interaction, history: str) -> Dict:
+        # Guidelines, then style history, each marked as a cache breakpoint: the
+        # prefix up to the last unchanged block is read from the cache. The
+        # API only caches prefixes above the model's minimum length (2048
+        # tokens on Haiku); the guidelines plus a five-reply history fall
+        # short of that, so cache_hit_ratio stays 0 there until the prefix
+        # grows (STYLE_HISTORY_SIZE, or a model with a lower minimum).
+        system = [{"type": "text", "text": SYSTEM_PROMPT, "cache_control": {"type": "ephemeral"}}]
+        if history:
+            system.append({"type": "text", "text": history, "cache_control": {"type": "ephemeral"}})
+        return {
+            "model": self.model,
+            "max_tokens": 150,
+            "system": system,
+            "messages": [{"role": "user", "content": self.build_prompt(target_post)}]
+        }
 
+    @staticmethod
+    def clean_reply(text: str) -> str:
+        """Post-processing to ensure no leading hyphens/quotes."""
+        content = text.strip()
+        if content.startswith('"') and content.endswith('"'):
+            content = content[1:-1]
+        return content.lstrip("-").strip()
+
+    def build_prompt(self, target_post: Interaction) -> str:
+        """The per-tweet part of the prompt (the user message)."""
         # Enrich context with author and topic details
         author_context = f"Author: {target_post.author_name} (@{target_post.author_handle})" if target_post.author_handle else ""
         topic_context = f"Topic/Tag: {target_post.tag}" if target_post.tag else ""
         
-        prompt = f"""You are a tech-savvy Twitter user. You are NOT an AI assistant. You are a real person interacting on social media.
-        
-CONTEXT:
+        prompt = f"""CONTEXT:
 {author_context}
 {topic_context}
 
 TARGET POST:
 "{target_post.post_content}"
 
-{history_context}
+Reply text only:"""
+        return prompt
 
-TASK: Write a reply to the target post.
+    # --- Concurrent generation ---
 
-GUIDELINES:
-1. Be ultra-casual, human, and authentic. Lowercase is preferred but not mandatory.
-2. NO bullet points. NO leading hyphens (-). Write like a text message or a quick tweet.
-3. No hashtags. Max 1 emoji (only if it really fits).
-4. If the post is technical, ask a specific relevant question or share a quick, insightful thought.
-5. Avoid generic praise like "Great post!" or "Awesome!". Be specific to the content.
-6. Keep it short (1-2 sentences).
-7. NEVER use quotes around your reply.
-8. STRICTLY FORBIDDEN: Starting the reply with a hyphen or dash.
-9. If the author is mentioned, talk TO them, not AT them.
-10. Respond to the *meaning* of the post, not just the keywords.
+    def generate_comments_batch(self, targets: List[Interaction], context: Optional[List[Interaction]] = None) -> List[Optional[str]]:
+        """
+        Generates replies for many targets concurrently on AsyncAnthropic.
+        Results come back in input order; a target that still fails after
+        retries gets None. Blocking wrapper for callers without an event loop.
+        """
+        if not self.api_key:
+            print("Error: AI Agent not configured (missing Anthropic API key).")
+            return [None] * len(targets)
+        return asyncio.run(self.agenerate_comments_batch(targets, context))
 
-Reply text only:"""
+    async def agenerate_comments_batch(self, targets: List[Interaction], context: Optional[List[Interaction]] = None) -> List[Optional[str]]:
+        """Async core of generate_comments_batch, for callers already on a loop."""
+        semaphore = asyncio.Semaphore(self.concurrency)
+        # One history block for the whole batch, so every request shares the cached prefix
+        history = await asyncio.to_thread(self._history_block, context)
+        # One client per batch: its connection pool belongs to the loop running this batch
+        async with anthropic.AsyncAnthropic(
+            api_key=self.api_key, base_url=self.base_url, max_retries=0
+        ) as client:
+            async def generate(target: Interaction) -> Optional[str]:
+                cached = await asyncio.to_thread(self._cached_reply, target)
+                if cached is not None:
+                    return cached.reply
+                async with semaphore:
+                    start = time.perf_counter()
+                    reply = await self._generate_with_retry(client, self._request_params(target, history))
+                if reply:
+                    await asyncio.to_thread(self._remember_reply, target, reply, time.perf_counter() - start)
+                return reply
 
-        try:
-            response = self.client.messages.create(
-                model="claude-3-haiku-20240307",
-                max_tokens=150,
-                messages=[{"role": "user", "content": prompt}]
-            )
-            # Post-processing to ensure no leading hyphens/quotes
-            content = response.content[0].text.strip()
-            if content.startswith('"') and content.endswith('"'):
-                content = content[1:-1]
-            return content.lstrip("-").strip()
-            
-        except Exception as e:
-            print(f"Error generating comment with Claude: {e}")
+            return list(await asyncio.gather(*(generate(t) for t in targets)))
+
+    async def _generate_with_retry(self, client, params: Dict) -> Optional[str]:
+        for attempt in range(self.max_retries + 1):
+            try:
+                start = time.perf_counter()
+                with tracer.span("llm.reply", model=self.model, attempt=attempt):
+                    response = await client.messages.create(**params, timeout=self.request_timeout)
+                self.usage.record(response.usage, time.perf_counter() - start)
+                return self.clean_reply(response.content[0].text)
+            except RETRYABLE_ERRORS as e:
+                if isinstance(e, anthropic.APIStatusError) and e.status_code < 500 and e.status_code != 429:
+                    print(f"Error generating comment with Claude: {e}")
+                    return None
+                if attempt == self.max_retries:
+                    print(f"Giving up on comment after {attempt + 1} attempts: {e}")
+                    return None
+                await asyncio.sleep(self._backoff(attempt, e))
+            except Exception as e:
+                print(f"Error generating comment with Claude: {e}")
+                return None
+        return None
+
+    def _backoff(self, attempt: int, error: Exception) -> float:
+        """Full-jitter exponential backoff, or the server's retry-after if it sent one."""
+        response = getattr(error, "response", None)
+        retry_after = response.headers.get("retry-after") if response is not None else None
+        if retry_after:
+            try:
+                return min(float(retry_after), self.backoff_cap)
+            except ValueError:
+                pass
+        return random.uniform(0, min(self.backoff_cap, self.backoff_base * (2 ** attempt)))
+
+    # --- Message Batches (offline backlogs) ---
+
+    def submit_draft_batch(self, tag: Optional[str] = None, limit: Optional[int] = None) -> Optional[str]:
+        """
+        Queues reply drafts for ARCHIVED posts without a comment (optionally one
+        tag) through the Message Batches API. Returns the batch id; call
+        collect_draft_batch() once it has ended.
+        """
+        if not self.client:
+            print("Error: AI Agent not configured (missing Anthropic API key).")
+            return None
+
+        targets = get_interactions_to_draft(tag=tag, limit=limit)
+        if not targets:
+            print("No archived posts need drafts.")
             return None
 
+        history = self.history.block()
+        batch = self.client.messages.batches.create(requests=[
+            {"custom_id": f"{BATCH_ID_PREFIX}{t.external_post_id}", "params": self._request_params(t, history)}
+            for t in targets
+        ])
+        print(f"Submitted draft batch {batch.id} for {len(targets)} posts.")
+        return batch.id
+
+    def collect_draft_batch(self, batch_id: str) -> Optional[int]:
+        """
+        Stores finished drafts as PLANNED interactions (auto-engage posts them
+        without another LLM call). Returns how many were saved, or None if the
+        batch is still processing.
+        """
+        batch = self.client.messages.batches.retrieve(batch_id)
+        if batch.processing_status != "ended":
+            return None
+
+        drafts = {}
+        for entry in self.client.messages.batches.results(batch_id):
+            if entry.result.type != "succeeded" or not entry.custom_id.startswith(BATCH_ID_PREFIX):
+                continue
+            self.usage.record(entry.result.message.usage)
+            text = self.clean_reply(entry.result.message.content[0].text)
+            if text:
+                drafts[entry.custom_id[len(BATCH_ID_PREFIX):]] = text
+
+        saved = self._save_drafts(drafts)
+        print(f"Saved {saved} drafts from batch {batch_id}.")
+        return saved
+
+    def draft_backlog(self, tag: Optional[str] = None, limit: Optional[int] = None) -> int:
+        """
+        Same as a draft batch, but generated right away through
+        generate_comments_batch (full price, minutes instead of hours).
+        Returns how many drafts were saved.
+        """
+        targets = get_interactions_to_draft(tag=tag, limit=limit)
+        if not targets:
+            print("No archived posts need drafts.")
+            return 0
+        replies = self.generate_comments_batch(targets)
+        saved = self._save_drafts({t.external_post_id: r for t, r in zip(targets, replies) if r})
+        print(f"Saved {saved} drafts for {len(targets)} posts.")
+        return saved
+
+    @staticmethod
+    def _save_drafts(drafts: Dict[str, str]) -> int:
+        """Stores post id -> reply drafts as PLANNED interactions."""
+        saved = 0
+        for post_id, interaction in get_interactions_by_post_ids(list(drafts)).items():
+            # Posted by hand while the drafts were generated: keep what went out
+            if interaction.status == "POSTED":
+                continue
+            save_interaction(
+                platform=interaction.platform,
+                external_post_id=post_id,
+                post_content=interaction.post_content,
+                status="PLANNED",
+                bot_comment=drafts[post_id]
+            )
+            saved += 1
+        return saved
+
+def _build_reply_cache(model_name: str) -> Optional[ReplyCache]:
+    """REPLY_CACHE_TTL_HOURS=0 turns the reply cache off."""
+    ttl_hours = float(os.getenv("REPLY_CACHE_TTL_HOURS", "72"))
+    if ttl_hours <= 0:
+        return None
+    return ReplyCache(
+        model_name,
+        ttl_seconds=ttl_hours * 3600,
+        max_distance=int(os.getenv("REPLY_CACHE_MAX_DISTANCE", "6")),
+        near_policy=os.getenv("REPLY_CACHE_DUPLICATES", "skip")
+    )
+
 interaction_agent = InteractionAgent()
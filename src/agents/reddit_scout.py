@@ -2,7 +2,7 @@ import os
 import praw
 from typing import List, Dict
 from dotenv import load_dotenv
-from src.database import save_interaction, check_deduplication
+from src.database import save_interactions_bulk, check_deduplication
 
 load_dotenv()
 
@@ -49,6 +49,8 @@ class RedditScout:
 
         print(f"Scouting r/{subreddit_str} for '{search_query}'...")
 
+        pending = []
+
         try:
             # Search logic
             for submission in subreddit.search(search_query, limit=limit, sort='new'):
@@ -69,19 +71,27 @@ class RedditScout:
                 # We combine title and body for the 'post_content' field
                 full_content = f"Title: {submission.title}\nBody: {submission.selftext}\nURL: {submission.url}"
                 
-                save_interaction(
+                pending.append(dict(
                     platform="Reddit",
                     external_post_id=submission.id,
                     post_content=full_content,
                     status="ARCHIVED"
-                )
+                ))
                 
                 found_posts.append(post_data)
-                print(f"Archived: {submission.title[:30]}...")
+                print(f"Found: {submission.title[:30]}...")
 
         except Exception as e:
             print(f"Error fetching Reddit posts: {e}")
 
+        # One transaction for the whole search instead of one per submission
+        if pending:
+            try:
+                save_interactions_bulk(pending)
+                print(f"Archived {len(pending)} Reddit posts.")
+            except Exception as e:
+                print(f"Error archiving Reddit posts: {e}")
+
         return found_posts
 
     def like_post(self, external_post_id: str) -> bool:
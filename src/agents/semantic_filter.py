@@ -1,8 +1,14 @@
-from sentence_transformers import SentenceTransformer
+import os
+import threading
 import numpy as np
-from typing import List, Dict
+from typing import List, Dict, Optional
+from src.utils.embedding_cache import EmbeddingCache
+from src.utils.keyword_matcher import KeywordMatcher
+from src.utils.scoring_server import score_remote
 
 class SemanticFilter:
+    MODEL_NAME = 'all-MiniLM-L6-v2'
+
     # Reference sentences that define "vibe coding" content
     VIBE_CODING_EXAMPLES = [
         "Just shipped my side project after 2 weeks of vibe coding",
@@ -15,68 +21,187 @@ class SemanticFilter:
         "Vibe coded a tool to solve my own problem"
     ]
     
-    def __init__(self, threshold: float = 0.35):
-        # Using a smaller model for efficiency, as per research
-        self.model = SentenceTransformer('all-MiniLM-L6-v2')
+    def __init__(
+        self,
+        threshold: float = 0.35,
+        batch_size: int = 64,
+        cache: Optional[EmbeddingCache] = None,
+        socket_path: Optional[str] = None
+    ):
+        # The model is loaded on first use (see _ensure_loaded), not at construction
         self.threshold = threshold
-        # Pre-compute reference embeddings
-        self.reference_embeddings = self.model.encode(
-            self.VIBE_CODING_EXAMPLES, 
-            convert_to_tensor=True
+        self.batch_size = batch_size
+        self.cache = cache
+        # If set, scoring is delegated to a shared scoring process on this Unix socket
+        self.socket_path = socket_path
+        self._model = None
+        self._reference_embeddings = None
+        self._load_lock = threading.Lock()
+
+    def _ensure_loaded(self):
+        """Loads the model and reference embeddings once, on the first call that needs them."""
+        if self._model is not None:
+            return
+        with self._load_lock:
+            if self._model is not None:
+                return
+            # Imported here so importing this module doesn't pull in torch
+            from sentence_transformers import SentenceTransformer
+
+            print(f"Loading semantic model {self.MODEL_NAME}...")
+            # Using a smaller model for efficiency, as per research
+            model = SentenceTransformer(self.MODEL_NAME)
+            # Pre-compute reference embeddings (unit length, so a dot product is cosine similarity)
+            self._reference_embeddings = self._encode(self.VIBE_CODING_EXAMPLES, model=model)
+            self._model = model
+
+    @property
+    def model(self):
+        self._ensure_loaded()
+        return self._model
+
+    @property
+    def reference_embeddings(self) -> np.ndarray:
+        self._ensure_loaded()
+        return self._reference_embeddings
+
+    @property
+    def is_loaded(self) -> bool:
+        return self._model is not None
+
+    def warm_up(self):
+        """Loads the model now instead of on the first scoring call."""
+        if self.socket_path:
+            return
+        try:
+            self._ensure_loaded()
+            print("Semantic model ready.")
+        except Exception as e:
+            print(f"Semantic model warm-up failed: {e}")
+
+    def start_warm_up(self) -> threading.Thread:
+        """Runs warm_up in a daemon thread so startup isn't blocked on the model."""
+        thread = threading.Thread(target=self.warm_up, daemon=True)
+        thread.start()
+        return thread
+
+    def _encode(self, texts: List[str], model=None) -> np.ndarray:
+        """Encodes texts in padded batches into a (n, dim) float32 matrix of unit vectors."""
+        embeddings = (model or self.model).encode(
+            texts,
+            batch_size=self.batch_size,
+            convert_to_numpy=True,
+            normalize_embeddings=True
         )
-    
+        return np.asarray(embeddings, dtype=np.float32)
+
+    def score_many(self, texts: List[str]) -> List[float]:
+        """Scores a list of texts in one pass. Returns one relevance score per text, in order."""
+        scores = [0.0] * len(texts)
+        # Too-short texts are never relevant, so they don't go through the encoder
+        candidates = [i for i, text in enumerate(texts) if text and len(text.strip()) >= 10]
+        if not candidates:
+            return scores
+
+        candidate_texts = [texts[i] for i in candidates]
+
+        if self.socket_path:
+            try:
+                for i, score in zip(candidates, score_remote(self.socket_path, candidate_texts)):
+                    scores[i] = score
+                return scores
+            except OSError as e:
+                print(f"Scoring server unavailable ({e}). Scoring in-process.")
+
+        if self.cache:
+            embeddings = self.cache.get_or_encode(candidate_texts, self._encode)
+        else:
+            embeddings = self._encode(candidate_texts)
+
+        # One (n, refs) similarity matrix, max over the reference examples
+        similarities = embeddings @ self.reference_embeddings.T
+        for i, score in zip(candidates, similarities.max(axis=1)):
+            scores[i] = float(score)
+        return scores
+
     def score_relevance(self, text: str) -> float:
         """Score how relevant a post is to vibe coding (0.0 to 1.0)."""
-        if not text or len(text.strip()) < 10:
-            return 0.0
-            
-        text_embedding = self.model.encode([text], convert_to_tensor=True)
-        
-        # Calculate similarity to all reference examples
-        similarities = self.model.similarity(
-            text_embedding, 
-            self.reference_embeddings
-        )[0]
-        
-        # Return max similarity as the relevance score
-        return float(similarities.max())
+        return self.score_many([text])[0]
     
     def filter_posts(self, posts: List[Dict]) -> List[Dict]:
         """Filter posts to only those above relevance threshold."""
-        relevant = []
-        for post in posts:
-            content = post.get('post_content') or post.get('content') or post.get('text') or ""
-            score = self.score_relevance(content)
-            # We can inject the score back into the dict if needed, 
-            # but for now we just filter
-            if score >= self.threshold:
-                relevant.append(post)
-        
-        return relevant
+        if not posts:
+            return []
+
+        contents = [
+            post.get('post_content') or post.get('content') or post.get('text') or ""
+            for post in posts
+        ]
+        scores = self.score_many(contents)
+
+        # We can inject the score back into the dict if needed,
+        # but for now we just filter
+        return [post for post, score in zip(posts, scores) if score >= self.threshold]
 
 # Quick keyword-based pre-filter (faster, use before semantic)
-def keyword_prefilter(posts: List[Dict]) -> List[Dict]:
-    """Fast keyword filter before expensive semantic scoring."""
-    MUST_HAVE = [
-        'launch', 'ship', 'built', 'building', 'mvp', 'project',
-        'feedback', 'vibe', 'indie', 'saas', 'deploy', 'release',
-        'build in public', 'side project', 'startup', 'coding'
-    ]
-    SKIP_WORDS = [
-        'hiring', 'job', 'salary', 'interview', 'tutorial',
-        'course', 'learn', 'beginner', 'question'
-    ]
-    
+MUST_HAVE = [
+    'launch', 'ship', 'built', 'building', 'mvp', 'project',
+    'feedback', 'vibe', 'indie', 'saas', 'deploy', 'release',
+    'build in public', 'side project', 'startup', 'coding'
+]
+SKIP_WORDS = [
+    'hiring', 'job', 'salary', 'interview', 'tutorial',
+    'course', 'learn', 'beginner', 'question'
+]
+
+# Compiled once; per-tag matchers are compiled when configured, never per call
+_default_matcher = KeywordMatcher(MUST_HAVE, SKIP_WORDS)
+_tag_matchers: Dict[str, KeywordMatcher] = {}
+
+def configure_tag_keywords(
+    tag: str,
+    must_have: Optional[List[str]] = None,
+    skip_words: Optional[List[str]] = None,
+    whole_words: bool = False
+) -> KeywordMatcher:
+    """Sets the keyword lists used for posts with this tag. Omitted lists fall back to the defaults."""
+    matcher = KeywordMatcher(
+        must_have if must_have is not None else MUST_HAVE,
+        skip_words if skip_words is not None else SKIP_WORDS,
+        whole_words=whole_words
+    )
+    _tag_matchers[tag] = matcher
+    return matcher
+
+def get_keyword_matcher(tag: Optional[str] = None) -> KeywordMatcher:
+    return _tag_matchers.get(tag, _default_matcher) if tag else _default_matcher
+
+def keyword_prefilter(posts: List[Dict], tag: Optional[str] = None) -> List[Dict]:
+    """
+    Fast keyword filter before expensive semantic scoring.
+    Kept posts are returned as copies annotated with their matching include
+    keywords under 'matched_keywords'; the caller's dicts are left untouched.
+    """
     filtered = []
     for post in posts:
-        text = (post.get('post_content') or post.get('content') or post.get('text') or "").lower()
-        has_keyword = any(kw in text for kw in MUST_HAVE)
-        has_skip = any(sw in text for sw in SKIP_WORDS)
-        
-        if has_keyword and not has_skip:
-            filtered.append(post)
+        text = post.get('post_content') or post.get('content') or post.get('text') or ""
+        match = get_keyword_matcher(tag or post.get('tag')).match(text)
+
+        if match.passed:
+            filtered.append({**post, 'matched_keywords': match.include})
     
     return filtered
 
-semantic_filter = SemanticFilter()
+def _build_default_cache() -> Optional[EmbeddingCache]:
+    """EMBEDDING_CACHE_SIZE=0 turns the on-disk embedding cache off."""
+    max_entries = int(os.getenv("EMBEDDING_CACHE_SIZE", "50000"))
+    if max_entries <= 0:
+        return None
+    return EmbeddingCache(SemanticFilter.MODEL_NAME, max_entries=max_entries)
+
+# Cheap to construct: nothing is loaded until the first scoring call
+semantic_filter = SemanticFilter(
+    cache=_build_default_cache(),
+    socket_path=os.getenv("SEMANTIC_SCORER_SOCKET") or None
+)
 
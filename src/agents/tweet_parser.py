@@ -0,0 +1,214 @@
+import time
+from typing import Callable, Dict, List, Optional
+
+from src.utils.tracing import tracer
+
+# Parses every rendered tweet <article> in one round-trip. Each Playwright
+# element call is its own CDP message, so walking the DOM from Python cost
+# ~10 round-trips per tweet; this returns the whole page as one JSON array.
+EXTRACT_TWEETS_JS = r"""
+() => {
+    const metric = (article, testid) => {
+        const el = article.querySelector(`[data-testid="${testid}"]`);
+        return el ? el.innerText.trim() : "0";
+    };
+
+    return Array.from(document.querySelectorAll('article[data-testid="tweet"]')).map(article => {
+        const time = article.querySelector("time");
+        if (!time) return null;
+
+        // The timestamp links to the tweet; fall back to any status link that isn't a photo
+        let href = (time.parentElement && time.parentElement.getAttribute("href")) || "";
+        if (!href.includes("status")) {
+            href = "";
+            for (const a of article.querySelectorAll("a")) {
+                const h = a.getAttribute("href");
+                if (h && h.includes("/status/") && !h.includes("/photo/")) { href = h; break; }
+            }
+        }
+        if (!href) return null;
+
+        const id = href.split("/status/").pop().split("?")[0];
+        if (!id) return null;
+
+        const text = article.querySelector('div[data-testid="tweetText"]');
+        const user = article.querySelector('div[data-testid="User-Name"]');
+        const img = article.querySelector('div[data-testid="tweetPhoto"] img');
+
+        return {
+            id: id,
+            href: href,
+            handle: "@" + href.split("/")[1],
+            text: text ? text.innerText : "[No Text / Image Only]",
+            author: user ? user.innerText.split("\n")[0] : "Unknown",
+            metrics: {
+                replies: metric(article, "reply"),
+                retweets: metric(article, "retweet"),
+                likes: metric(article, "like")
+            },
+            media: img ? img.getAttribute("src") : null,
+            created_at: time.getAttribute("datetime")
+        };
+    }).filter(Boolean);
+}
+"""
+
+
+# Scrolls one step and resolves once new tweet articles have been added and the
+# DOM has been quiet for a moment (true), or after timeoutMs with nothing new
+# (false). Waiting on mutations instead of a fixed sleep returns as soon as the
+# next batch has rendered.
+SCROLL_AND_WAIT_JS = r"""
+([timeoutMs, quietMs]) => new Promise(resolve => {
+    const isTweet = node => node.nodeType === 1 &&
+        (node.matches('article[data-testid="tweet"]') || node.querySelector('article[data-testid="tweet"]'));
+    let quietTimer = null;
+    const finish = changed => {
+        observer.disconnect();
+        clearTimeout(deadline);
+        clearTimeout(quietTimer);
+        resolve(changed);
+    };
+    const observer = new MutationObserver(mutations => {
+        if (mutations.some(m => Array.from(m.addedNodes).some(isTweet))) {
+            clearTimeout(quietTimer);
+            quietTimer = setTimeout(() => finish(true), quietMs);
+        }
+    });
+    observer.observe(document.body, {childList: true, subtree: true});
+    const deadline = setTimeout(() => finish(false), timeoutMs);
+    window.scrollBy(0, window.innerHeight * 2);
+})
+"""
+
+# Per-step wait for new tweets, the settle time after they appear, and how
+# many scrolls in a row may bring nothing new before we call the feed exhausted
+SCROLL_TIMEOUT_MS = 4000
+SCROLL_QUIET_MS = 150
+MAX_IDLE_SCROLLS = 2
+MAX_SCROLLS = 40
+
+
+class Harvest:
+    """
+    Accumulates tweets across scroll steps. Twitter's timeline is virtualized:
+    articles scrolled past are recycled, so each step's extraction overlaps the
+    last. Tweets are deduped by id, so none are lost or double-counted.
+
+    `stop` marks the first tweet we don't need to go past (e.g. one already
+    archived on a newest-first timeline): it and everything below it are dropped.
+    """
+
+    def __init__(self, limit: int, accept: Optional[Callable[[Dict], bool]] = None,
+                 stop: Optional[Callable[[Dict], bool]] = None):
+        self.limit = limit
+        self.accept = accept
+        self.stop = stop
+        self.tweets: List[Dict] = []
+        self.seen = set()
+        self.idle_scrolls = 0
+        self.scrolls = 0
+        self.stopped = False
+
+    def absorb(self, batch: List[Dict]) -> bool:
+        """Adds one extraction; returns True once harvesting should stop."""
+        new = 0
+        for tweet in batch:
+            if tweet["id"] in self.seen:
+                continue
+            if self.stop is not None and self.stop(tweet):
+                self.stopped = True
+                break
+            self.seen.add(tweet["id"])
+            new += 1
+            if self.accept is None or self.accept(tweet):
+                self.tweets.append(tweet)
+
+        self.idle_scrolls = 0 if new else self.idle_scrolls + 1
+        return (
+            self.stopped
+            or len(self.tweets) >= self.limit
+            or self.idle_scrolls >= MAX_IDLE_SCROLLS
+            or self.scrolls >= MAX_SCROLLS
+        )
+
+    def result(self) -> List[Dict]:
+        return self.tweets[:self.limit]
+
+
+def _traced(harvest: Harvest, parse_seconds: float, scroll_seconds: float) -> List[Dict]:
+    """The harvest's result, with its extraction and scrolling time traced as separate stages."""
+    tweets = harvest.result()
+    tracer.record("search.parse", parse_seconds, count=len(tweets))
+    tracer.record("search.scroll", scroll_seconds, count=harvest.scrolls)
+    return tweets
+
+
+def harvest_tweets(page, limit: int, accept: Optional[Callable[[Dict], bool]] = None,
+                   stop: Optional[Callable[[Dict], bool]] = None) -> List[Dict]:
+    """Scrolls a sync page until `limit` accepted unique tweets, a `stop` tweet, or no new content."""
+    harvest = Harvest(limit, accept, stop)
+    parse_seconds = scroll_seconds = 0.0
+    while True:
+        start = time.perf_counter()
+        batch = extract_tweets(page)
+        parse_seconds += time.perf_counter() - start
+        if harvest.absorb(batch):
+            break
+        start = time.perf_counter()
+        page.evaluate(SCROLL_AND_WAIT_JS, [SCROLL_TIMEOUT_MS, SCROLL_QUIET_MS])
+        scroll_seconds += time.perf_counter() - start
+        harvest.scrolls += 1
+    return _traced(harvest, parse_seconds, scroll_seconds)
+
+
+async def harvest_tweets_async(page, limit: int, accept: Optional[Callable[[Dict], bool]] = None,
+                               stop: Optional[Callable[[Dict], bool]] = None) -> List[Dict]:
+    """Scrolls an async page until `limit` accepted unique tweets, a `stop` tweet, or no new content."""
+    harvest = Harvest(limit, accept, stop)
+    parse_seconds = scroll_seconds = 0.0
+    while True:
+        start = time.perf_counter()
+        batch = await extract_tweets_async(page)
+        parse_seconds += time.perf_counter() - start
+        if harvest.absorb(batch):
+            break
+        start = time.perf_counter()
+        await page.evaluate(SCROLL_AND_WAIT_JS, [SCROLL_TIMEOUT_MS, SCROLL_QUIET_MS])
+        scroll_seconds += time.perf_counter() - start
+        harvest.scrolls += 1
+    return _traced(harvest, parse_seconds, scroll_seconds)
+
+
+def extract_tweets(page) -> List[Dict]:
+    """Every visible tweet on a sync Playwright page, in DOM order."""
+    return page.evaluate(EXTRACT_TWEETS_JS) or []
+
+
+async def extract_tweets_async(page) -> List[Dict]:
+    """Every visible tweet on an async Playwright page, in DOM order."""
+    return await page.evaluate(EXTRACT_TWEETS_JS) or []
+
+
+def to_interaction(tweet: Dict, tag: Optional[str] = None, status: str = "ARCHIVED") -> Dict:
+    """Maps an extracted tweet onto save_interaction(s) keyword arguments."""
+    return dict(
+        platform="Twitter",
+        external_post_id=tweet["id"],
+        post_content=tweet["text"],
+        status=status,
+        author_name=tweet["author"],
+        author_handle=tweet["handle"],
+        post_url=f"https://twitter.com{tweet['href']}",
+        metrics=tweet["metrics"],
+        media_url=tweet.get("media"),
+        tag=tag
+    )
+
+
+def to_found(tweet: Dict) -> Dict:
+    """The summary dict fetch_posts returns to callers."""
+    return {
+        "id": tweet["id"], "text": tweet["text"], "author": tweet["author"],
+        "handle": tweet["handle"], "metrics": tweet["metrics"]
+    }
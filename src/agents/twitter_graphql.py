@@ -0,0 +1,266 @@
+"""
+Tweets straight from Twitter's SearchTimeline GraphQL responses.
+
+Rendering and scraping articles misses tweets the virtualized list has already
+recycled and only sees abbreviated counts ("1.2K"). The search page fetches
+its results as JSON, so we listen for those responses instead, parse them into
+the same dicts the DOM extractor produces (with exact integer metrics), and
+follow the bottom cursor for more pages until we have enough.
+
+Captured pages can be recorded to a fixture and replayed through the same
+pagination code, so the parser is testable offline.
+"""
+import abc
+import asyncio
+import json
+import time
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlencode, urlsplit, urlunsplit
+
+from src.utils.tracing import tracer
+
+SEARCH_TIMELINE_MARKER = "/SearchTimeline"
+
+
+def _unwrap(result: Dict) -> Dict:
+    # Tweets with reply restrictions etc. come wrapped one level deeper
+    if result.get("__typename") == "TweetWithVisibilityResults":
+        return result.get("tweet") or {}
+    return result
+
+
+def _count(value) -> int:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return 0
+
+
+def _timestamp(created_at: Optional[str]) -> Optional[str]:
+    # legacy.created_at looks like "Sat Oct 17 12:00:00 +0000 2026"; the DOM gives ISO 8601
+    try:
+        return datetime.strptime(created_at, "%a %b %d %H:%M:%S %z %Y").isoformat()
+    except (TypeError, ValueError):
+        return None
+
+
+def parse_tweet_result(result: Dict) -> Optional[Dict]:
+    """One tweet_results.result node -> extractor-shaped dict; None for tombstones etc."""
+    result = _unwrap(result or {})
+    legacy = result.get("legacy")
+    if not legacy:
+        return None
+
+    user = (result.get("core") or {}).get("user_results", {}).get("result") or {}
+    user_legacy = user.get("legacy") or {}
+    user_core = user.get("core") or {}
+    screen_name = user_legacy.get("screen_name") or user_core.get("screen_name")
+    tweet_id = legacy.get("id_str") or result.get("rest_id")
+    if not screen_name or not tweet_id:
+        return None
+
+    # Long tweets keep the full text in note_tweet; legacy.full_text is truncated
+    note = (result.get("note_tweet") or {}).get("note_tweet_results", {}).get("result") or {}
+    text = note.get("text") or legacy.get("full_text") or "[No Text / Image Only]"
+
+    media = (legacy.get("extended_entities") or legacy.get("entities") or {}).get("media") or []
+
+    metrics = {
+        "replies": _count(legacy.get("reply_count")),
+        "retweets": _count(legacy.get("retweet_count")),
+        "likes": _count(legacy.get("favorite_count")),
+        "quotes": _count(legacy.get("quote_count")),
+    }
+    views = (result.get("views") or {}).get("count")
+    if views is not None:
+        metrics["views"] = _count(views)
+
+    return {
+        "id": tweet_id,
+        "href": f"/{screen_name}/status/{tweet_id}",
+        "handle": "@" + screen_name,
+        "text": text,
+        "author": user_legacy.get("name") or user_core.get("name") or "Unknown",
+        "metrics": metrics,
+        "media": media[0].get("media_url_https") if media else None,
+        "created_at": _timestamp(legacy.get("created_at")),
+    }
+
+
+def _instructions(payload: Dict) -> List[Dict]:
+    timeline = (
+        ((payload.get("data") or {}).get("search_by_raw_query") or {})
+        .get("search_timeline", {}).get("timeline", {})
+    )
+    return timeline.get("instructions") or []
+
+
+def parse_search_timeline(payload: Dict) -> Tuple[List[Dict], Optional[str]]:
+    """Returns (tweets in timeline order, bottom cursor or None) for one response."""
+    tweets = []
+    cursor = None
+
+    for instruction in _instructions(payload):
+        if instruction.get("type") == "TimelineAddEntries":
+            entries = instruction.get("entries") or []
+        elif instruction.get("type") == "TimelineReplaceEntry":
+            # Later pages swap the cursor entries in place instead of adding them
+            entries = [instruction.get("entry") or {}]
+        else:
+            continue
+
+        for entry in entries:
+            entry_id = entry.get("entryId", "")
+            content = entry.get("content") or {}
+            if entry_id.startswith("tweet-"):
+                result = (content.get("itemContent") or {}).get("tweet_results", {}).get("result")
+                tweet = parse_tweet_result(result)
+                if tweet:
+                    tweets.append(tweet)
+            elif entry_id.startswith("cursor-bottom") or content.get("cursorType") == "Bottom":
+                cursor = content.get("value") or cursor
+
+    return tweets, cursor
+
+
+def with_cursor(url: str, cursor: str) -> str:
+    """The same SearchTimeline request URL, asking for the page after `cursor`."""
+    parts = urlsplit(url)
+    query = {k: v[0] for k, v in parse_qs(parts.query).items()}
+    variables = json.loads(query.get("variables", "{}"))
+    variables["cursor"] = cursor
+    query["variables"] = json.dumps(variables, separators=(",", ":"))
+    return urlunsplit(parts._replace(query=urlencode(query)))
+
+
+class TimelinePager(abc.ABC):
+    """
+    Walks SearchTimeline pages until `limit` accepted tweets are collected, the
+    cursor runs out, a page brings nothing new, a `stop` tweet is reached (it
+    and everything after it are dropped), or `max_pages` is hit.
+    Subclasses supply the first page and the fetch for a cursor.
+    """
+
+    def __init__(self, max_pages: int = 10):
+        self.max_pages = max_pages
+        self.recorded: List[Dict] = []
+
+    @abc.abstractmethod
+    async def _first_page(self, timeout: float) -> Optional[Dict]:
+        """The first page's payload, or None if there is none to page through."""
+
+    @abc.abstractmethod
+    async def _next_page(self, cursor: str) -> Optional[Dict]:
+        """The payload after `cursor`, or None to stop."""
+
+    async def collect(
+        self, limit: int, accept: Optional[Callable[[Dict], bool]] = None, first_timeout: float = 15.0,
+        stop: Optional[Callable[[Dict], bool]] = None
+    ) -> Optional[List[Dict]]:
+        """Accepted tweets (deduped, timeline order), or None if no timeline response arrived."""
+        payload = await self._first_page(first_timeout)
+        if payload is None:
+            return None
+        self.recorded.append({"cursor": None, "payload": payload})
+
+        tweets: List[Dict] = []
+        seen = set()
+        pages = 1
+        stopped = False
+        parse_seconds = fetch_seconds = 0.0
+        while True:
+            start = time.perf_counter()
+            page_tweets, cursor = parse_search_timeline(payload)
+            parse_seconds += time.perf_counter() - start
+            new = 0
+            for tweet in page_tweets:
+                if tweet["id"] in seen:
+                    continue
+                if stop is not None and stop(tweet):
+                    stopped = True
+                    break
+                seen.add(tweet["id"])
+                new += 1
+                if accept is None or accept(tweet):
+                    tweets.append(tweet)
+
+            if stopped or len(tweets) >= limit or not cursor or not new or pages >= self.max_pages:
+                break
+
+            start = time.perf_counter()
+            payload = await self._next_page(cursor)
+            fetch_seconds += time.perf_counter() - start
+            if payload is None:
+                break
+            self.recorded.append({"cursor": cursor, "payload": payload})
+            pages += 1
+
+        # Paging through cursors is this mode's scrolling
+        tracer.record("search.parse", parse_seconds, count=min(len(tweets), limit))
+        tracer.record("search.scroll", fetch_seconds, count=pages - 1)
+        return tweets[:limit]
+
+    def save_recording(self, path: str):
+        """Writes the pages seen so far as a fixture FixtureReplayer can load."""
+        with open(path, "w") as f:
+            json.dump({"pages": self.recorded}, f)
+
+
+class SearchTimelineCapture(TimelinePager):
+    """
+    Live capture on an async Playwright page. Create it before page.goto() so
+    the first SearchTimeline response is seen; later pages are requested
+    directly with the captured request's headers and the next cursor.
+    """
+
+    def __init__(self, page, max_pages: int = 10):
+        super().__init__(max_pages)
+        self._page = page
+        self._responses: asyncio.Queue = asyncio.Queue()
+        self._request_url = None
+        self._request_headers = None
+        page.on("response", self._on_response)
+
+    def _on_response(self, response):
+        if SEARCH_TIMELINE_MARKER in response.url:
+            self._responses.put_nowait(response)
+
+    async def _first_page(self, timeout: float) -> Optional[Dict]:
+        try:
+            response = await asyncio.wait_for(self._responses.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+        if not response.ok:
+            # Rate limited or errored: None sends the engine to the DOM fallback
+            print(f"  [GraphQL] SearchTimeline returned HTTP {response.status}; falling back to the DOM.")
+            return None
+        self._request_url = response.request.url
+        self._request_headers = await response.request.all_headers()
+        return await response.json()
+
+    async def _next_page(self, cursor: str) -> Optional[Dict]:
+        response = await self._page.request.get(
+            with_cursor(self._request_url, cursor), headers=self._request_headers
+        )
+        if not response.ok:
+            print(f"  [GraphQL] Cursor page failed with HTTP {response.status}; stopping.")
+            return None
+        return await response.json()
+
+
+class FixtureReplayer(TimelinePager):
+    """Replays a recorded capture: the first page, then pages looked up by cursor."""
+
+    def __init__(self, path: str, max_pages: int = 10):
+        super().__init__(max_pages)
+        with open(path) as f:
+            pages = json.load(f)["pages"]
+        self._first = pages[0]["payload"] if pages else None
+        self._by_cursor = {p["cursor"]: p["payload"] for p in pages[1:]}
+
+    async def _first_page(self, timeout: float) -> Optional[Dict]:
+        return self._first
+
+    async def _next_page(self, cursor: str) -> Optional[Dict]:
+        return self._by_cursor.get(cursor)
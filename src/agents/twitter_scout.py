@@ -1,10 +1,20 @@
+import contextvars
 import os
-import time
-import random
 import threading
-from typing import List, Dict, Optional
-from playwright.sync_api import sync_playwright, Page
-from src.database import save_interaction, get_all_interactions
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, List, Dict, Iterator, Optional, Tuple
+from playwright.sync_api import Page
+from src.agents.browser_service import BrowserService
+from src.agents.async_twitter_scout import AsyncTwitterScout, SearchResult, SearchSpec
+from src.agents.tweet_parser import harvest_tweets, to_interaction
+from src.database import save_interaction, save_interactions_bulk, get_interactions_by_post_ids
+from src.utils.pacing import pacer
+from src.utils.tracing import tracer
+
+CONTEXT_OPTIONS = {
+    "user_agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
+    "viewport": {"width": 1280, "height": 720},
+}
 
 class TwitterScout:
     # Class-level lock to prevent multiple Playwright instances from conflicting
@@ -16,6 +26,31 @@ class TwitterScout:
         else:
             self.user_data_dir = os.path.join(os.getcwd(), "twitter_auth_data")
         self.headless = False # Visible for debugging/login checking
+        self.pacer = pacer
+
+        # Comment generation runs here, ahead of the browser, during batch_engage
+        self.engage_prefetch = int(os.getenv("ENGAGE_PREFETCH", "4"))
+        self._llm_pool = ThreadPoolExecutor(
+            max_workers=int(os.getenv("ENGAGE_LLM_WORKERS", "4")), thread_name_prefix="engage-llm"
+        )
+
+        # One warm context shared by every search/engage call instead of a cold launch each time
+        self.browser = BrowserService(
+            launch=lambda p: self._get_browser_context(p),
+            on_start=self._on_browser_start,
+            max_navigations=int(os.getenv("TWITTER_MAX_NAVIGATIONS", "200")),
+            name="twitter-browser"
+        )
+        # Searches run in parallel tabs of a headless context seeded with this account's session
+        self.search_engine = AsyncTwitterScout(
+            storage_state=self._export_session,
+            context_options=CONTEXT_OPTIONS,
+            max_concurrency=int(os.getenv("TWITTER_SEARCH_CONCURRENCY", "3")),
+            pacer=self.pacer,
+            capture_mode=os.getenv("TWITTER_CAPTURE_MODE", "graphql"),
+            record_dir=os.getenv("TWITTER_GRAPHQL_RECORD_DIR") or None,
+            use_watermarks=os.getenv("TWITTER_WATERMARKS", "1") == "1"
+        )
 
     def _get_browser_context(self, p):
         """Helper to launch context with consistent settings."""
@@ -27,8 +62,7 @@ class TwitterScout:
                 "--no-sandbox",
                 "--disable-setuid-sandbox"
             ],
-            user_agent="Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
-            viewport={"width": 1280, "height": 720}
+            **CONTEXT_OPTIONS
         )
 
     def login(self, page):
@@ -55,7 +89,7 @@ class TwitterScout:
                         if login_button:
                             print("  [Login] Clicking 'Log in' link...")
                             login_button.click()
-                            time.sleep(2)
+                            page.wait_for_load_state()
 
                         # 1. Find Username field
                         print("  [Login] Looking for username input...")
@@ -76,16 +110,14 @@ class TwitterScout:
                             user_input.fill(tw_username)
                             user_input.press("Enter")
                             
-                            time.sleep(2)
-                            
-                            # Check for unusual activity verification
+                            # Check for unusual activity verification (whichever step renders next)
                             try:
-                                ver_input = page.wait_for_selector('input[data-testid="ocfEnterTextTextInput"]', timeout=2000)
+                                page.wait_for_selector('input[name="password"], input[data-testid="ocfEnterTextTextInput"]', timeout=5000)
+                                ver_input = page.query_selector('input[data-testid="ocfEnterTextTextInput"]')
                                 if ver_input:
                                     print("  [Login] unusual activity check detected. Entering username/email again...")
                                     ver_input.fill(tw_username)
                                     ver_input.press("Enter")
-                                    time.sleep(2)
                             except:
                                 pass
 
@@ -109,7 +141,6 @@ class TwitterScout:
                                     return
                                 except:
                                     print("  [Login] Wait for tweets timed out, but proceeding...")
-                                    time.sleep(3)
                                 return
                                 
                     except Exception as e:
@@ -144,9 +175,8 @@ class TwitterScout:
                         if login_btn:
                             print("  [Login] Found 'Log in' button/link. Clicking...")
                             login_btn.click()
-                            time.sleep(3)
                             try:
-                                google_btn = page.wait_for_selector('iframe', timeout=5000)
+                                google_btn = page.wait_for_selector('iframe', timeout=8000)
                                 page.get_by_text("Sign in with Google").first.click()
                             except:
                                 print("  [Login] Could not find Google sign in after clicking Log in.")
@@ -164,8 +194,6 @@ class TwitterScout:
                 email_input.fill(email)
                 popup.keyboard.press("Enter")
                 
-                time.sleep(3)
-                
                 # 2. Password
                 print("  [Login] Entering Password...")
                 pass_input = popup.wait_for_selector('input[type="password"]', timeout=10000)
@@ -177,7 +205,6 @@ class TwitterScout:
                 print("  [Login] Popup closed. Authentication likely successful.")
                 
                 page.wait_for_load_state()
-                time.sleep(5)
                 try:
                     page.context.storage_state(path=os.path.join(self.user_data_dir, "twitter_state.json"))
                 except: pass
@@ -185,6 +212,10 @@ class TwitterScout:
         except Exception as e:
             print(f"  [Login] Auto-login attempt failed (or not needed): {e}")
 
+    def _on_browser_start(self, page):
+        with tracer.span("login.check"):
+            self.ensure_logged_in(page)
+
     def ensure_logged_in(self, page):
         """
         Soft check for login status. Navigates to home first.
@@ -194,7 +225,15 @@ class TwitterScout:
         try:
             # Soft check: Go to home
             page.goto("https://twitter.com/home", timeout=30000)
-            time.sleep(3)
+            # Returns as soon as either the logged-in shell or a login prompt renders
+            try:
+                page.wait_for_selector(
+                    '[data-testid="SideNav_NewTweet_Button"], [data-testid="AppTabBar_Home_Link"], '
+                    'input[autocomplete="username"], a[href="/login"]',
+                    timeout=10000
+                )
+            except Exception:
+                pass
             
             # Check if we are on home or redirected to login
             if "login" in page.url:
@@ -216,149 +255,38 @@ class TwitterScout:
 
     def fetch_posts(self, keywords: List[str], limit: int = 10, tag: str = None) -> List[Dict]:
         """
-        Fetches posts using Playwright with a persistent profile.
+        Fetches posts for one OR-search. Thin sync wrapper over the async engine.
         """
-        if not self._lock.acquire(timeout=60):
-            print("[Twitter Scout] Could not acquire lock. Skipping fetch.")
-            return []
-            
-        try:
-            print(f"\n[Twitter Scout] Fetching posts for keywords: {keywords}")
-            
-            found_tweets = []
-            query = " OR ".join(f'"{k}"' for k in keywords)
-            search_url = f"https://twitter.com/search?q={query}&src=typed_query&f=live"
-            print(f"  Search URL: {search_url}")
+        print(f"\n[Twitter Scout] Fetching posts for keywords: {keywords}")
+        query = " OR ".join(f'"{k}"' for k in keywords)
 
-            # Use tag if provided, otherwise try to infer if single keyword
-            current_tag = tag if tag else (keywords[0] if len(keywords) == 1 else None)
+        # Use tag if provided, otherwise try to infer if single keyword
+        current_tag = tag if tag else (keywords[0] if len(keywords) == 1 else None)
 
-            try:
-                with sync_playwright() as p:
-                    browser = self._get_browser_context(p)
-                    page = browser.new_page()
-                    
-                    # Login Check
-                    self.ensure_logged_in(page)
+        try:
+            for _, posts in self.fetch_many([(query, current_tag)], limit=limit):
+                return posts
+        except Exception as e:
+            print(f"Twitter Scout Error: {e}")
+        return []
 
-                    print(f"  Navigating to Search: {search_url}")
-                    page.goto(search_url)
-                    
-                    try:
-                        page.wait_for_selector('article[data-testid="tweet"]', timeout=15000)
-                    except Exception:
-                        print("  Timeout waiting for tweets. Checking for login requirement...")
-                        self.login(page)
-                        try:
-                            page.wait_for_selector('article[data-testid="tweet"]', timeout=15000)
-                        except Exception:
-                            print("  Still no tweets found. Aborting.")
-                            browser.close()
-                            return []
-
-                    # Scroll
-                    for _ in range(3):
-                        page.mouse.wheel(0, 1000)
-                        time.sleep(1)
-
-                    tweet_elements = page.query_selector_all('article[data-testid="tweet"]')
-                    print(f"  Found {len(tweet_elements)} potential tweets (limiting to {limit})")
-
-                    count = 0
-                    for tweet_el in tweet_elements:
-                        if count >= limit:
-                            break
-                        
-                        # Parsing Logic (Inline for brevity, usually shared)
-                        try:
-                            time_el = tweet_el.query_selector('time')
-                            if not time_el: continue
-                            
-                            post_link_el = time_el.query_selector('..')
-                            href = post_link_el.get_attribute('href') if post_link_el else ""
-                            
-                            if "status" not in href:
-                                links = tweet_el.query_selector_all('a')
-                                for link in links:
-                                    h = link.get_attribute('href')
-                                    if h and "/status/" in h and "/photo/" not in h:
-                                        href = h
-                                        break
-                            
-                            if not href: continue
-                            
-                            parts = href.split('/')
-                            if len(parts) >= 2:
-                                handle = "@" + parts[1]
-                                tweet_id = href.split('/status/')[-1].split('?')[0]
-                                post_url = f"https://twitter.com{href}"
-                            else:
-                                continue
-                            
-                            text_el = tweet_el.query_selector('div[data-testid="tweetText"]')
-                            text = text_el.inner_text() if text_el else "[No Text / Image Only]"
-                            
-                            user_el = tweet_el.query_selector('div[data-testid="User-Name"]')
-                            author_name = "Unknown"
-                            if user_el:
-                                raw_user_text = user_el.inner_text()
-                                author_name = raw_user_text.split('\n')[0]
-
-                            metrics = {"replies": 0, "retweets": 0, "likes": 0}
-                            def get_metric(testid):
-                                el = tweet_el.query_selector(f'[data-testid="{testid}"]')
-                                return el.inner_text().strip() if el else "0"
-
-                            metrics["replies"] = get_metric("reply")
-                            metrics["retweets"] = get_metric("retweet")
-                            metrics["likes"] = get_metric("like")
-                            
-                            # Check for image/media
-                            media_url = None
-                            img_el = tweet_el.query_selector('div[data-testid="tweetPhoto"] img')
-                            if img_el: media_url = img_el.get_attribute('src')
-                            
-                            # If we are skipping images, check now
-                            if media_url:
-                                print(f"  Skipping Tweet {tweet_id} (Has Image)")
-                                continue
-
-                            save_interaction(
-                                platform="Twitter",
-                                external_post_id=tweet_id,
-                                post_content=text,
-                                status="ARCHIVED",
-                                author_name=author_name,
-                                author_handle=handle,
-                                post_url=post_url,
-                                metrics=metrics,
-                                media_url=media_url,
-                                tag=current_tag
-                            )
-                            
-                            found_tweets.append({
-                                "id": tweet_id, "text": text, "author": author_name,
-                                "handle": handle, "metrics": metrics
-                            })
-                            print(f"  Archived Tweet {tweet_id} by {handle}: {text[:30]}...")
-                            count += 1
-                            
-                        except Exception as e:
-                            print(f"  Error parsing tweet: {e}")
-                            continue
-                    
-                    browser.close()
-                    return found_tweets
+    def fetch_many(self, searches: List[SearchSpec], limit: int = 10) -> Iterator[Tuple[SearchSpec, SearchResult]]:
+        """
+        Runs several (query, tag) searches in parallel tabs, yielding each
+        ((query, tag), posts) pair as soon as that search finishes.
+        posts.caught_up tells "nothing new since last run" from a failed search.
+        """
+        return self.search_engine.iter_search(searches, limit=limit)
 
-            except Exception as e:
-                print(f"Twitter Scout Error: {e}")
-                return []
-        finally:
-            self._lock.release()
+    def _export_session(self) -> Dict:
+        """Cookies + local storage of the logged-in persistent context."""
+        return self.browser.run(lambda page: page.context.storage_state())
 
-    def batch_engage(self, keywords: List[str], limit: int, auto_like: bool, auto_comment: bool, interaction_agent, tag: str = None) -> int:
+    def batch_engage(self, keywords: List[str], limit: int, auto_like: bool, auto_comment: bool, interaction_agent, tag: str = None,
+                     cancelled: Optional[Callable[[], bool]] = None) -> int:
         """
         Fetches posts AND engages (like/comment) in a SINGLE session.
+        cancelled() is checked before each tweet; once it is True the rest are skipped.
         """
         if not self._lock.acquire(timeout=60):
             print("[Twitter Scout] Could not acquire lock. Skipping batch engage.")
@@ -372,185 +300,155 @@ class TwitterScout:
             
             # Use tag if provided, otherwise try to infer if single keyword
             current_tag = tag if tag else (keywords[0] if len(keywords) == 1 else None)
-            
-            processed_count = 0
 
             try:
-                with sync_playwright() as p:
-                    browser = self._get_browser_context(p)
-                    page = browser.new_page()
-                    
-                    # 1. Login Check
-                    self.ensure_logged_in(page)
+                return self.browser.run(
+                    lambda page: self._batch_engage_on_page(
+                        page, search_url, limit, auto_like, auto_comment, interaction_agent, current_tag, cancelled
+                    )
+                )
 
-                    # 2. Search
-                    print(f"  Navigating to Search: {search_url}")
-                    page.goto(search_url)
-                    
-                    try:
-                        page.wait_for_selector('article[data-testid="tweet"]', timeout=15000)
-                    except Exception:
-                        self.login(page)
-                        try:
-                            page.wait_for_selector('article[data-testid="tweet"]', timeout=15000)
-                        except:
-                            print("  No tweets found.")
-                            browser.close()
-                            return 0
+            except Exception as e:
+                print(f"Batch Engage Error: {e}")
+                return 0
+        finally:
+            self._lock.release()
 
-                    for _ in range(3):
-                        page.mouse.wheel(0, 1000)
-                        time.sleep(1)
+    def _batch_engage_on_page(
+        self, page: Page, search_url: str, limit: int, auto_like: bool, auto_comment: bool,
+        interaction_agent, current_tag: Optional[str], cancelled: Optional[Callable[[], bool]] = None
+    ) -> int:
+        """Search + like/comment loop on the service's warm page."""
+        processed_count = 0
 
-                    tweet_elements = page.query_selector_all('article[data-testid="tweet"]')
-                    
-                    # We need to capture the IDs first because navigating away will destroy elements
-                    tweet_data_list = []
-                    
-                    print(f"  Found {len(tweet_elements)} potential tweets.")
-                    
-                    count = 0
-                    for tweet_el in tweet_elements:
-                        if count >= limit: break
-                        try:
-                            # Basic parsing just to get ID
-                            time_el = tweet_el.query_selector('time')
-                            if not time_el: continue
-                            post_link_el = time_el.query_selector('..')
-                            href = post_link_el.get_attribute('href') if post_link_el else ""
-                            if "status" not in href: continue
-                            
-                            tweet_id = href.split('/status/')[-1].split('?')[0]
-                            
-                            # Skip if we can't find ID
-                            if not tweet_id: continue
-                            
-                            tweet_data_list.append({"id": tweet_id, "href": href})
-                            count += 1
-                        except:
-                            continue
+        # 2. Search
+        self.pacer.wait("search")
+        print(f"  Navigating to Search: {search_url}")
+        with tracer.span("search.navigate"):
+            page.goto(search_url)
 
-                    print(f"  Processing {len(tweet_data_list)} tweets for engagement...")
+        try:
+            page.wait_for_selector('article[data-testid="tweet"]', timeout=15000)
+        except Exception:
+            self.login(page)
+            try:
+                page.wait_for_selector('article[data-testid="tweet"]', timeout=15000)
+            except:
+                print("  No tweets found.")
+                return 0
 
-                    # 3. Loop and Engage
-                    for item in tweet_data_list:
-                        tweet_id = item["id"]
-                        print(f"  --- Processing Tweet {tweet_id} ---")
-                        
-                        # We must visit the single tweet page to engage reliably
-                        # This also allows us to parse full details cleanly if we wanted to update them
-                        
-                        # First, ensure we have the interaction saved/updated
-                        # (We might re-fetch details on the single page or just use what we have)
-                        # For this v1, let's just navigate and do the work.
-                        
-                        try:
-                            tweet_url = f"https://twitter.com/i/web/status/{tweet_id}"
-                            page.goto(tweet_url)
-                            page.wait_for_selector('article[data-testid="tweet"]', timeout=10000)
-                            
-                            # Extract Text for context (re-parse)
-                            text = "[No Text]"
-                            try:
-                                text_el = page.query_selector('div[data-testid="tweetText"]')
-                                if text_el: text = text_el.inner_text()
-                            except: pass
-                            
-                            # Check for Media on single page view
-                            has_media = False
-                            if page.query_selector('div[data-testid="tweetPhoto"]'):
-                                has_media = True
-                            
-                            if has_media and auto_comment:
-                                print(f"  Skipping comment on {tweet_id} due to image/media.")
-                                # We can still like it though? User said "don't post a comment or reply"
-                                # Let's skip the whole engagement if it has media to be safe, or just comment?
-                                # "if the tweet has reference to image don't post a comment or reply"
-                                # Implementation: We will still Archive it, maybe Like it? 
-                                # Let's assume we skip comment only.
-                                auto_comment = False 
-
-                            # Save/Update DB first
-                            interaction = save_interaction(
-                                platform="Twitter",
-                                external_post_id=tweet_id,
-                                post_content=text,
-                                status="ARCHIVED",
-                                post_url=tweet_url,
-                                tag=current_tag
-                            )
-                            
-                            # Like
-                            if auto_like:
-                                self.like_post(tweet_id, page=page)
-                            
-                            # Comment
-                            if auto_comment:
-                                # Check if we already commented
-                                if interaction.bot_comment:
-                                    print("  Already commented on this tweet. Skipping.")
-                                else:
-                                    # Generate Context
-                                    context_posts = get_all_interactions(limit=10)
-                                    comment_text = interaction_agent.generate_comment(interaction, context_posts)
-                                    
-                                    if comment_text:
-                                        print(f"  Generated Comment: {comment_text}")
-                                        success = self.comment_post(tweet_id, comment_text, page=page)
-                                        if success:
-                                            interaction.bot_comment = comment_text
-                                            interaction.status = "POSTED"
-                                            # Update DB? save_interaction updates fields passed, but here we updated object
-                                            # We should call save_interaction again or update manually.
-                                            # save_interaction handles updates if ID exists.
-                                            save_interaction(
-                                                platform="Twitter",
-                                                external_post_id=tweet_id,
-                                                post_content=text,
-                                                status="POSTED",
-                                                bot_comment=comment_text,
-                                                tag=current_tag
-                                            )
-                            
-                            processed_count += 1
-                            time.sleep(random.uniform(2, 5)) # Human pause
-                            
-                        except Exception as e:
-                            print(f"  Error processing tweet {tweet_id}: {e}")
-                            continue
+        # We need to capture the tweets first because navigating away will destroy elements
+        tweet_data_list = harvest_tweets(page, limit)
+        print(f"  Found {len(tweet_data_list)} potential tweets.")
+
+        print(f"  Processing {len(tweet_data_list)} tweets for engagement...")
+        if not tweet_data_list:
+            return 0
 
-                    print("  Batch engagement finished. Closing browser in 5 seconds...")
-                    time.sleep(5)
-                    browser.close()
-                    return processed_count
+        # Archive the whole batch in one transaction; reloading tells us what we already replied to
+        with tracer.span("db.write", count=len(tweet_data_list)):
+            save_interactions_bulk([to_interaction(item, current_tag) for item in tweet_data_list])
+            interactions = get_interactions_by_post_ids([item["id"] for item in tweet_data_list])
+
+        # Comments are generated on a worker pool a few tweets ahead of the browser,
+        # so the LLM round-trip overlaps with navigating, liking and posting
+        to_comment = []
+        planned: Dict[str, str] = {}
+        if auto_comment:
+            for item in tweet_data_list:
+                interaction = interactions.get(item["id"])
+                if item.get("media"):
+                    print(f"  Skipping comment on {item['id']} due to image/media.")
+                elif interaction is not None and interaction.status == "PLANNED" and interaction.bot_comment:
+                    # Drafted offline (Message Batches); post it without another LLM call
+                    planned[item["id"]] = interaction.bot_comment
+                elif interaction is not None and interaction.bot_comment:
+                    print(f"  Already commented on {item['id']}. Skipping.")
+                elif interaction is not None:
+                    to_comment.append(item["id"])
+
+        drafts: Dict[str, Future] = {}
+        queued = iter(to_comment)
+
+        def prefetch():
+            # Keep up to ENGAGE_PREFETCH generations in flight or waiting to be posted
+            for tweet_id in queued:
+                # Run in a copy of this context so the LLM spans join the mission's trace
+                drafts[tweet_id] = self._llm_pool.submit(
+                    contextvars.copy_context().run, interaction_agent.generate_comment, interactions[tweet_id]
+                )
+                if len(drafts) >= self.engage_prefetch:
+                    break
+
+        prefetch()
+
+        # 3. Loop and Engage
+        for position, item in enumerate(tweet_data_list):
+            if cancelled and cancelled():
+                print(f"  Mission cancelled; skipping the remaining {len(tweet_data_list) - position} tweets.")
+                for future in drafts.values():
+                    future.cancel()
+                break
+            tweet_id = item["id"]
+            print(f"  --- Processing Tweet {tweet_id} ---")
+            draft = drafts.pop(tweet_id, None)
+            prefetch()
+
+            try:
+                # We must visit the single tweet page to engage reliably
+                tweet_url = f"https://twitter.com/i/web/status/{tweet_id}"
+                self.pacer.wait("navigate")
+                with tracer.span("engage.navigate"):
+                    page.goto(tweet_url)
+                    page.wait_for_selector('article[data-testid="tweet"]', timeout=10000)
+
+                # Like
+                if auto_like:
+                    with tracer.span("engage.like") as span:
+                        span.set(liked=self.like_post(tweet_id, page=page))
+
+                # Comment (usually generated while we were navigating)
+                with tracer.span("engage.draft_wait"):
+                    comment_text = planned.get(tweet_id) or (draft.result() if draft is not None else None)
+                if comment_text:
+                    print(f"  Generated Comment: {comment_text}")
+                    with tracer.span("engage.reply") as span:
+                        posted = self.comment_post(tweet_id, comment_text, page=page)
+                        span.set(posted=posted)
+                    if posted:
+                        save_interaction(
+                            platform="Twitter",
+                            external_post_id=tweet_id,
+                            post_content=item["text"],
+                            status="POSTED",
+                            bot_comment=comment_text,
+                            tag=current_tag
+                        )
+
+                processed_count += 1
 
             except Exception as e:
-                print(f"Batch Engage Error: {e}")
-                return 0
-        finally:
-            self._lock.release()
+                print(f"  Error processing tweet {tweet_id}: {e}")
+                continue
+
+        print("  Batch engagement finished.")
+        return processed_count
 
-    def like_post(self, tweet_id: str, page: Page = None) -> bool:
+    def like_post(self, tweet_id: str, page: Page = None, paced: bool = True) -> bool:
         """
         Likes a tweet. If page is provided, uses existing session.
+        paced=False skips the pacer: the caller already took the tokens (Pacer.try_reserve).
         """
-        should_close = False
         if page is None:
-            # Standalone mode (original behavior)
+            # Standalone mode: borrow the warm page from the browser service
             if not self._lock.acquire(timeout=60): return False
-            should_close = True
-            # ... (Launch browser logic would go here, omitted for brevity as we focus on batch)
-            # For now, let's assume batch mode is the primary user. 
-            # If standalone is needed, we need to replicate the launch logic.
-            # Re-implementing strictly for completeness:
             try:
-                with sync_playwright() as p:
-                    browser = self._get_browser_context(p)
-                    page = browser.new_page()
-                    return self.like_post(tweet_id, page=page)
+                return self.browser.run(lambda page: self.like_post(tweet_id, page=page, paced=paced))
+            except Exception as e:
+                print(f"Like Error: {e}")
+                return False
             finally:
                 self._lock.release()
-                return False # The inner call returns, but this outer wrapper handles the context
 
         # Actual Logic with 'page'
         try:
@@ -560,6 +458,8 @@ class TwitterScout:
             if tweet_id not in page.url:
                 url = f"https://twitter.com/i/web/status/{tweet_id}"
                 print(f"  Navigating to {url} for Like...")
+                if paced:
+                    self.pacer.wait("navigate")
                 page.goto(url)
                 try:
                     page.wait_for_selector('article[data-testid="tweet"]', timeout=10000)
@@ -574,9 +474,15 @@ class TwitterScout:
                 like_button = page.wait_for_selector('button[data-testid="like"]', timeout=5000)
                 if like_button:
                     like_button.scroll_into_view_if_needed()
+                    if paced:
+                        self.pacer.wait("like")
                     like_button.click()
                     print(f"  Clicked Like on {tweet_id}")
-                    time.sleep(1)
+                    # The button flips to "unlike" once the like registers
+                    try:
+                        page.wait_for_selector('button[data-testid="unlike"]', timeout=5000)
+                    except Exception:
+                        pass
                     return True
             except Exception as e:
                 print(f"  Like failed: {e}")
@@ -586,26 +492,27 @@ class TwitterScout:
             print(f"Like Error: {e}")
             return False
 
-    def comment_post(self, tweet_id: str, text: str, page: Page = None) -> bool:
+    def comment_post(self, tweet_id: str, text: str, page: Page = None, paced: bool = True) -> bool:
         """
-        Replies to a tweet.
+        Replies to a tweet. paced=False as for like_post.
         """
         if page is None:
             # Standalone wrapper
             if not self._lock.acquire(timeout=60): return False
             try:
-                with sync_playwright() as p:
-                    browser = self._get_browser_context(p)
-                    page = browser.new_page()
-                    return self.comment_post(tweet_id, text, page=page)
+                return self.browser.run(lambda page: self.comment_post(tweet_id, text, page=page, paced=paced))
+            except Exception as e:
+                print(f"Comment Error: {e}")
+                return False
             finally:
                 self._lock.release()
-                return False
 
         try:
             # Navigate if needed
             if tweet_id not in page.url:
                 url = f"https://twitter.com/i/web/status/{tweet_id}"
+                if paced:
+                    self.pacer.wait("navigate")
                 page.goto(url)
                 page.wait_for_selector('article[data-testid="tweet"]', timeout=10000)
 
@@ -619,16 +526,21 @@ class TwitterScout:
                 if editor:
                     editor.click()
                     page.keyboard.type(text, delay=50) 
-                    time.sleep(1)
                     
                     submit_btn = page.wait_for_selector('button[data-testid="tweetButtonInline"]', timeout=5000)
                     if submit_btn:
                         if submit_btn.is_disabled():
                             print("  Reply button disabled.")
                         else:
+                            if paced:
+                                self.pacer.wait("reply")
                             submit_btn.click()
                             print(f"  Replied to {tweet_id}")
-                            time.sleep(3)
+                            # Wait for the "sent" toast rather than a fixed pause
+                            try:
+                                page.wait_for_selector('[data-testid="toast"]', timeout=5000)
+                            except Exception:
+                                pass
                             return True
                 else:
                     print("  Could not find reply editor.")
@@ -1,16 +1,39 @@
 import os
+import functools
+import threading
+from contextlib import nullcontext
 from datetime import datetime
-from typing import Optional, List, Dict
+from collections import Counter
+from typing import Optional, List, Dict, Tuple
 import json
-from sqlalchemy import create_engine, Column, Integer, String, DateTime, Text
-from sqlalchemy.orm import declarative_base, sessionmaker
+import base64
+from sqlalchemy import create_engine, event, Boolean, Column, Integer, String, DateTime, Text, LargeBinary, Index, and_, case, func, or_
+from sqlalchemy.orm import declarative_base, sessionmaker, load_only
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.exc import IntegrityError
 from dotenv import load_dotenv
+from src.utils.dedup_index import DedupIndex
 
 load_dotenv()
 
 # Use a default if not in env
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///vibebot.db")
 
+# "production" tunes SQLite for concurrent web + scout access; "default" keeps driver defaults.
+# Non-SQLite URLs (Postgres) always use the default engine.
+DB_PROFILE = os.getenv("DB_PROFILE", "default")
+
+# Applied to every new SQLite connection in the production profile
+SQLITE_PRODUCTION_PRAGMAS = {
+    "journal_mode": "WAL",          # readers don't block the writer and vice versa
+    "synchronous": "NORMAL",        # safe with WAL, far fewer fsyncs than FULL
+    "busy_timeout": int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "10000")),
+    "mmap_size": 256 * 1024 * 1024,
+    "cache_size": -64000,           # negative = KiB, so 64 MB of page cache
+    "temp_store": "MEMORY",
+}
+
 Base = declarative_base()
 
 class Interaction(Base):
@@ -33,6 +56,14 @@ class Interaction(Base):
     status = Column(String, default='ARCHIVED') # 'PLANNED', 'POSTED', 'ARCHIVED'
     created_at = Column(DateTime, default=datetime.utcnow)
 
+    # Keep in sync with the index migration in src/utils/migrate_db.py
+    __table_args__ = (
+        Index('ix_interactions_created_at', 'created_at'),
+        Index('ix_interactions_platform_created_at', 'platform', 'created_at'),
+        Index('ix_interactions_tag_created_at', 'tag', 'created_at'),
+        Index('ix_interactions_status', 'status'),
+    )
+
     def __repr__(self):
         return f"<Interaction(platform='{self.platform}', id='{self.external_post_id}', status='{self.status}')>"
     
@@ -45,14 +76,177 @@ class Interaction(Base):
                 return {}
         return {}
 
+class EmbeddingCacheEntry(Base):
+    __tablename__ = 'embedding_cache'
+
+    key = Column(String, primary_key=True)  # sha256 of model name + normalized text
+    model_name = Column(String, nullable=False)
+    vector = Column(LargeBinary, nullable=False)  # float32 bytes
+    last_used_at = Column(DateTime, default=datetime.utcnow, index=True)
+
+    def __repr__(self):
+        return f"<EmbeddingCacheEntry(key='{self.key[:12]}', model='{self.model_name}')>"
+
+class ReplyCacheEntry(Base):
+    __tablename__ = 'reply_cache'
+
+    key = Column(String, primary_key=True)  # sha256 of model name + tag + normalized post text
+    simhash = Column(String, nullable=False)  # 64-bit SimHash of the post text, hex
+    model_name = Column(String, nullable=False)
+    tag = Column(String, nullable=True)
+    external_post_id = Column(String, nullable=False)  # the post the reply was generated for
+    reply = Column(Text, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow, index=True)
+
+    def __repr__(self):
+        return f"<ReplyCacheEntry(key='{self.key[:12]}', post='{self.external_post_id}')>"
+
+class SearchWatermark(Base):
+    """Newest tweet each search query has returned (see src/utils/watermarks.py)."""
+    __tablename__ = 'search_watermarks'
+
+    query = Column(String, primary_key=True)
+    newest_id = Column(String, nullable=False)  # snowflake id, as text
+    newest_at = Column(DateTime, nullable=True)
+    updated_at = Column(DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f"<SearchWatermark(query='{self.query}', newest_id='{self.newest_id}')>"
+
+class ScoutJob(Base):
+    """One queued scout mission (see src/utils/job_queue.py)."""
+    __tablename__ = 'scout_jobs'
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    platform = Column(String, nullable=False, default='twitter')
+    query = Column(String, nullable=False)
+    limit = Column(Integer, nullable=False, default=20)
+    auto_like = Column(Boolean, nullable=False, default=False)
+    auto_comment = Column(Boolean, nullable=False, default=False)
+    source = Column(String, nullable=False, default='manual')  # 'manual', 'auto'
+    priority = Column(Integer, nullable=False, default=0)  # lower runs first
+    status = Column(String, nullable=False, default='PENDING')  # 'PENDING', 'RUNNING', 'DONE', 'FAILED', 'CANCELLED'
+    coalesced = Column(Integer, nullable=False, default=0)  # identical submissions merged into this job
+    cancel_requested = Column(Boolean, nullable=False, default=False)
+    worker_id = Column(String, nullable=True)  # JobQueue that claimed it (host:pid:nonce)
+    heartbeat_at = Column(DateTime, nullable=True)  # renewed by that queue while it runs
+    result_count = Column(Integer, nullable=True)
+    error = Column(Text, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        Index('ix_scout_jobs_status_priority', 'status', 'priority', 'created_at'),
+    )
+
+    def __repr__(self):
+        return f"<ScoutJob(id={self.id}, query='{self.query}', status='{self.status}')>"
+
+class TraceSpan(Base):
+    """One timed pipeline step of a scout mission (see src/utils/tracing.py)."""
+    __tablename__ = 'trace_spans'
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    trace_id = Column(String, nullable=False)
+    span_id = Column(String, nullable=False)
+    parent_id = Column(String, nullable=True)
+    name = Column(String, nullable=False)  # stage, e.g. 'search.navigate', 'filter.semantic', 'llm.reply'
+    started_at = Column(DateTime, nullable=False)
+    duration_ms = Column(Integer, nullable=False)
+    count = Column(Integer, nullable=True)  # items the step handled (tweets, rows, ...)
+    status = Column(String, nullable=False, default='ok')  # 'ok', 'error'
+    attrs_json = Column(Text, nullable=True)
+
+    __table_args__ = (
+        Index('ix_trace_spans_started_name', 'started_at', 'name'),
+        Index('ix_trace_spans_trace', 'trace_id'),
+    )
+
+    def __repr__(self):
+        return f"<TraceSpan(name='{self.name}', duration_ms={self.duration_ms})>"
+
+class InteractionStat(Base):
+    """Materialized counters for the dashboard, kept in step by the save helpers."""
+    __tablename__ = 'interaction_stats'
+
+    dimension = Column(String, primary_key=True)  # 'total', 'platform', 'status', 'tag', 'day'
+    key = Column(String, primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f"<InteractionStat({self.dimension}={self.key}: {self.count})>"
+
+def _build_engine(url: str, profile: str = DB_PROFILE):
+    """Creates the engine, applying the SQLite production profile when selected."""
+    if profile != "production" or not url.startswith("sqlite") or ":memory:" in url:
+        return create_engine(url)
+
+    # One connection per web request thread plus one per scout worker
+    web_threads = int(os.getenv("WEB_DB_THREADS", "8"))
+    scout_workers = int(os.getenv("SCOUT_WORKERS", "2"))
+
+    sqlite_engine = create_engine(
+        url,
+        pool_size=web_threads + scout_workers,
+        max_overflow=web_threads,
+        pool_timeout=30,
+        pool_pre_ping=True,
+        connect_args={
+            "check_same_thread": False,
+            "timeout": SQLITE_PRODUCTION_PRAGMAS["busy_timeout"] / 1000,
+        }
+    )
+
+    @event.listens_for(sqlite_engine, "connect")
+    def _apply_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in SQLITE_PRODUCTION_PRAGMAS.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
+
+    return sqlite_engine
+
 # Setup Engine and Session
-engine = create_engine(DATABASE_URL)
+engine = _build_engine(DATABASE_URL)
 SessionLocal = sessionmaker(bind=engine)
 
+# SQLite allows one writer at a time. In the production profile every write transaction in this
+# process goes through this lock, so threads queue here instead of failing with "database is locked".
+_write_lock = threading.RLock()
+_serialize_writes = DB_PROFILE == "production" and DATABASE_URL.startswith("sqlite")
+
+def writer():
+    """Context manager around a write transaction (serialized under the SQLite production profile)."""
+    return _write_lock if _serialize_writes else nullcontext()
+
+def serialized_write(fn):
+    """Runs the decorated helper's whole transaction inside writer()."""
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        with writer():
+            return fn(*args, **kwargs)
+    return wrapper
+
+# In-memory index of every archived external_post_id (see warm_dedup_index)
+dedup_index = DedupIndex()
+# Several web worker processes share the database: the index's negatives need a DB check
+DEDUP_SHARED_DB = int(os.getenv("WEB_CONCURRENCY", "1")) > 1
+
 def init_db():
     """Creates the database tables."""
     Base.metadata.create_all(engine)
 
+def warm_dedup_index():
+    """Loads every external_post_id into the in-memory dedup index."""
+    session = SessionLocal()
+    try:
+        ids = (row[0] for row in session.query(Interaction.external_post_id).yield_per(10000))
+        dedup_index.warm(ids)
+        print(f"Dedup index warmed with {len(dedup_index)} posts.")
+    finally:
+        session.close()
+
 def get_db():
     """Dependency to get a DB session."""
     db = SessionLocal()
@@ -63,6 +257,7 @@ def get_db():
 
 # --- Archivist Helper Functions ---
 
+@serialized_write
 def save_interaction(
     platform: str, 
     external_post_id: str, 
@@ -77,14 +272,22 @@ def save_interaction(
     tag: Optional[str] = None
 ):
     """Saves a new interaction to the database."""
+    # A warm dedup index that has never seen this id lets us skip the lookup
+    skip_lookup = dedup_index.contains(external_post_id) is False
+
     session = SessionLocal()
     try:
-        existing = session.query(Interaction).filter_by(external_post_id=external_post_id).first()
+        existing = None
+        if not skip_lookup:
+            existing = session.query(Interaction).filter_by(external_post_id=external_post_id).first()
         
         metrics_str = json.dumps(metrics) if metrics else None
         
+        deltas = Counter()
+
         if existing:
             print(f"Interaction {external_post_id} already exists. Updating.")
+            old_status, old_tag = existing.status, existing.tag
             # Update fields if they are provided (enrichment)
             if author_name: existing.author_name = author_name
             if author_handle: existing.author_handle = author_handle
@@ -96,10 +299,15 @@ def save_interaction(
             # Also update status and comment if provided (critical for Auto-Pilot)
             if status and status != "ARCHIVED": existing.status = status
             if bot_comment: existing.bot_comment = bot_comment
+
+            _count_update(deltas, old_status, existing.status, old_tag, existing.tag)
+            _apply_stat_deltas(session, deltas)
             
             session.commit()
+            session.refresh(existing)
             return existing
         
+        created_at = datetime.utcnow()
         new_interaction = Interaction(
             platform=platform,
             external_post_id=external_post_id,
@@ -111,12 +319,28 @@ def save_interaction(
             post_url=post_url,
             metrics_json=metrics_str,
             media_url=media_url,
-            tag=tag
+            tag=tag,
+            created_at=created_at
         )
         session.add(new_interaction)
+        session.flush()
+        _count_insert(deltas, platform, status, tag, created_at)
+        _apply_stat_deltas(session, deltas)
         session.commit()
         session.refresh(new_interaction)
+        dedup_index.add(external_post_id)
         return new_interaction
+    except IntegrityError:
+        session.rollback()
+        if not skip_lookup:
+            raise
+        # Another process archived it since the index was warmed: take the update path
+        dedup_index.add(external_post_id)
+        return save_interaction(
+            platform, external_post_id, post_content, status=status, bot_comment=bot_comment,
+            author_name=author_name, author_handle=author_handle, post_url=post_url,
+            metrics=metrics, media_url=media_url, tag=tag
+        )
     except Exception as e:
         session.rollback()
         print(f"Error saving interaction: {e}")
@@ -124,14 +348,162 @@ def save_interaction(
     finally:
         session.close()
 
+# Columns that an upsert only overwrites when the new value is provided (enrichment)
+ENRICH_FIELDS = ('author_name', 'author_handle', 'post_url', 'metrics_json', 'media_url', 'tag', 'bot_comment')
+
+BULK_CHUNK_SIZE = 500
+
+def _interaction_row(record: Dict) -> Dict:
+    """Turns save_interaction-style kwargs into an `interactions` row."""
+    metrics = record.get('metrics')
+    row = {
+        'platform': record['platform'],
+        'external_post_id': record['external_post_id'],
+        'post_content': record.get('post_content'),
+        'status': record.get('status') or "ARCHIVED",
+        'metrics_json': json.dumps(metrics) if metrics else None,
+        'created_at': datetime.utcnow(),
+    }
+    for field in ENRICH_FIELDS:
+        if field != 'metrics_json':
+            # Empty values never overwrite stored ones, same as save_interaction
+            row[field] = record.get(field) or None
+    return row
+
+def _merge_rows(rows: List[Dict]) -> Dict[str, Dict]:
+    """Folds repeated ids within one batch into a single row, later values enriching earlier ones."""
+    merged: Dict[str, Dict] = {}
+    for row in rows:
+        existing = merged.get(row['external_post_id'])
+        if existing is None:
+            merged[row['external_post_id']] = row
+            continue
+        for field in ENRICH_FIELDS:
+            if row[field]:
+                existing[field] = row[field]
+        if row['status'] != "ARCHIVED":
+            existing['status'] = row['status']
+    return merged
+
+def _upsert_statement(dialect: str):
+    """INSERT ... ON CONFLICT(external_post_id) DO UPDATE with save_interaction's enrich-only semantics."""
+    insert = sqlite_insert if dialect == 'sqlite' else postgresql_insert
+    stmt = insert(Interaction.__table__)
+    table = Interaction.__table__
+    excluded = stmt.excluded
+
+    set_ = {field: func.coalesce(excluded[field], table.c[field]) for field in ENRICH_FIELDS}
+    set_['status'] = case((excluded.status != "ARCHIVED", excluded.status), else_=table.c.status)
+    return stmt.on_conflict_do_update(index_elements=['external_post_id'], set_=set_)
+
+@serialized_write
+def save_interactions_bulk(records: List[Dict]) -> List[int]:
+    """
+    Saves many interactions in one transaction. Each record takes the same keys as
+    save_interaction's arguments. Returns the row id for each record, in order.
+    """
+    if not records:
+        return []
+
+    merged = _merge_rows([_interaction_row(r) for r in records])
+    post_ids = list(merged)
+
+    session = SessionLocal()
+    try:
+        dialect = session.get_bind().dialect.name
+        rows = list(merged.values())
+
+        # Current status/tag of rows that already exist, for the dashboard counters
+        before = {}
+        for i in range(0, len(post_ids), BULK_CHUNK_SIZE):
+            for post_id, status, tag in session.query(
+                Interaction.external_post_id, Interaction.status, Interaction.tag
+            ).filter(Interaction.external_post_id.in_(post_ids[i:i + BULK_CHUNK_SIZE])):
+                before[post_id] = (status, tag)
+
+        deltas = Counter()
+        for row in rows:
+            if row['external_post_id'] not in before:
+                _count_insert(deltas, row['platform'], row['status'], row['tag'], row['created_at'])
+                continue
+            old_status, old_tag = before[row['external_post_id']]
+            new_status = row['status'] if row['status'] != "ARCHIVED" else old_status
+            _count_update(deltas, old_status, new_status, old_tag, row['tag'] or old_tag)
+        _apply_stat_deltas(session, deltas)
+
+        if dialect in ('sqlite', 'postgresql'):
+            stmt = _upsert_statement(dialect)
+            for i in range(0, len(rows), BULK_CHUNK_SIZE):
+                session.execute(stmt, rows[i:i + BULK_CHUNK_SIZE])
+        else:
+            # Generic path: still a single transaction, one lookup per chunk
+            for i in range(0, len(rows), BULK_CHUNK_SIZE):
+                chunk = rows[i:i + BULK_CHUNK_SIZE]
+                existing = {
+                    row.external_post_id: row for row in session.query(Interaction).filter(
+                        Interaction.external_post_id.in_([r['external_post_id'] for r in chunk])
+                    )
+                }
+                for row in chunk:
+                    current = existing.get(row['external_post_id'])
+                    if current is None:
+                        session.add(Interaction(**row))
+                        continue
+                    for field in ENRICH_FIELDS:
+                        if row[field]:
+                            setattr(current, field, row[field])
+                    if row['status'] != "ARCHIVED":
+                        current.status = row['status']
+            session.flush()
+
+        ids = {}
+        for i in range(0, len(post_ids), BULK_CHUNK_SIZE):
+            chunk = post_ids[i:i + BULK_CHUNK_SIZE]
+            ids.update(session.query(Interaction.external_post_id, Interaction.id).filter(
+                Interaction.external_post_id.in_(chunk)
+            ).all())
+
+        session.commit()
+        dedup_index.add_many(post_ids)
+        return [ids[r['external_post_id']] for r in records]
+    except Exception as e:
+        session.rollback()
+        print(f"Error saving interactions in bulk: {e}")
+        raise
+    finally:
+        session.close()
+
+@serialized_write
+def clear_interactions():
+    """Deletes every interaction along with its counters."""
+    session = SessionLocal()
+    try:
+        session.query(Interaction).delete()
+        session.query(InteractionStat).delete()
+        session.commit()
+        dedup_index.clear()
+    except Exception as e:
+        session.rollback()
+        print(f"Error clearing interactions: {e}")
+        raise
+    finally:
+        session.close()
+
 def check_deduplication(external_post_id: str) -> bool:
     """Returns True if the post has already been processed/archived."""
+    known = dedup_index.contains(external_post_id)
+    if known is True or (known is False and not DEDUP_SHARED_DB):
+        return known
+
+    # Index not warm yet, or other processes may have archived it since
     session = SessionLocal()
     try:
-        exists = session.query(Interaction).filter_by(external_post_id=external_post_id).first()
-        return exists is not None
+        exists = session.query(Interaction.id).filter_by(external_post_id=external_post_id).first() is not None
     finally:
         session.close()
+    if exists and known is False:
+        dedup_index.add(external_post_id)
+    return exists
 
 def get_all_interactions(limit: int = 100) -> List[Interaction]:
     """Retrieves recent interactions."""
@@ -140,3 +512,546 @@ def get_all_interactions(limit: int = 100) -> List[Interaction]:
         return session.query(Interaction).order_by(Interaction.created_at.desc()).limit(limit).all()
     finally:
         session.close()
+
+def get_interactions_by_post_ids(external_post_ids: List[str]) -> Dict[str, Interaction]:
+    """Loads the interactions for these external post ids in one query, keyed by id."""
+    if not external_post_ids:
+        return {}
+    session = SessionLocal()
+    try:
+        rows = session.query(Interaction).filter(Interaction.external_post_id.in_(external_post_ids)).all()
+        return {row.external_post_id: row for row in rows}
+    finally:
+        session.close()
+
+def get_recent_replies(limit: int = 5) -> List[Interaction]:
+    """The newest POSTED interactions that carry our reply text."""
+    session = SessionLocal()
+    try:
+        return session.query(Interaction).filter(
+            Interaction.status == "POSTED", Interaction.bot_comment.isnot(None)
+        ).order_by(Interaction.created_at.desc()).limit(limit).all()
+    finally:
+        session.close()
+
+def get_status_count(status: str) -> int:
+    """One status counter from interaction_stats: a primary-key lookup, not a scan."""
+    session = SessionLocal()
+    try:
+        stat = session.get(InteractionStat, ('status', status))
+        return stat.count if stat else 0
+    finally:
+        session.close()
+
+def get_interactions_to_draft(tag: Optional[str] = None, limit: Optional[int] = None) -> List[Interaction]:
+    """ARCHIVED interactions that have no reply yet (optionally for one tag), newest first."""
+    session = SessionLocal()
+    try:
+        query = session.query(Interaction).filter(
+            Interaction.status == "ARCHIVED", Interaction.bot_comment.is_(None), Interaction.platform != "System"
+        )
+        if tag:
+            query = query.filter(Interaction.tag == tag)
+        query = query.order_by(Interaction.created_at.desc())
+        if limit:
+            query = query.limit(limit)
+        return query.all()
+    finally:
+        session.close()
+
+# --- Feed Pagination Helpers ---
+
+# What each view reads; post bodies and metrics stay out of the lighter views
+FEED_CARD_COLUMNS = (
+    Interaction.id, Interaction.platform, Interaction.post_content, Interaction.author_name,
+    Interaction.author_handle, Interaction.post_url, Interaction.metrics_json, Interaction.media_url,
+    Interaction.tag, Interaction.created_at,
+)
+FEED_API_COLUMNS = (
+    Interaction.id, Interaction.platform, Interaction.external_post_id, Interaction.post_content,
+    Interaction.author_handle, Interaction.post_url, Interaction.tag, Interaction.status,
+    Interaction.created_at,
+)
+EXPORT_COLUMNS = tuple(Interaction.__table__.c)
+
+def encode_cursor(created_at: datetime, interaction_id: int) -> str:
+    raw = f"{created_at.isoformat()}|{interaction_id}"
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii")
+
+def decode_cursor(cursor: str):
+    """Returns (created_at, id). Raises ValueError on a malformed cursor."""
+    try:
+        created_at, interaction_id = base64.urlsafe_b64decode(cursor.encode("ascii")).decode("utf-8").split("|")
+        return datetime.fromisoformat(created_at), int(interaction_id)
+    except Exception as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
+def feed_query(session, *entities, platform: Optional[str] = None, cursor: Optional[str] = None):
+    """Newest-first interactions, keyset-paginated on (created_at, id) so every page is an index range scan."""
+    query = session.query(*entities).order_by(Interaction.created_at.desc(), Interaction.id.desc())
+    if platform:
+        query = query.filter(Interaction.platform == platform)
+    if cursor:
+        created_at, interaction_id = decode_cursor(cursor)
+        query = query.filter(or_(
+            Interaction.created_at < created_at,
+            and_(Interaction.created_at == created_at, Interaction.id < interaction_id)
+        ))
+    return query
+
+def get_feed_page(session, platform: Optional[str] = None, cursor: Optional[str] = None, limit: int = 100):
+    """Returns (interactions, next_cursor) with only the feed card columns loaded."""
+    rows = feed_query(session, Interaction, platform=platform, cursor=cursor).options(
+        load_only(*FEED_CARD_COLUMNS)
+    ).limit(limit + 1).all()
+
+    page = rows[:limit]
+    next_cursor = encode_cursor(page[-1].created_at, page[-1].id) if len(rows) > limit else None
+    return page, next_cursor
+
+# --- Dashboard Counters ---
+
+def _stat_keys(platform: str, status: Optional[str], tag: Optional[str], created_at: datetime):
+    return [
+        ('total', 'all'),
+        ('platform', platform),
+        ('status', status or "ARCHIVED"),
+        ('tag', tag or ""),
+        ('day', created_at.date().isoformat()),
+    ]
+
+def _count_insert(deltas: Counter, platform, status, tag, created_at):
+    for key in _stat_keys(platform, status, tag, created_at):
+        deltas[key] += 1
+
+def _count_update(deltas: Counter, old_status, new_status, old_tag, new_tag):
+    if (old_status or "ARCHIVED") != (new_status or "ARCHIVED"):
+        deltas[('status', old_status or "ARCHIVED")] -= 1
+        deltas[('status', new_status or "ARCHIVED")] += 1
+    if (old_tag or "") != (new_tag or ""):
+        deltas[('tag', old_tag or "")] -= 1
+        deltas[('tag', new_tag or "")] += 1
+
+def _apply_stat_deltas(session, deltas: Counter):
+    """Adds deltas to the counters inside the caller's transaction."""
+    rows = [{'dimension': d, 'key': k, 'count': n} for (d, k), n in deltas.items() if n]
+    if not rows:
+        return
+
+    dialect = session.get_bind().dialect.name
+    if dialect in ('sqlite', 'postgresql'):
+        insert = sqlite_insert if dialect == 'sqlite' else postgresql_insert
+        stmt = insert(InteractionStat.__table__)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=['dimension', 'key'],
+            set_={'count': InteractionStat.__table__.c.count + stmt.excluded['count']}
+        )
+        session.execute(stmt, rows)
+        return
+
+    for row in rows:
+        stat = session.get(InteractionStat, (row['dimension'], row['key']))
+        if stat is None:
+            session.add(InteractionStat(**row))
+        else:
+            stat.count += row['count']
+
+def get_stats() -> Dict[str, Dict[str, int]]:
+    """All counters as {dimension: {key: count}}. One small table read, independent of archive size."""
+    session = SessionLocal()
+    try:
+        stats: Dict[str, Dict[str, int]] = {}
+        for dimension, key, count in session.query(
+            InteractionStat.dimension, InteractionStat.key, InteractionStat.count
+        ):
+            if count:
+                stats.setdefault(dimension, {})[key] = count
+        return stats
+    finally:
+        session.close()
+
+def _true_stats(session) -> Dict:
+    counts = {('total', 'all'): session.query(func.count(Interaction.id)).scalar()}
+    groupings = {
+        'platform': Interaction.platform,
+        'status': func.coalesce(Interaction.status, "ARCHIVED"),
+        'tag': func.coalesce(Interaction.tag, ""),
+        'day': func.date(Interaction.created_at),
+    }
+    for dimension, expr in groupings.items():
+        for key, count in session.query(expr, func.count(Interaction.id)).group_by(expr):
+            counts[(dimension, str(key))] = count
+    return {k: v for k, v in counts.items() if v}
+
+@serialized_write
+def reconcile_stats() -> int:
+    """Recomputes every counter from the interactions table. Returns how many counters had drifted."""
+    session = SessionLocal()
+    try:
+        actual = _true_stats(session)
+        stored = {
+            (d, k): c for d, k, c in session.query(
+                InteractionStat.dimension, InteractionStat.key, InteractionStat.count
+            ) if c
+        }
+        drift = sum(1 for key in set(actual) | set(stored) if actual.get(key) != stored.get(key))
+
+        if drift:
+            session.query(InteractionStat).delete()
+            session.add_all(InteractionStat(dimension=d, key=k, count=c) for (d, k), c in actual.items())
+        session.commit()
+        return drift
+    except Exception as e:
+        session.rollback()
+        print(f"Error reconciling stats: {e}")
+        raise
+    finally:
+        session.close()
+
+# --- Embedding Cache Helpers ---
+
+@serialized_write
+def get_cached_embeddings(keys: List[str]) -> Dict[str, bytes]:
+    """Returns the stored vectors for the given cache keys and marks them as recently used."""
+    if not keys:
+        return {}
+    session = SessionLocal()
+    try:
+        rows = session.query(EmbeddingCacheEntry.key, EmbeddingCacheEntry.vector).filter(
+            EmbeddingCacheEntry.key.in_(keys)
+        ).all()
+        found = {key: vector for key, vector in rows}
+        if found:
+            session.query(EmbeddingCacheEntry).filter(
+                EmbeddingCacheEntry.key.in_(list(found))
+            ).update({EmbeddingCacheEntry.last_used_at: datetime.utcnow()}, synchronize_session=False)
+            session.commit()
+        return found
+    finally:
+        session.close()
+
+@serialized_write
+def save_cached_embeddings(model_name: str, vectors: Dict[str, bytes], max_entries: Optional[int] = None):
+    """Stores vectors by cache key, then evicts least recently used rows beyond max_entries."""
+    if not vectors:
+        return
+    session = SessionLocal()
+    try:
+        now = datetime.utcnow()
+        rows = [
+            {'key': key, 'model_name': model_name, 'vector': vector, 'last_used_at': now}
+            for key, vector in vectors.items()
+        ]
+        dialect = session.get_bind().dialect.name
+        if dialect in ('sqlite', 'postgresql'):
+            # One INSERT ... ON CONFLICT per chunk instead of a SELECT per vector
+            insert = sqlite_insert if dialect == 'sqlite' else postgresql_insert
+            stmt = insert(EmbeddingCacheEntry.__table__)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=['key'],
+                set_={'model_name': stmt.excluded.model_name, 'vector': stmt.excluded.vector,
+                      'last_used_at': stmt.excluded.last_used_at}
+            )
+            for i in range(0, len(rows), BULK_CHUNK_SIZE):
+                session.execute(stmt, rows[i:i + BULK_CHUNK_SIZE])
+        else:
+            for row in rows:
+                session.merge(EmbeddingCacheEntry(**row))
+        session.flush()
+
+        if max_entries is not None:
+            # Only pay for eviction once the table is actually over its cap
+            excess = session.query(func.count(EmbeddingCacheEntry.key)).scalar() - max_entries
+            if excess > 0:
+                oldest = session.query(EmbeddingCacheEntry.key).order_by(
+                    EmbeddingCacheEntry.last_used_at.asc()
+                ).limit(excess)
+                session.query(EmbeddingCacheEntry).filter(
+                    EmbeddingCacheEntry.key.in_(oldest.scalar_subquery())
+                ).delete(synchronize_session=False)
+
+        session.commit()
+    except Exception as e:
+        session.rollback()
+        print(f"Error saving embeddings: {e}")
+        raise
+    finally:
+        session.close()
+
+# --- Reply Cache Helpers ---
+
+def get_cached_reply(key: str, since: datetime) -> Optional[ReplyCacheEntry]:
+    """The cached reply for a fingerprint, if stored after `since`."""
+    session = SessionLocal()
+    try:
+        return session.query(ReplyCacheEntry).filter(
+            ReplyCacheEntry.key == key, ReplyCacheEntry.created_at >= since
+        ).first()
+    finally:
+        session.close()
+
+def get_cached_replies_since(model_name: str, since: datetime) -> List[ReplyCacheEntry]:
+    """Every live cache entry for a model, to build the near-duplicate index from."""
+    session = SessionLocal()
+    try:
+        return session.query(ReplyCacheEntry).filter(
+            ReplyCacheEntry.model_name == model_name, ReplyCacheEntry.created_at >= since
+        ).all()
+    finally:
+        session.close()
+
+@serialized_write
+def save_cached_reply(key: str, simhash: str, model_name: str, tag: Optional[str], external_post_id: str,
+                      reply: str, expire_before: Optional[datetime] = None):
+    """Stores a reply by fingerprint, then drops entries created before expire_before."""
+    session = SessionLocal()
+    try:
+        session.merge(ReplyCacheEntry(
+            key=key, simhash=simhash, model_name=model_name, tag=tag,
+            external_post_id=external_post_id, reply=reply, created_at=datetime.utcnow()
+        ))
+        if expire_before is not None:
+            session.query(ReplyCacheEntry).filter(
+                ReplyCacheEntry.created_at < expire_before
+            ).delete(synchronize_session=False)
+        session.commit()
+    except Exception as e:
+        session.rollback()
+        print(f"Error saving cached reply: {e}")
+        raise
+    finally:
+        session.close()
+
+# --- Scout Job Helpers ---
+
+JOB_ACTIVE_STATUSES = ("PENDING", "RUNNING")
+
+@serialized_write
+def enqueue_job(query: str, limit: int, auto_like: bool = False, auto_comment: bool = False,
+                platform: str = "twitter", source: str = "manual", priority: int = 0) -> Tuple[int, bool]:
+    """
+    Queues a scout job, or merges it into an identical one still PENDING (taking
+    the more urgent priority). Returns (job id, whether it was coalesced).
+    """
+    session = SessionLocal()
+    try:
+        existing = session.query(ScoutJob).filter(
+            ScoutJob.status == "PENDING",
+            ScoutJob.platform == platform,
+            func.lower(ScoutJob.query) == query.strip().lower(),
+            ScoutJob.limit == limit,
+            ScoutJob.auto_like == auto_like,
+            ScoutJob.auto_comment == auto_comment
+        ).order_by(ScoutJob.id).first()
+        if existing is not None:
+            existing.coalesced += 1
+            existing.priority = min(existing.priority, priority)
+            session.commit()
+            return existing.id, True
+
+        job = ScoutJob(
+            platform=platform, query=query.strip(), limit=limit, auto_like=auto_like,
+            auto_comment=auto_comment, source=source, priority=priority
+        )
+        session.add(job)
+        session.commit()
+        return job.id, False
+    finally:
+        session.close()
+
+@serialized_write
+def claim_next_job(worker_id: Optional[str] = None) -> Optional[ScoutJob]:
+    """
+    Marks the most urgent PENDING job RUNNING under worker_id and returns it;
+    None if the queue is empty.
+    """
+    session = SessionLocal()
+    try:
+        while True:
+            job = session.query(ScoutJob).filter(ScoutJob.status == "PENDING").order_by(
+                ScoutJob.priority, ScoutJob.created_at, ScoutJob.id
+            ).first()
+            if job is None:
+                return None
+            # Compare-and-set, so two processes never claim the same job
+            claimed = session.query(ScoutJob).filter(
+                ScoutJob.id == job.id, ScoutJob.status == "PENDING"
+            ).update({
+                ScoutJob.status: "RUNNING", ScoutJob.worker_id: worker_id,
+                ScoutJob.started_at: datetime.utcnow(), ScoutJob.heartbeat_at: datetime.utcnow()
+            }, synchronize_session=False)
+            session.commit()
+            if claimed:
+                session.refresh(job)
+                session.expunge(job)
+                return job
+    finally:
+        session.close()
+
+@serialized_write
+def finish_job(job_id: int, status: str, result_count: Optional[int] = None, error: Optional[str] = None,
+               worker_id: Optional[str] = None):
+    """Records how a RUNNING job ended (only if worker_id still holds it, when given)."""
+    session = SessionLocal()
+    try:
+        query = session.query(ScoutJob).filter(ScoutJob.id == job_id)
+        if worker_id is not None:
+            query = query.filter(ScoutJob.worker_id == worker_id)
+        query.update({
+            ScoutJob.status: status,
+            ScoutJob.result_count: result_count,
+            ScoutJob.error: error,
+            ScoutJob.finished_at: datetime.utcnow()
+        }, synchronize_session=False)
+        session.commit()
+    finally:
+        session.close()
+
+@serialized_write
+def cancel_job(job_id: int) -> Optional[str]:
+    """
+    Cancels a PENDING job outright and flags a RUNNING one for its worker to stop.
+    Returns the job's status afterwards, or None if there is no such job.
+    """
+    session = SessionLocal()
+    try:
+        job = session.get(ScoutJob, job_id)
+        if job is None:
+            return None
+        if job.status == "PENDING":
+            job.status = "CANCELLED"
+            job.finished_at = datetime.utcnow()
+        elif job.status == "RUNNING":
+            job.cancel_requested = True
+        session.commit()
+        return job.status
+    finally:
+        session.close()
+
+def is_job_cancel_requested(job_id: int) -> bool:
+    session = SessionLocal()
+    try:
+        return bool(session.query(ScoutJob.cancel_requested).filter(ScoutJob.id == job_id).scalar())
+    finally:
+        session.close()
+
+@serialized_write
+def heartbeat_jobs(worker_id: str) -> int:
+    """Renews the lease on every job worker_id is running; returns how many."""
+    session = SessionLocal()
+    try:
+        count = session.query(ScoutJob).filter(
+            ScoutJob.status == "RUNNING", ScoutJob.worker_id == worker_id
+        ).update({ScoutJob.heartbeat_at: datetime.utcnow()}, synchronize_session=False)
+        session.commit()
+        return count
+    finally:
+        session.close()
+
+@serialized_write
+def requeue_running_jobs(stale_before: datetime) -> int:
+    """
+    Puts RUNNING jobs whose lease lapsed before stale_before (their process
+    crashed or restarted) back in the queue. Jobs a live process keeps
+    heartbeating are left alone, so sibling workers never steal them.
+    """
+    session = SessionLocal()
+    try:
+        count = session.query(ScoutJob).filter(
+            ScoutJob.status == "RUNNING",
+            or_(ScoutJob.heartbeat_at.is_(None), ScoutJob.heartbeat_at < stale_before)
+        ).update(
+            {ScoutJob.status: "PENDING", ScoutJob.started_at: None, ScoutJob.worker_id: None,
+             ScoutJob.heartbeat_at: None},
+            synchronize_session=False
+        )
+        session.commit()
+        return count
+    finally:
+        session.close()
+
+def get_jobs(limit: int = 100) -> List[ScoutJob]:
+    """Pending and running jobs first, then the rest; newest first within each."""
+    session = SessionLocal()
+    try:
+        active = case((ScoutJob.status.in_(JOB_ACTIVE_STATUSES), 0), else_=1)
+        return session.query(ScoutJob).order_by(active, ScoutJob.id.desc()).limit(limit).all()
+    finally:
+        session.close()
+
+# --- Search Watermark Helpers ---
+
+def get_watermark(query: str) -> Optional[SearchWatermark]:
+    session = SessionLocal()
+    try:
+        return session.get(SearchWatermark, query)
+    finally:
+        session.close()
+
+@serialized_write
+def advance_watermark(query: str, newest_id: int, newest_at: Optional[datetime] = None) -> bool:
+    """Moves a query's watermark forward to newest_id; never backwards. Returns whether it moved."""
+    session = SessionLocal()
+    try:
+        mark = session.get(SearchWatermark, query)
+        if mark is None:
+            session.add(SearchWatermark(query=query, newest_id=str(newest_id), newest_at=newest_at))
+        elif int(mark.newest_id) < newest_id:
+            mark.newest_id = str(newest_id)
+            mark.newest_at = newest_at or mark.newest_at
+            mark.updated_at = datetime.utcnow()
+        else:
+            return False
+        session.commit()
+        return True
+    finally:
+        session.close()
+
+# --- Trace Span Helpers ---
+
+@serialized_write
+def save_spans(rows: List[Dict], expire_before: Optional[datetime] = None):
+    """Inserts finished spans in one transaction, dropping spans older than expire_before."""
+    session = SessionLocal()
+    try:
+        if rows:
+            session.execute(TraceSpan.__table__.insert(), rows)
+        if expire_before is not None:
+            session.query(TraceSpan).filter(TraceSpan.started_at < expire_before).delete(synchronize_session=False)
+        session.commit()
+    finally:
+        session.close()
+
+def get_span_timings(since: datetime) -> List[Tuple[str, int, Optional[int], str]]:
+    """(name, duration_ms, count, status) for every span started since `since`."""
+    session = SessionLocal()
+    try:
+        return [
+            tuple(row) for row in session.query(
+                TraceSpan.name, TraceSpan.duration_ms, TraceSpan.count, TraceSpan.status
+            ).filter(TraceSpan.started_at >= since)
+        ]
+    finally:
+        session.close()
+
+def get_recent_traces(name: str, limit: int = 20) -> List[TraceSpan]:
+    """The latest root spans with this name (e.g. 'mission'), newest first."""
+    session = SessionLocal()
+    try:
+        return (
+            session.query(TraceSpan)
+            .filter(TraceSpan.name == name, TraceSpan.parent_id.is_(None))
+            .order_by(TraceSpan.started_at.desc())
+            .limit(limit)
+            .all()
+        )
+    finally:
+        session.close()
+
+def get_trace(trace_id: str) -> List[TraceSpan]:
+    """Every span of one trace, in start order."""
+    session = SessionLocal()
+    try:
+        return session.query(TraceSpan).filter(TraceSpan.trace_id == trace_id).order_by(TraceSpan.started_at, TraceSpan.id).all()
+    finally:
+        session.close()
@@ -0,0 +1,60 @@
+import threading
+from typing import Iterable, Optional
+
+
+class DedupIndex:
+    """
+    Process-wide set of every external_post_id in the interactions table.
+
+    Once warmed from the database, "have we seen this post?" is answered from
+    memory. An exact set is used rather than a Bloom filter so a positive
+    never needs a database round-trip; at ~80 bytes per id it stays around
+    40 MB for half a million posts. Until warm() has run the index reports
+    itself as not ready and callers fall back to querying.
+
+    The index only sees writes made by this process. With several worker
+    processes on one database, a post another process archived is missing
+    here, so a negative is only a hint: check_deduplication confirms it
+    against the database when WEB_CONCURRENCY > 1.
+    """
+
+    def __init__(self):
+        self._ids = set()
+        self._lock = threading.Lock()
+        self.ready = False
+
+    def warm(self, ids: Iterable[str]):
+        fresh = set(ids)
+        with self._lock:
+            # Keep ids add()ed while the scan was running; it may have missed them
+            fresh |= self._ids
+            self._ids = fresh
+            self.ready = True
+
+    def add(self, external_post_id: str):
+        with self._lock:
+            self._ids.add(external_post_id)
+
+    def add_many(self, external_post_ids: Iterable[str]):
+        with self._lock:
+            self._ids.update(external_post_ids)
+
+    def contains(self, external_post_id: str) -> Optional[bool]:
+        """True/False once warmed, None if the index can't answer yet."""
+        if not self.ready:
+            return None
+        return external_post_id in self._ids
+
+    def clear(self):
+        """The table was emptied: the index stays authoritative, just empty."""
+        with self._lock:
+            self._ids = set()
+
+    def reset(self):
+        """Forget everything and go back to querying until the next warm()."""
+        with self._lock:
+            self._ids = set()
+            self.ready = False
+
+    def __len__(self):
+        return len(self._ids)
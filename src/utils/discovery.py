@@ -1,5 +1,6 @@
 from typing import List
 import random
+from src.utils.query_planner import join_terms
 
 class TopicDiscovery:
     def __init__(self):
@@ -20,7 +21,7 @@ class TopicDiscovery:
     def get_smart_query(self) -> str:
         """Returns a single optimized query string combining multiple trending topics."""
         topics = self.get_suggested_topics(limit=2)
-        return " OR ".join([f'"{t}"' for t in topics])
+        return join_terms(topics)
 
 topic_discovery = TopicDiscovery()
 
@@ -0,0 +1,57 @@
+"""
+Drafts replies for ARCHIVED posts offline, so auto-engage can post them later
+without another LLM call.
+
+    python -m src.utils.draft_backlog submit [--tag bip] [--limit 200]
+    python -m src.utils.draft_backlog collect msgbatch_... [--wait]
+    python -m src.utils.draft_backlog generate [--tag bip] [--limit 50]
+
+submit/collect go through the Message Batches API (half price, results
+within 24h); generate drafts right away with concurrent requests.
+"""
+import argparse
+import sys
+import time
+from typing import List, Optional
+
+from src.agents.interaction_agent import interaction_agent
+
+POLL_SECONDS = 60
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m src.utils.draft_backlog", description="Draft replies for archived posts.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    for name in ("submit", "generate"):
+        command = commands.add_parser(name)
+        command.add_argument("--tag", help="only posts found for this keyword")
+        command.add_argument("--limit", type=int, help="newest N posts at most")
+    collect = commands.add_parser("collect")
+    collect.add_argument("batch_id")
+    collect.add_argument("--wait", action="store_true", help=f"poll every {POLL_SECONDS}s until the batch ends")
+    args = parser.parse_args(argv)
+
+    if not interaction_agent.api_key:
+        print("Error: AI Agent not configured (missing Anthropic API key).")
+        return 1
+
+    if args.command == "submit":
+        batch_id = interaction_agent.submit_draft_batch(tag=args.tag, limit=args.limit)
+        if batch_id:
+            print(f"Collect with: python -m src.utils.draft_backlog collect {batch_id} --wait")
+        return 0
+
+    if args.command == "generate":
+        interaction_agent.draft_backlog(tag=args.tag, limit=args.limit)
+        return 0
+
+    while interaction_agent.collect_draft_batch(args.batch_id) is None:
+        if not args.wait:
+            print(f"Batch {args.batch_id} is still processing.")
+            return 2
+        time.sleep(POLL_SECONDS)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,96 @@
+import hashlib
+import threading
+import time
+from typing import Callable, Dict, List
+
+import numpy as np
+
+from src import database
+
+
+class EmbeddingCache:
+    """
+    Persistent embedding cache backed by the `embedding_cache` table.
+    Keys are a hash of the model name plus the normalized text, so the same
+    tweet coming back on the next auto-scout cycle never reaches the encoder.
+    """
+
+    def __init__(self, model_name: str, max_entries: int = 50000):
+        self.model_name = model_name
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.encode_seconds = 0.0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def normalize(text: str) -> str:
+        return " ".join(text.split())
+
+    def key_for(self, text: str) -> str:
+        payload = f"{self.model_name}\0{self.normalize(text)}"
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get_or_encode(self, texts: List[str], encode: Callable[[List[str]], np.ndarray]) -> np.ndarray:
+        """
+        Returns a (n, dim) float32 matrix for texts. Only cache misses are passed
+        to `encode`, in a single call; cache errors fall back to encoding everything.
+        """
+        keys = [self.key_for(t) for t in texts]
+
+        try:
+            cached = database.get_cached_embeddings(list(set(keys)))
+        except Exception as e:
+            print(f"Embedding cache lookup failed: {e}")
+            cached = {}
+
+        vectors: Dict[str, np.ndarray] = {
+            key: np.frombuffer(raw, dtype=np.float32) for key, raw in cached.items()
+        }
+
+        # Encode each missing text once, even if it appears several times in the batch
+        missing = {}
+        for key, text in zip(keys, texts):
+            if key not in vectors and key not in missing:
+                missing[key] = text
+
+        if missing:
+            started = time.perf_counter()
+            encoded = np.asarray(encode(list(missing.values())), dtype=np.float32)
+            elapsed = time.perf_counter() - started
+
+            for key, vector in zip(missing, encoded):
+                vectors[key] = vector
+
+            try:
+                database.save_cached_embeddings(
+                    self.model_name,
+                    {key: vectors[key].tobytes() for key in missing},
+                    max_entries=self.max_entries
+                )
+            except Exception as e:
+                print(f"Embedding cache write failed: {e}")
+        else:
+            elapsed = 0.0
+
+        with self._lock:
+            # Per unique text: a duplicate within the batch is neither a hit nor a miss
+            self.hits += len(cached)
+            self.misses += len(missing)
+            self.encode_seconds += elapsed
+
+        return np.stack([vectors[key] for key in keys])
+
+    def stats(self) -> Dict:
+        """Hit/miss counters plus an estimate of encoder time saved by hits."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            per_text = self.encode_seconds / self.misses if self.misses else 0.0
+            return {
+                "model": self.model_name,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+                "encode_seconds": round(self.encode_seconds, 3),
+                "estimated_seconds_saved": round(self.hits * per_text, 3),
+            }
@@ -0,0 +1,146 @@
+import os
+import socket
+import threading
+import traceback
+import uuid
+from datetime import datetime, timedelta
+from typing import Callable, List, Optional
+
+from src import database
+from src.database import ScoutJob
+
+# Manual missions jump ahead of anything auto-scout queued
+PRIORITY_MANUAL = 0
+PRIORITY_AUTO = 10
+
+# A RUNNING job whose queue stops heartbeating for this long is presumed dead
+JOB_LEASE_SECONDS = float(os.getenv("JOB_LEASE_SECONDS", "120"))
+
+
+class JobContext:
+    """
+    What a handler gets alongside its job. Cancelling a RUNNING job only sets a
+    flag; handlers poll cancelled() between steps and return early. Once
+    cancelled() has answered True the job counts as stopped early.
+    """
+
+    def __init__(self, job_id: int):
+        self.job_id = job_id
+        self.stopped_early = False
+
+    def cancelled(self) -> bool:
+        if database.is_job_cancel_requested(self.job_id):
+            self.stopped_early = True
+        return self.stopped_early
+
+
+class JobQueue:
+    """
+    Scout missions queued in the `scout_jobs` table and run by a fixed pool of
+    worker threads.
+
+    Workers claim the most urgent PENDING job (lowest priority number, then
+    oldest), so a manual mission overtakes queued auto-scout runs and at most
+    `workers` missions ever compete for the browser. Submitting a mission
+    identical to one still waiting merges into it instead of queuing a
+    duplicate. The table is the source of truth: jobs survive a restart, and
+    their status and timing are queryable.
+
+    Each queue claims jobs under its own worker_id and heartbeats them while
+    they run. Any queue requeues RUNNING jobs whose lease (`lease_seconds`)
+    lapsed, so a crashed process's missions run again while those of live
+    sibling processes (uvicorn --workers N) are left alone.
+    """
+
+    def __init__(self, handler: Callable[[ScoutJob, JobContext], Optional[int]], workers: int = 2,
+                 poll_seconds: float = 5.0, lease_seconds: float = JOB_LEASE_SECONDS):
+        self.handler = handler
+        self.workers = workers
+        self.poll_seconds = poll_seconds
+        self.lease_seconds = lease_seconds
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._threads: List[threading.Thread] = []
+
+    def start(self):
+        if self._threads:
+            return
+        self._stop.clear()
+        self.requeue_stale()
+        threads = [threading.Thread(target=self._heartbeat, name="scout-heartbeat", daemon=True)]
+        threads += [threading.Thread(target=self._work, name=f"scout-worker-{i}", daemon=True) for i in range(self.workers)]
+        for thread in threads:
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self, timeout: float = 5.0):
+        self._stop.set()
+        self._wakeup.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def submit(self, query: str, limit: int, auto_like: bool = False, auto_comment: bool = False,
+               platform: str = "twitter", source: str = "manual") -> int:
+        """Queues a mission (or merges it into an identical pending one) and returns the job id."""
+        priority = PRIORITY_AUTO if source == "auto" else PRIORITY_MANUAL
+        job_id, coalesced = database.enqueue_job(
+            query, limit, auto_like=auto_like, auto_comment=auto_comment,
+            platform=platform, source=source, priority=priority
+        )
+        if coalesced:
+            print(f"Job queue: '{query}' is already queued as job {job_id}; merged.")
+        else:
+            print(f"Job queue: queued job {job_id} ({source}) for '{query}'.")
+        self._wakeup.set()
+        return job_id
+
+    def cancel(self, job_id: int) -> Optional[str]:
+        return database.cancel_job(job_id)
+
+    def requeue_stale(self) -> int:
+        """Requeues RUNNING jobs whose queue stopped heartbeating."""
+        requeued = database.requeue_running_jobs(datetime.utcnow() - timedelta(seconds=self.lease_seconds))
+        if requeued:
+            print(f"Job queue: requeued {requeued} interrupted jobs.")
+            self._wakeup.set()
+        return requeued
+
+    def run_next(self) -> bool:
+        """Claims and runs one job on the calling thread; False if none was pending."""
+        job = database.claim_next_job(self.worker_id)
+        if job is None:
+            return False
+
+        print(f"Job queue: running job {job.id} ('{job.query}').")
+        context = JobContext(job.id)
+        try:
+            result = self.handler(job, context)
+        except Exception as e:
+            traceback.print_exc()
+            database.finish_job(job.id, "FAILED", error=str(e), worker_id=self.worker_id)
+        else:
+            # A cancel that arrived after the handler's last check didn't stop anything
+            status = "CANCELLED" if context.stopped_early else "DONE"
+            database.finish_job(job.id, status, result_count=result, worker_id=self.worker_id)
+        return True
+
+    def _heartbeat(self):
+        while not self._stop.wait(self.lease_seconds / 4):
+            try:
+                database.heartbeat_jobs(self.worker_id)
+                self.requeue_stale()
+            except Exception as e:
+                print(f"Job queue heartbeat error: {e}")
+
+    def _work(self):
+        while not self._stop.is_set():
+            try:
+                if self.run_next():
+                    continue
+            except Exception as e:
+                print(f"Job queue worker error: {e}")
+            # Woken early by submit(); the timeout also picks up jobs queued by other processes
+            self._wakeup.wait(self.poll_seconds)
+            self._wakeup.clear()
@@ -0,0 +1,102 @@
+import re
+from typing import Dict, Iterable, List, NamedTuple, Set
+
+
+class KeywordMatch(NamedTuple):
+    include: List[str]
+    exclude: List[str]
+
+    @property
+    def passed(self) -> bool:
+        return bool(self.include) and not self.exclude
+
+
+def _trie_pattern(words: Iterable[str]) -> str:
+    """
+    Builds a regex alternation from a prefix trie of the words, so the engine
+    walks shared prefixes once instead of retrying every keyword at each
+    position. Longer keywords are preferred over their prefixes.
+    """
+    trie: Dict = {}
+    for word in words:
+        node = trie
+        for ch in word:
+            node = node.setdefault(ch, {})
+        node[""] = True
+
+    def render(node: Dict) -> str:
+        is_end = "" in node
+        branches = [re.escape(ch) + render(child) for ch, child in sorted(node.items()) if ch]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        if is_end:
+            # A keyword ends here; longer ones continue (greedy, so they win)
+            body = "(?:" + body + ")?"
+        return body
+
+    return render(trie)
+
+
+class KeywordMatcher:
+    """
+    Precompiled include/exclude keyword matcher.
+
+    All keywords go into one regex that finds every include and exclude hit in a
+    single pass over the lowercased text. With whole_words=False it keeps the
+    old substring semantics ('launch' matches 'launched'); with whole_words=True
+    keywords only match at word boundaries.
+    """
+
+    def __init__(self, include: Iterable[str], exclude: Iterable[str] = (), whole_words: bool = False):
+        self.include = self._clean(include)
+        self.exclude = self._clean(exclude)
+        self.whole_words = whole_words
+
+        keywords = sorted(set(self.include) | set(self.exclude))
+        self._include_set = set(self.include)
+        self._exclude_set = set(self.exclude)
+        self._pattern = None
+        self._implied: Dict[str, Set[str]] = {}
+
+        if keywords:
+            body = _trie_pattern(keywords)
+            if whole_words:
+                body = r"\b" + body + r"\b"
+            # Zero-width lookahead so overlapping keywords ('side project' / 'project launch') are all seen
+            self._pattern = re.compile(f"(?=({body}))")
+            # The regex reports the longest keyword at each position; the shorter ones it contains come along
+            self._implied = {kw: self._contained_in(kw, keywords) for kw in keywords}
+
+    @staticmethod
+    def _clean(words: Iterable[str]) -> List[str]:
+        seen = []
+        for w in words:
+            w = w.strip().lower()
+            if w and w not in seen:
+                seen.append(w)
+        return seen
+
+    def _contained_in(self, keyword: str, keywords: List[str]) -> Set[str]:
+        found = set()
+        for other in keywords:
+            if other not in keyword:
+                continue
+            if self.whole_words and not re.search(r"\b" + re.escape(other) + r"\b", keyword):
+                continue
+            found.add(other)
+        return found
+
+    def match(self, text: str) -> KeywordMatch:
+        """Returns the include and exclude keywords found in text, in configured order."""
+        if not self._pattern or not text:
+            return KeywordMatch([], [])
+
+        hits: Set[str] = set()
+        for m in self._pattern.finditer(text.lower()):
+            hits |= self._implied[m.group(1)]
+
+        return KeywordMatch(
+            include=[kw for kw in self.include if kw in hits],
+            exclude=[kw for kw in self.exclude if kw in hits]
+        )
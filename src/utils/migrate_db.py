@@ -3,15 +3,10 @@ import os
 
 DB_PATH = "vibebot.db"
 
-def migrate():
-    if not os.path.exists(DB_PATH):
-        print("No DB found, init_db will create it.")
-        return
+# Each migration runs once, in order; PRAGMA user_version records the last one applied.
 
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    
-    # Check existing columns
+def _add_detail_columns(cursor):
+    """v1: author/metrics/media/tag columns on interactions."""
     cursor.execute("PRAGMA table_info(interactions)")
     columns = [info[1] for info in cursor.fetchall()]
     
@@ -27,15 +22,66 @@ def migrate():
     for col, dtype in new_columns.items():
         if col not in columns:
             print(f"Adding column {col}...")
-            try:
-                cursor.execute(f"ALTER TABLE interactions ADD COLUMN {col} {dtype}")
-            except Exception as e:
-                print(f"Error adding {col}: {e}")
+            cursor.execute(f"ALTER TABLE interactions ADD COLUMN {col} {dtype}")
+
+def _add_interaction_indexes(cursor):
+    """v2: indexes for the dashboard counts, the feed ordering and tag/status filters."""
+    indexes = {
+        "ix_interactions_created_at": "created_at",
+        "ix_interactions_platform_created_at": "platform, created_at",
+        "ix_interactions_tag_created_at": "tag, created_at",
+        "ix_interactions_status": "status",
+    }
+    for name, columns in indexes.items():
+        print(f"Creating index {name}...")
+        cursor.execute(f"CREATE INDEX IF NOT EXISTS {name} ON interactions ({columns})")
+    # Give the planner fresh statistics for the new indexes
+    cursor.execute("ANALYZE interactions")
+
+def _add_job_lease_columns(cursor):
+    """v3: worker_id/heartbeat_at lease columns on scout_jobs."""
+    cursor.execute("PRAGMA table_info(scout_jobs)")
+    columns = [info[1] for info in cursor.fetchall()]
+    # No table yet: init_db creates it with these columns
+    if not columns:
+        return
+    for col, dtype in {"worker_id": "TEXT", "heartbeat_at": "DATETIME"}.items():
+        if col not in columns:
+            print(f"Adding column scout_jobs.{col}...")
+            cursor.execute(f"ALTER TABLE scout_jobs ADD COLUMN {col} {dtype}")
+
+MIGRATIONS = [
+    (1, _add_detail_columns),
+    (2, _add_interaction_indexes),
+    (3, _add_job_lease_columns),
+]
+
+def migrate(db_path: str = DB_PATH):
+    if not os.path.exists(db_path):
+        print("No DB found, init_db will create it.")
+        return
+
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+    
+    cursor.execute("PRAGMA user_version")
+    current = cursor.fetchone()[0]
+
+    for version, step in MIGRATIONS:
+        if version <= current:
+            continue
+        print(f"Applying migration {version}: {step.__doc__}")
+        try:
+            step(cursor)
+            cursor.execute(f"PRAGMA user_version = {version}")
+            conn.commit()
+        except Exception as e:
+            conn.rollback()
+            print(f"Migration {version} failed: {e}")
+            break
                 
-    conn.commit()
     conn.close()
     print("Migration complete.")
 
 if __name__ == "__main__":
     migrate()
-
@@ -0,0 +1,137 @@
+import asyncio
+import os
+import random
+import threading
+import time
+from typing import Callable, Dict, NamedTuple, Optional
+
+from src.utils.tracing import tracer
+
+
+class Pace(NamedTuple):
+    # Sustained spacing between actions, how many may go back-to-back after a
+    # quiet spell, and random extra spacing added when an action is throttled
+    min_interval: float
+    burst: int = 1
+    jitter: float = 0.0
+
+
+# Account-safety limits per action type
+DEFAULT_PACES = {
+    "search": Pace(min_interval=10.0, burst=3, jitter=3.0),
+    "navigate": Pace(min_interval=3.0, burst=2, jitter=2.0),
+    "like": Pace(min_interval=4.0, burst=3, jitter=2.0),
+    "reply": Pace(min_interval=15.0, burst=1, jitter=5.0),
+}
+
+
+class Pacer:
+    """
+    Token-bucket rate limiter keyed by action type.
+
+    Each action refills at one token per `min_interval` up to `burst`.
+    Taking a token never sleeps longer than the bucket requires: if one is
+    available the wait is zero. Otherwise the caller gets a reservation for
+    the moment one will be, so concurrent callers queue up instead of
+    bunching. wait() sleeps the calling thread, wait_async() the task;
+    web threads that must answer immediately use try_reserve(), which takes
+    every token an action needs at once or none at all.
+    With enabled=False every wait is zero (tests, dry runs).
+    """
+
+    def __init__(
+        self,
+        paces: Optional[Dict[str, Pace]] = None,
+        enabled: bool = True,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep
+    ):
+        self.paces = dict(DEFAULT_PACES if paces is None else paces)
+        self.enabled = enabled
+        self._clock = clock
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        # action -> [tokens, updated_at]; tokens go negative while reservations are queued
+        self._buckets: Dict[str, list] = {}
+        self._waits: Dict[str, list] = {}
+
+    def _tokens(self, action: str, pace: Pace, now: float) -> float:
+        tokens, updated_at = self._buckets.get(action, (float(pace.burst), now))
+        return min(float(pace.burst), tokens + (now - updated_at) / pace.min_interval)
+
+    def delay(self, action: str) -> float:
+        """Seconds until `action` could run, without taking a token."""
+        pace = self.paces.get(action)
+        if not self.enabled or pace is None:
+            return 0.0
+        with self._lock:
+            tokens = self._tokens(action, pace, self._clock())
+        return max(0.0, (1 - tokens) * pace.min_interval)
+
+    def try_reserve(self, *actions: str) -> float:
+        """
+        Takes one token from each action's bucket if all of them are available
+        right now and returns 0; otherwise takes nothing and returns the
+        longest wait. Callers that got 0 then act without wait().
+        """
+        if not self.enabled:
+            return 0.0
+        with self._lock:
+            now = self._clock()
+            paced = [(a, self.paces[a]) for a in actions if a in self.paces]
+            tokens = {a: self._tokens(a, pace, now) for a, pace in paced}
+            longest = max((max(0.0, (1 - tokens[a]) * pace.min_interval) for a, pace in paced), default=0.0)
+            if longest:
+                return longest
+            for action, _ in paced:
+                self._buckets[action] = [tokens[action] - 1, now]
+                self._waits.setdefault(action, [0, 0, 0.0])[0] += 1
+        return 0.0
+
+    def reserve(self, action: str) -> float:
+        """Takes a token for `action` and returns how long to wait before acting."""
+        pace = self.paces.get(action)
+        if not self.enabled or pace is None:
+            return 0.0
+        with self._lock:
+            now = self._clock()
+            tokens = self._tokens(action, pace, now)
+            wait = max(0.0, (1 - tokens) * pace.min_interval)
+            extra = random.uniform(0, pace.jitter) if wait and pace.jitter else 0.0
+            wait += extra
+            # Jitter is charged to the bucket too, so later reservations queue behind it
+            self._buckets[action] = [tokens - 1 - extra / pace.min_interval, now]
+            stats = self._waits.setdefault(action, [0, 0, 0.0])
+            stats[0] += 1
+            if wait:
+                stats[1] += 1
+                stats[2] += wait
+        return wait
+
+    def wait(self, action: str) -> float:
+        """Blocks the calling thread until `action` is allowed; returns seconds waited."""
+        delay = self.reserve(action)
+        if delay:
+            self._sleep(delay)
+            tracer.record(f"pacing.{action}", delay)
+        return delay
+
+    async def wait_async(self, action: str) -> float:
+        """Like wait(), but only suspends the calling task."""
+        delay = self.reserve(action)
+        if delay:
+            await asyncio.sleep(delay)
+            tracer.record(f"pacing.{action}", delay)
+        return delay
+
+    def stats(self) -> Dict[str, Dict]:
+        """Per action: tokens taken, how many had to wait, and total seconds waited."""
+        with self._lock:
+            return {
+                action: {"actions": n, "throttled": throttled, "seconds_waited": round(waited, 3)}
+                for action, (n, throttled, waited) in self._waits.items()
+            }
+
+
+# PACING=off runs every action at zero delay (tests, local dry runs)
+pacer = Pacer(enabled=os.getenv("PACING", "on").lower() != "off")
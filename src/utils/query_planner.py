@@ -0,0 +1,105 @@
+"""
+Packs a keyword set into as few Twitter searches as the query limits allow.
+
+Each keyword becomes a quoted phrase (as single-keyword searches always
+were) and phrases are OR-ed together, so one page load (and one pacing slot)
+covers several keywords. Results carry no
+record of which phrase matched, so they are demultiplexed back to per-keyword
+tags by matching the text locally with a KeywordMatcher.
+"""
+import re
+from typing import Dict, Iterable, List, NamedTuple
+
+from src.utils.keyword_matcher import KeywordMatcher
+
+# Twitter rejects queries over ~500 characters; leave room for the since_id:
+# window and parentheses the watermark logic may add
+MAX_QUERY_CHARS = 440
+# Long OR chains start to drop results server-side well before the length limit
+MAX_OR_TERMS = 8
+
+_OR = " OR "
+_QUOTED_OR = re.compile(r'^"[^"]+"(?: OR "[^"]+")*$')
+
+
+class SearchPlan(NamedTuple):
+    query: str
+    keywords: List[str]
+
+
+def quote_term(keyword: str) -> str:
+    """A keyword as an exact-phrase search term."""
+    return '"' + " ".join(keyword.replace('"', " ").split()) + '"'
+
+
+def join_terms(keywords: Iterable[str]) -> str:
+    return _OR.join(quote_term(k) for k in keywords)
+
+
+def split_terms(query: str) -> List[str]:
+    """The quoted terms of a plain `"a" OR "b"` query; any other query is one term."""
+    query = query.strip()
+    if _QUOTED_OR.match(query):
+        return query.split(_OR)
+    return [query]
+
+
+def plan_searches(keywords: Iterable[str], max_chars: int = MAX_QUERY_CHARS, max_terms: int = MAX_OR_TERMS) -> List[SearchPlan]:
+    """
+    Groups keywords into OR queries within max_chars / max_terms each.
+
+    First-fit decreasing on the quoted length, which gives the fewest searches
+    in practice. Ties break alphabetically, so the grouping doesn't depend on
+    the input order; each plan lists its keywords in the caller's order.
+    """
+    unique: List[str] = []
+    seen = set()
+    for keyword in keywords:
+        keyword = " ".join(keyword.split())
+        if keyword and keyword.lower() not in seen:
+            seen.add(keyword.lower())
+            unique.append(keyword)
+
+    bins: List[List[str]] = []
+    for keyword in sorted(unique, key=lambda k: (-len(quote_term(k)), k.lower())):
+        for group in bins:
+            if len(group) < max_terms and len(join_terms(group + [keyword])) <= max_chars:
+                group.append(keyword)
+                break
+        else:
+            bins.append([keyword])
+
+    order = {k: i for i, k in enumerate(unique)}
+    plans = []
+    for group in bins:
+        group.sort(key=order.get)
+        plans.append(SearchPlan(join_terms(group), group))
+    plans.sort(key=lambda p: order[p.keywords[0]])
+    return plans
+
+
+class Demultiplexer:
+    """Maps tweets from a merged search back to the keywords they mention."""
+
+    def __init__(self, plan: SearchPlan):
+        self.plan = plan
+        self._by_lower = {k.lower(): k for k in plan.keywords}
+        self._matcher = KeywordMatcher(plan.keywords)
+
+    def keywords_for(self, post: Dict) -> List[str]:
+        # Twitter also matches phrases in the author's name and handle
+        text = " ".join(str(post.get(field) or "") for field in ("text", "author", "handle"))
+        return [self._by_lower[k] for k in self._matcher.match(text).include]
+
+    def tag_for(self, post: Dict) -> str:
+        """First keyword mentioned; a tweet matched on something we can't see (a link, a hashtag) gets the plan's first."""
+        found = self.keywords_for(post)
+        return found[0] if found else self.plan.keywords[0]
+
+    def split(self, posts: Iterable[Dict]) -> Dict[str, List[Dict]]:
+        """Posts per keyword, in plan order. A post mentioning several keywords counts for each."""
+        groups: Dict[str, List[Dict]] = {k: [] for k in self.plan.keywords}
+        for post in posts:
+            for keyword in self.keywords_for(post) or [self.plan.keywords[0]]:
+                groups[keyword].append(post)
+        return groups
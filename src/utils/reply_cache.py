@@ -0,0 +1,217 @@
+import hashlib
+import re
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List, NamedTuple, Optional, Set, Tuple
+
+from src import database
+
+SIMHASH_BITS = 64
+# Eight 8-bit bands: two fingerprints within 7 bits share at least one band
+# exactly, so only posts in a matching band are ever compared. Tweets are
+# short, so one extra word moves a few bits; unrelated texts sit ~32 apart.
+SIMHASH_BANDS = 8
+# Below this many words a fingerprint is mostly noise; only exact matches count
+MIN_NEAR_WORDS = 6
+# How often store() sweeps expired entries out of the near-duplicate index
+PRUNE_INTERVAL_SECONDS = 60
+
+_URL = re.compile(r"https?://\S+")
+_RETWEET = re.compile(r"^rt @\w+:\s*")
+_TOKEN = re.compile(r"[a-z0-9@#']+")
+
+
+def normalize(text: str) -> str:
+    """Lowercased text without links or a retweet prefix, whitespace collapsed."""
+    text = _URL.sub(" ", (text or "").lower())
+    return " ".join(_RETWEET.sub("", text.strip()).split())
+
+
+def simhash(text: str) -> int:
+    """64-bit SimHash over word bigrams of the normalized text."""
+    words = _TOKEN.findall(normalize(text))
+    features = [" ".join(pair) for pair in zip(words, words[1:])] or words
+    weights = [0] * SIMHASH_BITS
+    for feature in features:
+        h = int.from_bytes(hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest(), "big")
+        for bit in range(SIMHASH_BITS):
+            weights[bit] += 1 if h >> bit & 1 else -1
+    return sum(1 << bit for bit, w in enumerate(weights) if w > 0)
+
+
+def hamming(a: int, b: int) -> int:
+    return bin(a ^ b).count("1")
+
+
+class CachedReply(NamedTuple):
+    # reply is None when the policy says to skip a duplicate rather than reuse it
+    reply: Optional[str]
+    kind: str  # 'exact', 'near' or 'skip'
+    source_post_id: str
+
+
+class ReplyCache:
+    """
+    Generated replies keyed by a content fingerprint, backed by the
+    `reply_cache` table.
+
+    The exact key is a hash of model + tag + normalized text, so a tweet whose
+    reply failed to post (or the same text found again) gets its earlier
+    reply back instead of a new LLM call. Near-duplicates (retweets,
+    copypasta launches) are caught by SimHash within `max_distance` bits,
+    among posts with the same tag. For a duplicate of a *different* post,
+    near_policy "skip" (the default) returns no reply at all, so we don't
+    answer the same copypasta twice; "reuse" returns that post's reply
+    instead. Entries expire after
+    `ttl_seconds`.
+    """
+
+    def __init__(self, model_name: str, ttl_seconds: float, max_distance: int = 6, near_policy: str = "skip"):
+        self.model_name = model_name
+        self.ttl_seconds = ttl_seconds
+        # Banding only guarantees candidates up to SIMHASH_BANDS - 1 bits apart
+        self.max_distance = min(max_distance, SIMHASH_BANDS - 1)
+        self.near_policy = near_policy
+        self._lock = threading.Lock()
+
+        # Near-duplicate index, loaded from the table on first use
+        self._ready = False
+        self._entries: Dict[str, Tuple[int, Optional[str], str, str, float]] = {}
+        self._bands: Dict[Tuple, Set[str]] = {}
+        self._pruned_at = time.time()
+
+        self.exact_hits = 0
+        self.near_hits = 0
+        self.skipped = 0
+        self.misses = 0
+        self.generate_seconds = 0.0
+        self.generated = 0
+
+    def key_for(self, text: str, tag: Optional[str]) -> str:
+        payload = f"{self.model_name}\0{tag or ''}\0{normalize(text)}"
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def _band_keys(fingerprint: int, tag: Optional[str]) -> List[Tuple]:
+        width = SIMHASH_BITS // SIMHASH_BANDS
+        mask = (1 << width) - 1
+        return [(tag or "", band, fingerprint >> (band * width) & mask) for band in range(SIMHASH_BANDS)]
+
+    def _index(self, key: str, fingerprint: int, tag: Optional[str], reply: str, post_id: str, stored_at: float):
+        self._entries[key] = (fingerprint, tag, reply, post_id, stored_at)
+        for band in self._band_keys(fingerprint, tag):
+            self._bands.setdefault(band, set()).add(key)
+
+    def _prune(self, now: float):
+        """Drops expired entries from the index (caller holds the lock)."""
+        oldest = now - self.ttl_seconds
+        for key in [k for k, entry in self._entries.items() if entry[4] < oldest]:
+            fingerprint, tag = self._entries.pop(key)[:2]
+            for band in self._band_keys(fingerprint, tag):
+                keys = self._bands.get(band)
+                if keys is not None:
+                    keys.discard(key)
+                    if not keys:
+                        del self._bands[band]
+        self._pruned_at = now
+
+    def _warm(self):
+        since = datetime.utcnow() - timedelta(seconds=self.ttl_seconds)
+        rows = database.get_cached_replies_since(self.model_name, since)
+        with self._lock:
+            for row in rows:
+                stored_at = time.time() - (datetime.utcnow() - row.created_at).total_seconds()
+                self._index(row.key, int(row.simhash, 16), row.tag, row.reply, row.external_post_id, stored_at)
+            self._ready = True
+
+    def _nearest(self, fingerprint: int, tag: Optional[str]) -> Optional[Tuple[str, str]]:
+        """(reply, post id) of the closest live entry within max_distance, if any."""
+        oldest = time.time() - self.ttl_seconds
+        best = None
+        with self._lock:
+            candidates = set().union(*(self._bands.get(b, ()) for b in self._band_keys(fingerprint, tag)))
+            for key in candidates:
+                other, _, reply, post_id, stored_at = self._entries[key]
+                if stored_at < oldest:
+                    continue
+                distance = hamming(fingerprint, other)
+                if distance <= self.max_distance and (best is None or distance < best[0]):
+                    best = (distance, reply, post_id)
+        return best[1:] if best else None
+
+    def lookup(self, post_id: str, text: str, tag: Optional[str]) -> Optional[CachedReply]:
+        """A cached reply for this post, or None when it has to be generated."""
+        try:
+            if not self._ready:
+                self._warm()
+
+            found = None
+            entry = database.get_cached_reply(self.key_for(text, tag), datetime.utcnow() - timedelta(seconds=self.ttl_seconds))
+            if entry is not None:
+                found = (entry.reply, entry.external_post_id, "exact")
+            elif len(normalize(text).split()) >= MIN_NEAR_WORDS:
+                near = self._nearest(simhash(text), tag)
+                if near:
+                    found = (near[0], near[1], "near")
+        except Exception as e:
+            print(f"Reply cache lookup failed: {e}")
+            found = None
+
+        with self._lock:
+            if found is None:
+                self.misses += 1
+                return None
+            reply, source, kind = found
+            # Someone else's duplicate: the policy decides between reusing and skipping
+            if source != post_id and self.near_policy == "skip":
+                self.skipped += 1
+                return CachedReply(None, "skip", source)
+            if kind == "exact":
+                self.exact_hits += 1
+            else:
+                self.near_hits += 1
+            return CachedReply(reply, kind, source)
+
+    def store(self, post_id: str, text: str, tag: Optional[str], reply: str, seconds: Optional[float] = None):
+        """Remembers a freshly generated reply; `seconds` is what the LLM call took."""
+        key = self.key_for(text, tag)
+        fingerprint = simhash(text)
+        with self._lock:
+            if seconds is not None:
+                self.generated += 1
+                self.generate_seconds += seconds
+            now = time.time()
+            if now - self._pruned_at >= PRUNE_INTERVAL_SECONDS:
+                self._prune(now)
+            self._index(key, fingerprint, tag, reply, post_id, now)
+        try:
+            database.save_cached_reply(
+                key=key,
+                simhash=f"{fingerprint:016x}",
+                model_name=self.model_name,
+                tag=tag,
+                external_post_id=post_id,
+                reply=reply,
+                expire_before=datetime.utcnow() - timedelta(seconds=self.ttl_seconds)
+            )
+        except Exception as e:
+            print(f"Reply cache write failed: {e}")
+
+    def stats(self) -> Dict:
+        """Hit/skip counters, LLM calls saved and an estimate of the latency saved."""
+        with self._lock:
+            saved = self.exact_hits + self.near_hits + self.skipped
+            lookups = saved + self.misses
+            per_call = self.generate_seconds / self.generated if self.generated else 0.0
+            return {
+                "model": self.model_name,
+                "exact_hits": self.exact_hits,
+                "near_hits": self.near_hits,
+                "skipped_duplicates": self.skipped,
+                "misses": self.misses,
+                "calls_saved": saved,
+                "hit_ratio": round(saved / lookups, 4) if lookups else 0.0,
+                "avg_generate_seconds": round(per_call, 3),
+                "estimated_seconds_saved": round(saved * per_call, 3),
+            }
@@ -0,0 +1,87 @@
+"""
+Shared semantic scoring process.
+
+Every uvicorn worker that imports the semantic filter would otherwise load its
+own copy of MiniLM. Run one scorer instead and point the workers at it:
+
+    SEMANTIC_SCORER_SOCKET=/tmp/vibebot-scorer.sock python -m src.utils.scoring_server
+    SEMANTIC_SCORER_SOCKET=/tmp/vibebot-scorer.sock uvicorn src.web.app:app --workers 4
+
+The protocol is one JSON object per line: {"texts": [...]} -> {"scores": [...]}.
+"""
+import json
+import os
+import socket
+import socketserver
+from typing import List
+
+DEFAULT_SOCKET_PATH = "/tmp/vibebot-scorer.sock"
+
+
+def score_remote(socket_path: str, texts: List[str], timeout: float = 30.0) -> List[float]:
+    """Scores texts on the scoring server. Raises OSError if it can't be reached."""
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(timeout)
+        sock.connect(socket_path)
+        sock.sendall(json.dumps({"texts": texts}).encode("utf-8") + b"\n")
+
+        with sock.makefile("rb") as reader:
+            line = reader.readline()
+
+    if not line:
+        raise ConnectionError("Scoring server closed the connection without a reply")
+
+    response = json.loads(line)
+    if "error" in response:
+        raise ConnectionError(f"Scoring server error: {response['error']}")
+    return [float(s) for s in response["scores"]]
+
+
+class _ScoringHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        for line in self.rfile:
+            try:
+                texts = json.loads(line)["texts"]
+                reply = {"scores": self.server.scorer.score_many(texts)}
+            except Exception as e:
+                reply = {"error": str(e)}
+            self.wfile.write(json.dumps(reply).encode("utf-8") + b"\n")
+            self.wfile.flush()
+
+
+class ScoringServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, socket_path: str, scorer):
+        # A stale socket file from a previous run would make bind() fail
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+        self.scorer = scorer
+        super().__init__(socket_path, _ScoringHandler)
+
+    def server_close(self):
+        super().server_close()
+        try:
+            os.unlink(self.server_address)
+        except OSError:
+            pass
+
+
+def serve(socket_path: str = DEFAULT_SOCKET_PATH):
+    """Loads the model once and serves scoring requests until interrupted."""
+    from src.agents.semantic_filter import SemanticFilter, _build_default_cache
+
+    # The server always scores in-process, whatever SEMANTIC_SCORER_SOCKET says
+    scorer = SemanticFilter(cache=_build_default_cache())
+    scorer.warm_up()
+
+    with ScoringServer(socket_path, scorer) as server:
+        print(f"Scoring server listening on {socket_path}")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            print("Scoring server stopped.")
+
+
+if __name__ == "__main__":
+    serve(os.getenv("SEMANTIC_SCORER_SOCKET", DEFAULT_SOCKET_PATH))
@@ -0,0 +1,196 @@
+import math
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, List, Optional
+
+from src.utils.discovery import TopicDiscovery
+from src.utils.query_planner import plan_searches
+
+# Weight of the latest run in the per-keyword yield averages
+EWMA_ALPHA = 0.3
+# How hard under-explored keywords are favoured when the budget can't cover everything due
+EXPLORATION = 2.0
+# A discovered topic that has kept nothing after this many runs is dropped
+RETIRE_AFTER_RUNS = 3
+
+
+class KeywordState:
+    def __init__(self, keyword: str, source: str, interval: float, now: float):
+        self.keyword = keyword
+        self.source = source  # 'core' or 'discovered'
+        self.interval = interval
+        self.next_due = now
+        self.runs = 0
+        self.new_posts = 0
+        self.kept = 0
+        self.new_ewma = 0.0
+        self.kept_ewma = 0.0
+
+    def to_dict(self, now: float) -> Dict:
+        return {
+            "keyword": self.keyword,
+            "source": self.source,
+            "interval_seconds": round(self.interval),
+            "due_in_seconds": max(0, round(self.next_due - now)),
+            "runs": self.runs,
+            "new_posts": self.new_posts,
+            "kept": self.kept,
+            "survival_rate": round(self.kept / self.new_posts, 3) if self.new_posts else None,
+            "new_per_run": round(self.new_ewma, 2),
+            "kept_per_run": round(self.kept_ewma, 2),
+        }
+
+
+class ScoutScheduler:
+    """
+    Decides which auto-scout keywords to search, and when.
+
+    Each keyword has its own polling interval, adapted from what its runs
+    yield: a run with no new posts doubles the interval (up to
+    max_interval), a run that fills the whole search limit halves it (we are
+    polling slower than it produces), anything in between keeps it. Searches
+    are capped at `searches_per_hour` over a sliding hour, counted after the
+    due keywords are packed into OR queries (plan_searches), so one merged
+    search costs one unit however many keywords it covers. When the due
+    keywords need more searches than the budget allows, the ones with the best recent yield of
+    posts that survive the filters go first, plus an exploration bonus
+    (UCB-style) so rarely run keywords still get tried.
+
+    Besides the core keywords, up to `max_discovered` candidates come from
+    TopicDiscovery.get_suggested_topics; one that keeps nothing after a few
+    runs is retired and replaced on the next refresh.
+    """
+
+    def __init__(
+        self,
+        core_keywords: List[str],
+        discovery: Optional[TopicDiscovery] = None,
+        searches_per_hour: int = 12,
+        base_interval: float = 600.0,
+        min_interval: float = 300.0,
+        max_interval: float = 6 * 3600.0,
+        search_limit: int = 10,
+        max_discovered: int = 3,
+        refresh_seconds: float = 3600.0,
+        clock: Callable[[], float] = time.time
+    ):
+        self.discovery = discovery
+        self.searches_per_hour = searches_per_hour
+        self.base_interval = base_interval
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.search_limit = search_limit
+        self.max_discovered = max_discovered
+        self.refresh_seconds = refresh_seconds
+        self._clock = clock
+        self._lock = threading.Lock()
+
+        now = clock()
+        self._keywords: Dict[str, KeywordState] = {
+            k.lower(): KeywordState(k, "core", base_interval, now) for k in core_keywords
+        }
+        self._dispatched = deque()
+        self._retired = set()
+        self._refreshed_at = None
+
+    def _refresh_candidates(self, now: float):
+        if self.discovery is None or not self.max_discovered:
+            return
+        if self._refreshed_at is not None and now - self._refreshed_at < self.refresh_seconds:
+            return
+        self._refreshed_at = now
+        active = sum(1 for s in self._keywords.values() if s.source == "discovered")
+        # Ask for spares: some suggestions may already be tracked or retired
+        for topic in self.discovery.get_suggested_topics(limit=2 * self.max_discovered):
+            if active >= self.max_discovered:
+                break
+            key = topic.lower()
+            if key in self._keywords or key in self._retired:
+                continue
+            self._keywords[key] = KeywordState(topic, "discovered", self.base_interval, now)
+            active += 1
+
+    def _budget_left(self, now: float) -> int:
+        while self._dispatched and now - self._dispatched[0] >= 3600:
+            self._dispatched.popleft()
+        return max(0, self.searches_per_hour - len(self._dispatched))
+
+    def _score(self, state: KeywordState, total_runs: int) -> float:
+        if state.runs == 0:
+            return math.inf
+        return state.kept_ewma + EXPLORATION * math.sqrt(math.log(total_runs + 1) / state.runs)
+
+    def due(self) -> List[str]:
+        """
+        Keywords to search now, best first. The searches they plan into are
+        already counted against the budget.
+        """
+        with self._lock:
+            now = self._clock()
+            self._refresh_candidates(now)
+            ready = [s for s in self._keywords.values() if s.next_due <= now]
+            budget = self._budget_left(now)
+            if not ready or not budget:
+                return []
+
+            total_runs = sum(s.runs for s in self._keywords.values())
+            ready.sort(key=lambda s: self._score(s, total_runs), reverse=True)
+            chosen: List[KeywordState] = []
+            searches = 0
+            for state in ready:
+                planned = len(plan_searches([s.keyword for s in chosen] + [state.keyword]))
+                if planned > budget:
+                    continue
+                chosen.append(state)
+                searches = planned
+            for state in chosen:
+                # Provisional: record() reschedules from the actual result
+                state.next_due = now + state.interval
+            self._dispatched.extend([now] * searches)
+            return [s.keyword for s in chosen]
+
+    def record(self, keyword: str, new_posts: int, kept: int):
+        """Feeds back one run: new posts found and how many survived the filters."""
+        with self._lock:
+            state = self._keywords.get(keyword.lower())
+            if state is None:
+                return
+            now = self._clock()
+            state.runs += 1
+            state.new_posts += new_posts
+            state.kept += kept
+            state.new_ewma += EWMA_ALPHA * (new_posts - state.new_ewma)
+            state.kept_ewma += EWMA_ALPHA * (kept - state.kept_ewma)
+
+            if new_posts == 0:
+                state.interval = min(self.max_interval, state.interval * 2)
+            elif new_posts >= self.search_limit:
+                state.interval = max(self.min_interval, state.interval / 2)
+            state.next_due = now + state.interval
+
+            if state.source == "discovered" and state.runs >= RETIRE_AFTER_RUNS and state.kept == 0:
+                print(f"Auto-Scout: retiring discovered topic '{state.keyword}' (nothing kept in {state.runs} runs).")
+                del self._keywords[keyword.lower()]
+                self._retired.add(keyword.lower())
+
+    def seconds_until_next(self) -> float:
+        """How long the loop can sleep before something is due (or budget frees up)."""
+        with self._lock:
+            now = self._clock()
+            waits = [s.next_due - now for s in self._keywords.values()]
+            if self._budget_left(now) == 0:
+                waits = [max(min(waits, default=0), self._dispatched[0] + 3600 - now)]
+            return max(0.0, min(waits, default=self.base_interval))
+
+    def stats(self) -> Dict:
+        with self._lock:
+            now = self._clock()
+            return {
+                "searches_per_hour": self.searches_per_hour,
+                "budget_left": self._budget_left(now),
+                "keywords": sorted(
+                    (s.to_dict(now) for s in self._keywords.values()), key=lambda d: d["due_in_seconds"]
+                ),
+                "retired": sorted(self._retired),
+            }
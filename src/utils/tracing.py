@@ -0,0 +1,232 @@
+"""
+Span tracing for the scout pipeline.
+
+`with tracer.span("search.navigate", query=q) as span:` times one step; spans
+opened inside it become its children, so a whole mission forms one trace.
+The current span lives in a contextvar, which follows asyncio tasks; work
+handed to another thread keeps its trace when submitted through
+`contextvars.copy_context().run`, or by re-entering `tracer.attach(parent)`
+with the caller's `tracer.current()`. Steps spread over a loop (scrolling,
+parsing) are measured piecewise and logged with `tracer.record`.
+
+Finished spans are buffered and written to the `trace_spans` table in
+batches (optionally mirrored to a JSONL file) by a background thread, so
+closing a span never waits on the database, whichever thread or event loop
+it runs on. `stage_stats` summarizes them per stage for the /perf page.
+"""
+import contextvars
+import json
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from src import database
+
+# (trace_id, span_id) of the innermost open span
+_current: contextvars.ContextVar = contextvars.ContextVar("trace_span", default=None)
+
+
+def _new_id() -> str:
+    return uuid.uuid4().hex[:16]
+
+
+def percentile(values: List[float], q: float) -> Optional[float]:
+    """Nearest-rank percentile of already sorted values."""
+    if not values:
+        return None
+    return values[int(q * (len(values) - 1))]
+
+
+class Span:
+    """An open span; set the item count or extra attributes before it ends."""
+
+    def __init__(self, name: str, attrs: Dict, count: Optional[int] = None):
+        self.name = name
+        self.attrs = attrs
+        self.count = count
+        self.status = "ok"
+
+    def set(self, count: Optional[int] = None, **attrs):
+        if count is not None:
+            self.count = count
+        self.attrs.update(attrs)
+
+
+class Tracer:
+    """Records spans; disabled, span() still yields a Span but nothing is stored."""
+
+    def __init__(self, enabled: bool = True, jsonl_path: Optional[str] = None, retention_days: float = 7,
+                 flush_size: int = 100, flush_seconds: float = 10.0):
+        self.enabled = enabled
+        self.jsonl_path = jsonl_path
+        self.retention_days = retention_days
+        self.flush_size = flush_size
+        self.flush_seconds = flush_seconds
+        self._lock = threading.Lock()
+        self._buffer: List[Dict] = []
+        self._pruned_at = None
+        # Started on the first span; woken early when the buffer fills
+        self._flusher: Optional[threading.Thread] = None
+        self._wake = threading.Event()
+        self._closed = threading.Event()
+
+    def current(self):
+        """The open span's (trace_id, span_id), to carry into another thread or event loop."""
+        return _current.get()
+
+    @contextmanager
+    def attach(self, parent):
+        """Makes spans opened inside children of `parent` (from current())."""
+        token = _current.set(parent)
+        try:
+            yield
+        finally:
+            _current.reset(token)
+
+    @contextmanager
+    def span(self, name: str, count: Optional[int] = None, **attrs):
+        span = Span(name, attrs, count)
+        if not self.enabled:
+            yield span
+            return
+
+        parent = _current.get()
+        trace_id = parent[0] if parent else _new_id()
+        span_id = _new_id()
+        token = _current.set((trace_id, span_id))
+        started_at = datetime.utcnow()
+        start = time.perf_counter()
+        try:
+            yield span
+        except BaseException as e:
+            span.status = "error"
+            span.attrs.setdefault("error", str(e)[:200] or type(e).__name__)
+            raise
+        finally:
+            _current.reset(token)
+            self._add(span, trace_id, span_id, parent[1] if parent else None, started_at, time.perf_counter() - start)
+
+    def record(self, name: str, seconds: float, count: Optional[int] = None, **attrs):
+        """Logs a step measured elsewhere as a child of the current span, ending now."""
+        if not self.enabled:
+            return
+        parent = _current.get()
+        started_at = datetime.utcnow() - timedelta(seconds=seconds)
+        self._add(Span(name, attrs, count), parent[0] if parent else _new_id(), _new_id(),
+                  parent[1] if parent else None, started_at, seconds)
+
+    def _add(self, span: Span, trace_id: str, span_id: str, parent_id: Optional[str], started_at: datetime,
+             seconds: float):
+        row = {
+            "trace_id": trace_id,
+            "span_id": span_id,
+            "parent_id": parent_id,
+            "name": span.name,
+            "started_at": started_at,
+            "duration_ms": int(round(seconds * 1000)),
+            "count": span.count,
+            "status": span.status,
+            "attrs_json": json.dumps(span.attrs, default=str) if span.attrs else None,
+        }
+        with self._lock:
+            self._buffer.append(row)
+            full = len(self._buffer) >= self.flush_size
+            if self._flusher is None and not self._closed.is_set():
+                self._flusher = threading.Thread(target=self._flush_loop, name="trace-flush", daemon=True)
+                self._flusher.start()
+        if full:
+            self._wake.set()
+
+    def _flush_loop(self):
+        # Every flush_seconds, or sooner once flush_size spans are waiting
+        while not self._closed.is_set():
+            self._wake.wait(self.flush_seconds)
+            self._wake.clear()
+            with self._lock:
+                pending = bool(self._buffer)
+            if pending:
+                self.flush()
+
+    def close(self):
+        """Stops the background writer and flushes what is left (app shutdown)."""
+        self._closed.set()
+        self._wake.set()
+        if self._flusher is not None:
+            self._flusher.join(timeout=5)
+        self.flush()
+
+    def flush(self):
+        """Writes buffered spans to the trace store, on the calling thread."""
+        with self._lock:
+            rows, self._buffer = self._buffer, []
+            expire_before = None
+            if self.retention_days and (self._pruned_at is None or time.monotonic() - self._pruned_at >= 3600):
+                self._pruned_at = time.monotonic()
+                expire_before = datetime.utcnow() - timedelta(days=self.retention_days)
+        if not rows and expire_before is None:
+            return
+        try:
+            database.save_spans(rows, expire_before=expire_before)
+            if self.jsonl_path and rows:
+                with open(self.jsonl_path, "a") as f:
+                    for row in rows:
+                        f.write(json.dumps({**row, "started_at": row["started_at"].isoformat()}) + "\n")
+        except Exception as e:
+            print(f"Trace flush failed ({len(rows)} spans dropped): {e}")
+
+    def stage_stats(self, hours: float = 24) -> List[Dict]:
+        """Per-stage span count, items, total time and p50/p95/max, slowest total first."""
+        self.flush()
+        by_name: Dict[str, Dict] = {}
+        for name, duration_ms, count, status in database.get_span_timings(datetime.utcnow() - timedelta(hours=hours)):
+            stage = by_name.setdefault(name, {"durations": [], "items": 0, "errors": 0})
+            stage["durations"].append(duration_ms)
+            stage["items"] += count or 0
+            stage["errors"] += status != "ok"
+
+        stats = []
+        for name, stage in by_name.items():
+            durations = sorted(stage["durations"])
+            stats.append({
+                "stage": name,
+                "spans": len(durations),
+                "items": stage["items"],
+                "errors": stage["errors"],
+                "total_seconds": round(sum(durations) / 1000, 1),
+                "p50_ms": percentile(durations, 0.5),
+                "p95_ms": percentile(durations, 0.95),
+                "max_ms": durations[-1],
+            })
+        stats.sort(key=lambda s: s["total_seconds"], reverse=True)
+        return stats
+
+    def recent_traces(self, name: str = "mission", limit: int = 20) -> List[Dict]:
+        """The latest root spans named `name`, each with time per child stage."""
+        self.flush()
+        traces = []
+        for root in database.get_recent_traces(name, limit):
+            stages: Dict[str, int] = {}
+            for span in database.get_trace(root.trace_id):
+                if span.parent_id is not None:
+                    stages[span.name] = stages.get(span.name, 0) + span.duration_ms
+            traces.append({
+                "trace_id": root.trace_id,
+                "started_at": root.started_at.isoformat(),
+                "duration_ms": root.duration_ms,
+                "count": root.count,
+                "status": root.status,
+                "attrs": json.loads(root.attrs_json) if root.attrs_json else {},
+                "stages": dict(sorted(stages.items(), key=lambda kv: kv[1], reverse=True)),
+            })
+        return traces
+
+
+tracer = Tracer(
+    enabled=os.getenv("TRACING", "1") == "1",
+    jsonl_path=os.getenv("TRACE_JSONL_PATH") or None,
+    retention_days=float(os.getenv("TRACE_RETENTION_DAYS", "7"))
+)
@@ -0,0 +1,68 @@
+"""
+Per-query search watermarks: the newest tweet a search has already returned.
+
+Tweet ids are snowflakes, so a larger id is a newer tweet. On a newest-first
+("Latest") search, once we reach an id at or below the watermark everything
+after it has been seen, so harvesting stops there. Where the query allows,
+the window is also narrowed server-side with since_id: (or since: for a date).
+"""
+import re
+from datetime import datetime, timezone
+from typing import Dict, Iterable, Optional, Tuple
+
+# Operators that already bound the search window; we don't add our own next to them
+_WINDOW_OPERATOR = re.compile(r"\b(since|until|since_id|max_id|since_time|until_time|within_time):", re.IGNORECASE)
+
+
+def snowflake(tweet_id) -> Optional[int]:
+    """The numeric tweet id, or None for ids that aren't snowflakes."""
+    try:
+        return int(tweet_id)
+    except (TypeError, ValueError):
+        return None
+
+
+def is_seen(tweet: Dict, newest_id: int) -> bool:
+    value = snowflake(tweet.get("id"))
+    return value is not None and value <= newest_id
+
+
+def scoped_query(query: str, newest_id: Optional[int] = None, newest_at: Optional[datetime] = None) -> str:
+    """The query limited to tweets after the watermark, when its syntax allows."""
+    if _WINDOW_OPERATOR.search(query):
+        return query
+    if newest_id is not None:
+        window = f"since_id:{newest_id}"
+    elif newest_at is not None:
+        window = f"since:{newest_at:%Y-%m-%d}"
+    else:
+        return query
+    # OR binds tighter than the implicit AND, but be explicit about what the window covers
+    if " OR " in query and not (query.startswith("(") and query.endswith(")")):
+        query = f"({query})"
+    return f"{query} {window}"
+
+
+def parse_timestamp(value: Optional[str]) -> Optional[datetime]:
+    """ISO 8601 from either extractor -> naive UTC, like the rest of the database."""
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+def newest(tweets: Iterable[Dict]) -> Tuple[Optional[int], Optional[datetime]]:
+    """(id, timestamp) of the newest tweet with a snowflake id, or (None, None)."""
+    best = None
+    for tweet in tweets:
+        value = snowflake(tweet.get("id"))
+        if value is not None and (best is None or value > best[0]):
+            best = (value, tweet)
+    if best is None:
+        return None, None
+    return best[0], parse_timestamp(best[1].get("created_at"))
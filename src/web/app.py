@@ -1,20 +1,31 @@
-from fastapi import FastAPI, Request, Form, BackgroundTasks, Depends
-from fastapi.responses import RedirectResponse
+from fastapi import FastAPI, Request, Form, BackgroundTasks, Depends, HTTPException
+from fastapi.responses import RedirectResponse, StreamingResponse
 from fastapi.templating import Jinja2Templates
 from fastapi.staticfiles import StaticFiles
 from sqlalchemy.orm import Session
-from typing import Optional
+from typing import Callable, Optional
+from datetime import datetime
 import os
+import json
 import threading
 import asyncio
 import time
-import concurrent.futures
 
-from src.database import init_db, get_db, get_all_interactions, Interaction, save_interaction
+from src import database
+from src.database import init_db, get_db, get_all_interactions, Interaction, save_interaction, warm_dedup_index
+from src.database import feed_query, get_feed_page, FEED_API_COLUMNS, EXPORT_COLUMNS
+from src.database import get_stats, reconcile_stats, clear_interactions as clear_all_interactions
+from src.database import get_jobs
 from src.agents.twitter_scout import twitter_scout
 from src.agents.interaction_agent import interaction_agent
 from src.utils.browser_setup import setup_twitter_login
 from src.agents.semantic_filter import semantic_filter, keyword_prefilter
+from src.utils.pacing import pacer
+from src.utils.job_queue import JobQueue
+from src.utils.discovery import topic_discovery
+from src.utils.scout_scheduler import ScoutScheduler
+from src.utils.query_planner import Demultiplexer, plan_searches
+from src.utils.tracing import tracer
 
 app = FastAPI(title="VibeBot Dashboard")
 
@@ -24,56 +35,119 @@ app.mount("/static", StaticFiles(directory="src/web/static"), name="static")
 # Templates
 templates = Jinja2Templates(directory="src/web/templates")
 
+FEED_PAGE_SIZE = 100
+AUTO_SCOUT_INTERVAL_SECONDS = int(os.getenv("AUTO_SCOUT_INTERVAL_SECONDS", "600"))
+AUTO_SCOUT_LIMIT = 10
+API_MAX_PAGE_SIZE = 500
+
 # Initialize DB on startup
 # Automatic Scheduler (Simple Thread for MVP)
+# Per-keyword adaptive polling within a global search budget (see ScoutScheduler)
+scout_scheduler = ScoutScheduler(
+    core_keywords=["build in public", "indie hacker", "saas mvp"],
+    discovery=topic_discovery,
+    searches_per_hour=int(os.getenv("AUTO_SCOUT_SEARCHES_PER_HOUR", "12")),
+    base_interval=AUTO_SCOUT_INTERVAL_SECONDS,
+    min_interval=int(os.getenv("AUTO_SCOUT_MIN_INTERVAL_SECONDS", "300")),
+    max_interval=int(os.getenv("AUTO_SCOUT_MAX_INTERVAL_SECONDS", "21600")),
+    search_limit=AUTO_SCOUT_LIMIT,
+    max_discovered=int(os.getenv("AUTO_SCOUT_DISCOVERED_TOPICS", "3"))
+)
+
 def auto_scout_loop():
-    """Runs the scout automatically every X minutes."""
+    """Queues a mission for the keywords the scheduler says are due."""
     print("Starting Auto-Scout Loop...")
     while True:
         try:
-            print("Auto-Scout: Running scheduled Twitter search...")
-            # Default query for auto-scout
-            keywords = ["build in public", "indie hacker", "saas mvp"]
-            
-            # We run them sequentially in the background thread, 
-            # but triggering run_scout_task will use the parallel executor internally if applicable.
-            for kw in keywords:
-                run_scout_task(platform="twitter", limit=10, query=kw)
-                time.sleep(60) # Sleep 1 min between keywords
-            
-            # Sleep for 10 minutes before next batch
-            print("Auto-Scout: Sleeping for 10 minutes...")
-            time.sleep(600) 
+            # Everything due goes out as one mission, which the query planner packs
+            # into as few searches as it can; queued behind any manual missions
+            due = scout_scheduler.due()
+            if due:
+                print(f"Auto-Scout: due now: {due}")
+                job_queue.submit(query=", ".join(due), limit=AUTO_SCOUT_LIMIT, source="auto")
+
+            # Wake when the next keyword comes due; re-check at least every minute
+            time.sleep(min(60.0, max(5.0, scout_scheduler.seconds_until_next())))
             
         except Exception as e:
             print(f"Auto-Scout Error: {e}")
             time.sleep(60) # Sleep a bit on error
 
+def stats_reconcile_loop():
+    """Recomputes the dashboard counters now and then, fixing any drift (e.g. rows written outside the helpers)."""
+    interval = int(os.getenv("STATS_RECONCILE_SECONDS", "900"))
+    while True:
+        try:
+            drift = reconcile_stats()
+            if drift:
+                print(f"Stats: reconciled {drift} drifted counters.")
+        except Exception as e:
+            print(f"Stats reconcile error: {e}")
+        time.sleep(interval)
+
 @app.on_event("startup")
 def on_startup():
     init_db()
+    warm_dedup_index()
+    job_queue.start()
+    # Load the semantic model in the background so the first scout run doesn't pay for it
+    if os.getenv("SEMANTIC_WARMUP", "1") == "1":
+        semantic_filter.start_warm_up()
     # Start Auto-Scout in a daemon thread
     # Note: In production, use Celery or APScheduler. 
     # For MVP/Demo, a thread is fine.
     scout_thread = threading.Thread(target=auto_scout_loop, daemon=True)
     scout_thread.start()
+    # First pass also backfills counters for archives created before they existed
+    threading.Thread(target=stats_reconcile_loop, daemon=True).start()
+
+@app.on_event("shutdown")
+def on_shutdown():
+    job_queue.stop()
+    # Close the long-lived Chromium context cleanly so the profile isn't left locked
+    twitter_scout.search_engine.shutdown()
+    twitter_scout.browser.shutdown()
+    tracer.close()
 
 @app.get("/")
 def dashboard(request: Request, db: Session = Depends(get_db)):
     interactions = get_all_interactions(limit=5)
-    # Simple stats
-    total_count = db.query(Interaction).count()
-    twitter_count = db.query(Interaction).filter(Interaction.platform == "Twitter").count()
+    # Materialized counters: constant time however large the archive is
+    counters = get_stats()
     
     return templates.TemplateResponse("dashboard.html", {
         "request": request,
         "interactions": interactions,
         "stats": {
-            "total": total_count,
-            "twitter": twitter_count
+            "total": counters.get("total", {}).get("all", 0),
+            "twitter": counters.get("platform", {}).get("Twitter", 0)
         }
     })
 
+@app.get("/api/stats")
+def api_stats():
+    """Per-platform, per-status, per-tag and per-day counters."""
+    return get_stats()
+
+@app.get("/stats/embedding-cache")
+def embedding_cache_stats():
+    """Hit/miss counters for the semantic filter's embedding cache."""
+    if not semantic_filter.cache:
+        return {"enabled": False}
+    return {"enabled": True, **semantic_filter.cache.stats()}
+
+@app.get("/stats/llm")
+def llm_stats():
+    """Reply-generation token usage, latency and prompt-cache hit ratio."""
+    return interaction_agent.usage.stats()
+
+@app.get("/stats/reply-cache")
+def reply_cache_stats():
+    """LLM calls saved by the reply cache, and the latency that saved."""
+    if not interaction_agent.reply_cache:
+        return {"enabled": False}
+    return {"enabled": True, **interaction_agent.reply_cache.stats()}
+
 @app.get("/scout")
 def scout_form(request: Request):
     return templates.TemplateResponse("scout.html", {"request": request})
@@ -95,8 +169,17 @@ def trigger_twitter_login(background_tasks: BackgroundTasks):
     
     return RedirectResponse(url="/settings?msg=Browser+Launched", status_code=303)
 
-def run_twitter_task(query: str, limit: int, auto_like: bool = False, auto_comment: bool = False):
-    """Worker function for Twitter scouting."""
+def run_twitter_task(query: str, limit: int, auto_like: bool = False, auto_comment: bool = False,
+                     cancelled: Optional[Callable[[], bool]] = None,
+                     on_result: Optional[Callable[[str, int, int], None]] = None) -> int:
+    """
+    Worker function for Twitter scouting. Returns how many posts were found.
+    on_result(keyword, found, kept) is called per keyword in discovery mode.
+    """
+    total_found = 0
+    # Searches that ran fine but had nothing newer than their watermark
+    caught_up = 0
+    searches = []
     try:
         search_queries = []
         if query.strip().lower() == "auto":
@@ -106,8 +189,6 @@ def run_twitter_task(query: str, limit: int, auto_like: bool = False, auto_comme
         
         print(f"Running Twitter Scout for queries: {search_queries} (Auto-Like={auto_like}, Auto-Comment={auto_comment})")
         
-        total_found = 0
-        
         # If Auto-Engage is ON, we use the batch_engage method which handles everything in one session
         if auto_like or auto_comment:
             # Determine tag for batch
@@ -121,32 +202,55 @@ def run_twitter_task(query: str, limit: int, auto_like: bool = False, auto_comme
                 auto_like=auto_like,
                 auto_comment=auto_comment,
                 interaction_agent=interaction_agent,
-                tag=batch_tag
+                tag=batch_tag,
+                cancelled=cancelled
             )
             total_found = processed
             print(f"Batch Engage Completed. Processed {processed} tweets.")
             
         else:
-            # Standard Discovery Mode (Fetch only)
-            for q in search_queries:
-                print(f"  [Twitter Scout] Searching for: {q}")
-                raw_posts = twitter_scout.fetch_posts(keywords=[q], limit=limit, tag=q)
+            # Standard Discovery Mode (Fetch only): keywords are packed into as few OR
+            # searches as the query limits allow, the searches run in parallel tabs,
+            # and each one's results are split back per keyword by matching the text
+            plans = {plan.query: Demultiplexer(plan) for plan in plan_searches(search_queries)}
+            searches = [
+                (q, demux.plan.keywords[0] if len(demux.plan.keywords) == 1 else demux.tag_for)
+                for q, demux in plans.items()
+            ]
+            # A merged search has to bring in enough tweets for all of its keywords
+            search_limit = limit * max(len(d.plan.keywords) for d in plans.values())
+            print(f"  [Twitter Scout] {len(search_queries)} keywords -> {len(searches)} searches")
+            for (q, _), raw_posts in twitter_scout.fetch_many(searches, limit=search_limit):
+                if cancelled and cancelled():
+                    print("  [Twitter Scout] Mission cancelled; skipping remaining results.")
+                    return total_found
+                demux = plans[q]
+                print(f"  [Twitter Scout] Results for: {', '.join(demux.plan.keywords)}")
                 total_found += len(raw_posts)
+                caught_up += raw_posts.caught_up
                 
                 # Apply Filters
-                filtered_posts = keyword_prefilter(raw_posts)
+                with tracer.span("filter.prefilter", count=len(raw_posts)):
+                    filtered_posts = keyword_prefilter(raw_posts)
+                final_posts = []
                 if filtered_posts:
-                    final_posts = semantic_filter.filter_posts(filtered_posts)
+                    with tracer.span("filter.semantic", count=len(filtered_posts)):
+                        final_posts = semantic_filter.filter_posts(filtered_posts)
                     print(f"  [Filter] {len(raw_posts)} -> {len(filtered_posts)} -> {len(final_posts)} items")
                 else:
                     print(f"  [Filter] {len(raw_posts)} -> 0 items")
-                    
-                # Small delay between queries
-                if len(search_queries) > 1:
-                    time.sleep(5)
+                # A failed search (logged out, page error) says nothing about a keyword's yield
+                if on_result and (raw_posts or raw_posts.caught_up):
+                    found_by_keyword = demux.split(raw_posts)
+                    kept_by_keyword = demux.split(final_posts)
+                    for keyword in demux.plan.keywords:
+                        on_result(keyword, len(found_by_keyword[keyword]), len(kept_by_keyword[keyword]))
 
+        # Every search came back empty only because nothing is new yet: a normal quiet cycle
+        if total_found == 0 and searches and caught_up == len(searches):
+            print("No new posts on Twitter since the last run.")
         # If no posts found on Twitter, log a System Alert
-        if total_found == 0:
+        elif total_found == 0:
             print("No posts found on Twitter. Creating System Alert.")
             try:
                 save_interaction(
@@ -164,60 +268,121 @@ def run_twitter_task(query: str, limit: int, auto_like: bool = False, auto_comme
         print("Twitter Scout Finished")
     except Exception as e:
         print(f"Twitter Scout Error: {e}")
+    return total_found
 
-def run_scout_task(platform: str, limit: int, query: str = "build in public", auto_like: bool = False, auto_comment: bool = False):
-    """Background task to run scouting in parallel."""
-    
-    # Use ThreadPoolExecutor to run tasks concurrently
-    # Twitter uses Tweepy/Playwright (blocking/sync I/O here)
-    # Threads are suitable for I/O bound tasks like this.
-    
+def run_scout_task(platform: str, limit: int, query: str = "build in public", auto_like: bool = False,
+                   auto_comment: bool = False, cancelled: Optional[Callable[[], bool]] = None,
+                   on_result: Optional[Callable[[str, int, int], None]] = None) -> int:
+    """Runs one scout mission on the calling thread (a job queue worker)."""
     print(f"Launching Scout Mission: Platform={platform}, Query={query}, Limit={limit}")
-    
-    with concurrent.futures.ThreadPoolExecutor(max_workers=2) as executor:
-        futures = []
-        
+    # Every traced step of the mission becomes a child of this span (see /perf)
+    with tracer.span("mission", query=query, limit=limit, auto_like=auto_like, auto_comment=auto_comment) as mission:
         # Always default to Twitter since Reddit is removed
-        futures.append(executor.submit(run_twitter_task, query, limit, auto_like, auto_comment))
-        
-        # Wait for all tasks to complete
-        concurrent.futures.wait(futures)
-        print("Scout Mission Completed")
+        found = run_twitter_task(query, limit, auto_like, auto_comment, cancelled=cancelled, on_result=on_result)
+        mission.set(count=found)
+    print("Scout Mission Completed")
+    return found
+
+def run_scout_job(job, context) -> int:
+    """Job queue handler: one queued mission."""
+    # Auto-scout runs feed their yield back so the scheduler can adapt each keyword's interval
+    return run_scout_task(
+        job.platform, job.limit, job.query, job.auto_like, job.auto_comment, cancelled=context.cancelled,
+        on_result=scout_scheduler.record if job.source == "auto" else None
+    )
+
+# SCOUT_WORKERS bounds how many missions run at once (the DB pool is sized from it too)
+job_queue = JobQueue(handler=run_scout_job, workers=int(os.getenv("SCOUT_WORKERS", "2")))
 
 @app.post("/scout")
 def trigger_scout(
-    background_tasks: BackgroundTasks,
     platform: str = Form(...),
     limit: int = Form(20),
     query: str = Form("auto"),
     auto_like: bool = Form(False),
     auto_comment: bool = Form(False)
 ):
-    background_tasks.add_task(run_scout_task, platform, limit, query, auto_like, auto_comment)
+    job_queue.submit(query=query, limit=limit, auto_like=auto_like, auto_comment=auto_comment, platform=platform)
     return RedirectResponse(url="/interactions", status_code=303)
 
+@app.get("/jobs")
+def jobs_page(request: Request):
+    return templates.TemplateResponse("jobs.html", {"request": request, "jobs": get_jobs(limit=100)})
+
+@app.get("/api/jobs")
+def api_jobs(limit: int = 100):
+    """Queued, running and recent scout jobs with their timing."""
+    return [_job_json(job) for job in get_jobs(limit=min(limit, API_MAX_PAGE_SIZE))]
+
+@app.get("/api/scheduler")
+def api_scheduler():
+    """Auto-scout keywords with their yield, current interval and the search budget."""
+    return scout_scheduler.stats()
+
+@app.get("/perf")
+def perf_page(request: Request, hours: float = 24):
+    return templates.TemplateResponse("perf.html", {
+        "request": request,
+        "hours": hours,
+        "stages": tracer.stage_stats(hours=hours),
+        "missions": tracer.recent_traces("mission", limit=20),
+    })
+
+@app.get("/api/perf")
+def api_perf(hours: float = 24):
+    """Per-stage span timings (p50/p95) and the latest missions' time per stage."""
+    return {
+        "hours": hours,
+        "stages": tracer.stage_stats(hours=hours),
+        "missions": tracer.recent_traces("mission", limit=20),
+    }
+
+@app.post("/jobs/{job_id}/cancel")
+def cancel_scout_job(job_id: int):
+    if job_queue.cancel(job_id) is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return RedirectResponse(url="/jobs", status_code=303)
+
+def _job_json(job) -> dict:
+    def seconds(start, end):
+        return round((end - start).total_seconds(), 1) if start and end else None
+
+    return {
+        "id": job.id,
+        "query": job.query,
+        "limit": job.limit,
+        "auto_like": job.auto_like,
+        "auto_comment": job.auto_comment,
+        "source": job.source,
+        "priority": job.priority,
+        "status": job.status,
+        "coalesced": job.coalesced,
+        "cancel_requested": job.cancel_requested,
+        "result_count": job.result_count,
+        "error": job.error,
+        "created_at": job.created_at.isoformat() if job.created_at else None,
+        "wait_seconds": seconds(job.created_at, job.started_at),
+        "run_seconds": seconds(job.started_at, job.finished_at),
+    }
+
 @app.post("/interactions/clear")
-def clear_interactions(db: Session = Depends(get_db)):
+def clear_interactions():
     """Clears all interactions from the database."""
     try:
-        # Delete all rows
-        db.query(Interaction).delete()
-        db.commit()
+        # Delete all rows (and their counters)
+        clear_all_interactions()
         print("Database cleared.")
     except Exception as e:
         print(f"Error clearing database: {e}")
-        db.rollback()
         
     return RedirectResponse(url="/interactions", status_code=303)
 
 @app.get("/interactions")
-def list_interactions(request: Request, platform: Optional[str] = None, db: Session = Depends(get_db)):
-    query = db.query(Interaction).order_by(Interaction.created_at.desc())
-    
-    if platform:
-        query = query.filter(Interaction.platform == platform)
-        
-    interactions = query.limit(100).all()
+def list_interactions(request: Request, platform: Optional[str] = None, cursor: Optional[str] = None, db: Session = Depends(get_db)):
+    try:
+        interactions, next_cursor = get_feed_page(db, platform=platform, cursor=cursor, limit=FEED_PAGE_SIZE)
+    except ValueError:
+        return RedirectResponse(url="/interactions", status_code=303)
     
     # Group by tag
     grouped_interactions = {}
@@ -234,16 +399,60 @@ def list_interactions(request: Request, platform: Optional[str] = None, db: Sess
         "request": request, 
         "grouped_interactions": grouped_interactions,
         "interactions": interactions, # Keep flat list if needed for fallback
-        "current_filter": platform
+        "current_filter": platform,
+        "next_cursor": next_cursor
     })
 
+def _row_to_dict(row) -> dict:
+    return {
+        key: value.isoformat() if isinstance(value, datetime) else value
+        for key, value in row._mapping.items()
+    }
+
+@app.get("/api/interactions")
+def api_interactions(platform: Optional[str] = None, cursor: Optional[str] = None, limit: int = FEED_PAGE_SIZE, db: Session = Depends(get_db)):
+    """JSON feed page. Pass `next_cursor` back as `cursor` to get the next (older) page."""
+    limit = max(1, min(limit, API_MAX_PAGE_SIZE))
+    try:
+        rows = feed_query(db, *FEED_API_COLUMNS, platform=platform, cursor=cursor).limit(limit + 1).all()
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    page = rows[:limit]
+    next_cursor = database.encode_cursor(page[-1].created_at, page[-1].id) if len(rows) > limit else None
+    return {"items": [_row_to_dict(r) for r in page], "next_cursor": next_cursor}
+
+@app.get("/api/interactions/export.ndjson")
+def export_interactions(platform: Optional[str] = None):
+    """Streams the whole archive as NDJSON, one row at a time, so memory stays flat."""
+    def generate():
+        # Own session: the request's session would be closed before streaming finishes
+        session = database.SessionLocal()
+        try:
+            query = feed_query(session, *EXPORT_COLUMNS, platform=platform).execution_options(yield_per=1000)
+            for row in query:
+                yield json.dumps(_row_to_dict(row)) + "\n"
+        finally:
+            session.close()
+
+    return StreamingResponse(
+        generate(),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": 'attachment; filename="interactions.ndjson"'}
+    )
+
 @app.post("/interactions/{interaction_id}/like")
 def like_interaction(interaction_id: int, db: Session = Depends(get_db)):
     interaction = db.query(Interaction).filter(Interaction.id == interaction_id).first()
     if interaction:
         success = False
+        # Web threads never wait on the pacer: take every token the like needs up front, or say so and return
+        wait = pacer.try_reserve("navigate", "like")
+        if wait:
+            print(f"Like rate-limited; try again in {wait:.0f}s.")
+            return RedirectResponse(url="/interactions", status_code=303)
         if interaction.platform == "Twitter":
-            success = twitter_scout.like_post(interaction.external_post_id)
+            success = twitter_scout.like_post(interaction.external_post_id, paced=False)
         
         if success:
             pass
@@ -256,9 +465,14 @@ def comment_interaction(interaction_id: int, db: Session = Depends(get_db)):
     if not interaction:
         return RedirectResponse(url="/interactions", status_code=303)
 
-    context_posts = get_all_interactions(limit=10)
+    # Take the navigate/like/reply tokens before spending an LLM call on a reply we can't post yet
+    wait = pacer.try_reserve("navigate", "like", "reply")
+    if wait:
+        print(f"Reply rate-limited; try again in {wait:.0f}s.")
+        return RedirectResponse(url="/interactions", status_code=303)
 
-    generated_comment = interaction_agent.generate_comment(interaction, context_posts)
+    # The agent keeps its own cached style history of recent posted replies
+    generated_comment = interaction_agent.generate_comment(interaction)
     
     if not generated_comment:
         print("Failed to generate comment.")
@@ -268,12 +482,16 @@ def comment_interaction(interaction_id: int, db: Session = Depends(get_db)):
     
     success = False
     if interaction.platform == "Twitter":
-        twitter_scout.like_post(interaction.external_post_id)
-        success = twitter_scout.comment_post(interaction.external_post_id, generated_comment)
+        twitter_scout.like_post(interaction.external_post_id, paced=False)
+        success = twitter_scout.comment_post(interaction.external_post_id, generated_comment, paced=False)
 
     if success:
-        interaction.bot_comment = generated_comment
-        interaction.status = "POSTED"
-        db.commit()
+        save_interaction(
+            platform=interaction.platform,
+            external_post_id=interaction.external_post_id,
+            post_content=interaction.post_content,
+            status="POSTED",
+            bot_comment=generated_comment
+        )
 
     return RedirectResponse(url="/interactions", status_code=303)
@@ -4,11 +4,19 @@ import pytest
 from unittest.mock import MagicMock, patch
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+# Run scout actions without account-safety delays
+os.environ.setdefault("PACING", "off")
+# Tests that need spans build their own Tracer; the shared one stays quiet
+os.environ.setdefault("TRACING", "0")
+# The shared agent's reply cache would read the real vibebot.db; cache tests build their own
+os.environ.setdefault("REPLY_CACHE_TTL_HOURS", "0")
 
 # Add src to path
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from src.database import Base
+from src.database import Base, dedup_index
 
 # Use in-memory SQLite for tests
 TEST_DATABASE_URL = "sqlite:///:memory:"
@@ -19,7 +27,12 @@ def db_session():
     Creates a fresh in-memory database for each test.
     Patches src.database.SessionLocal to use this session.
     """
-    engine = create_engine(TEST_DATABASE_URL)
+    # StaticPool + check_same_thread=False so TestClient's request threads see the same in-memory DB
+    engine = create_engine(
+        TEST_DATABASE_URL,
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool
+    )
     Base.metadata.create_all(engine)
     Session = sessionmaker(bind=engine)
     session = Session()
@@ -38,10 +51,15 @@ def db_session():
     # Let's try patching the engine first, but src.database creates engine at module level.
     # So we patch the objects in src.database.
     
+    # The dedup index is process-wide; start every test cold so it never leaks ids between databases
+    dedup_index.reset()
+
     with patch("src.database.engine", engine), \
          patch("src.database.SessionLocal", Session):
         yield session
 
+    dedup_index.reset()
+
     # Teardown
     session.close()
     Base.metadata.drop_all(engine)
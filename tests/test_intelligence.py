@@ -1,6 +1,7 @@
 import pytest
 import os
 from unittest.mock import MagicMock, patch
+from src.agents.async_twitter_scout import SearchResult
 from src.agents.interaction_agent import InteractionAgent
 from src.database import Interaction
 import src.web.app
@@ -36,29 +37,53 @@ def test_generate_comment_anthropic(mock_anthropic):
     assert call_args['model'] == "claude-3-5-sonnet-20241022"
     assert "Just shipped my MVP!" in call_args['messages'][0]['content']
 
-@patch('src.web.app.twitter_scout.fetch_posts')
+@patch('src.web.app.twitter_scout.fetch_many')
 def test_auto_pilot_multiple_keywords(mock_fetch):
-    """Test that query='auto' triggers multiple searches."""
-    # Setup Mock
-    mock_fetch.return_value = []
+    """Test that query='auto' packs its keywords into one merged search."""
+    # Setup Mock: every search comes back empty
+    mock_fetch.side_effect = lambda searches, limit: iter([(spec, SearchResult(caught_up=True)) for spec in searches])
     
     # Run logic directly (simulating the task)
     src.web.app.run_scout_task("twitter", 5, "auto")
     
-    # Verify multiple calls
-    assert mock_fetch.call_count >= 3 # We have 4 keywords in auto list
-    
-    # Check some calls
-    # mock_calls structure is (name, args, kwargs)
-    # We want the 'keywords' kwarg from call_args
+    # All auto keywords go out together as a single OR search
+    mock_fetch.assert_called_once()
+    searches = mock_fetch.call_args[0][0]
+    assert len(searches) == 1
+    query, tag_for = searches[0]
+    assert '"build in public"' in query and '"indie hacker"' in query
+    # The limit covers every keyword in the merged search
+    assert mock_fetch.call_args[1]['limit'] == 5 * 6
     
-    # Get list of keywords passed in each call
-    keywords_searched = []
-    for call in mock_fetch.mock_calls:
-        # call is tuple: (name, args, kwargs) or just call object
-        # call.kwargs should exist
-        if 'keywords' in call.kwargs:
-            keywords_searched.extend(call.kwargs['keywords'])
-            
-    assert "build in public" in keywords_searched
-    assert "indie hacker" in keywords_searched
+    # Each tweet is tagged with the keyword it mentions
+    assert tag_for({"text": "Day 30 of building... indie hacker life"}) == "indie hacker"
+    assert tag_for({"text": "Shipping my saas mvp today"}) == "saas mvp"
+
+
+@pytest.mark.parametrize("caught_up, alerts", [(True, 0), (False, 1)])
+def test_empty_scout_alerts_only_when_search_failed(db_session, caught_up, alerts):
+    """Nothing newer than the watermark is a quiet cycle; finding nothing at all raises an alert."""
+    with patch('src.web.app.twitter_scout.fetch_many') as mock_fetch:
+        mock_fetch.side_effect = lambda searches, limit: iter([(spec, SearchResult(caught_up=caught_up)) for spec in searches])
+        assert src.web.app.run_twitter_task("saas mvp, indie hacker", 5) == 0
+
+    assert db_session.query(Interaction).filter_by(platform="System", status="ERROR").count() == alerts
+
+
+def test_failed_search_is_not_fed_back_to_the_scheduler(db_session):
+    """A failed search leaves each keyword's interval and run count as they were."""
+    from src.utils.scout_scheduler import ScoutScheduler
+    scheduler = ScoutScheduler(["saas mvp", "indie hacker"], base_interval=600, max_discovered=0)
+    scheduler.due()
+
+    with patch('src.web.app.twitter_scout.fetch_many') as mock_fetch:
+        mock_fetch.side_effect = lambda searches, limit: iter([(spec, SearchResult()) for spec in searches])
+        src.web.app.run_twitter_task("saas mvp, indie hacker", 5, on_result=scheduler.record)
+        keywords = {k["keyword"]: k for k in scheduler.stats()["keywords"]}
+        assert [(k["runs"], k["interval_seconds"]) for k in keywords.values()] == [(0, 600), (0, 600)]
+
+        # Caught up is a real (empty) run: it counts and backs off
+        mock_fetch.side_effect = lambda searches, limit: iter([(spec, SearchResult(caught_up=True)) for spec in searches])
+        src.web.app.run_twitter_task("saas mvp, indie hacker", 5, on_result=scheduler.record)
+        keywords = {k["keyword"]: k for k in scheduler.stats()["keywords"]}
+        assert [(k["runs"], k["interval_seconds"]) for k in keywords.values()] == [(1, 1200), (1, 1200)]
@@ -0,0 +1,269 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+from unittest.mock import patch
+from src.agents import interaction_agent as agent_module
+from src.agents.interaction_agent import SYSTEM_PROMPT, InteractionAgent
+from src.database import Interaction, get_recent_replies, save_interaction
+
+
+def _message(text, usage=None):
+    return {
+        "id": "msg_1", "type": "message", "role": "assistant", "model": "claude-3-haiku-20240307",
+        "content": [{"type": "text", "text": text}], "stop_reason": "end_turn", "stop_sequence": None,
+        "usage": usage or {"input_tokens": 10, "output_tokens": 5}
+    }
+
+
+def _usage(server, body):
+    """Mimics prompt caching: the system prefix is written once, then read."""
+    cached = json.dumps(body.get("system") or [])
+    with server.lock:
+        hit = cached in server.cached_prefixes
+        server.cached_prefixes.add(cached)
+    size = len(cached) // 4
+    return {
+        "input_tokens": 20, "output_tokens": 5,
+        "cache_creation_input_tokens": 0 if hit else size,
+        "cache_read_input_tokens": size if hit else 0
+    }
+
+
+def _batch(server, status):
+    return {
+        "id": "msgbatch_1", "type": "message_batch", "processing_status": status,
+        "request_counts": {"processing": 0, "succeeded": len(server.batch_requests), "errored": 0, "canceled": 0, "expired": 0},
+        "created_at": "2026-10-18T00:00:00Z", "expires_at": "2026-10-19T00:00:00Z",
+        "ended_at": "2026-10-18T00:05:00Z" if status == "ended" else None,
+        "cancel_initiated_at": None, "archived_at": None,
+        "results_url": f"{server.base_url}/v1/messages/batches/msgbatch_1/results" if status == "ended" else None
+    }
+
+
+class FakeAnthropicHandler(BaseHTTPRequestHandler):
+    """Just enough of the Messages and Message Batches API for the agent."""
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, status, body, headers=None):
+        payload = body if isinstance(body, bytes) else json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_POST(self):
+        server = self.server
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        path = self.path.split("?")[0]
+
+        if path == "/v1/messages/batches":
+            server.batch_requests = body["requests"]
+            return self._send(200, _batch(server, "in_progress"))
+
+        server.requests.append(body)
+        prompt = body["messages"][0]["content"]
+        post = prompt.split('TARGET POST:\n"', 1)[1].split('"', 1)[0]
+        with server.lock:
+            server.calls.append(post)
+            server.in_flight += 1
+            server.peak = max(server.peak, server.in_flight)
+            failures = server.failures.get(post, [])
+            failure = failures.pop(0) if failures else None
+        try:
+            if failure == "slow":
+                time.sleep(1.0)
+            elif failure:
+                return self._send(failure, {"type": "error", "error": {"type": "overloaded_error", "message": "busy"}},
+                                  headers={"retry-after": "0"} if failure == 429 else None)
+            time.sleep(server.latency)
+            # Quoted, with a leading hyphen, so post-processing is exercised
+            self._send(200, _message(f'"- re: {post}"', _usage(server, body)))
+        finally:
+            with server.lock:
+                server.in_flight -= 1
+
+    def do_GET(self):
+        server = self.server
+        path = self.path.split("?")[0]
+        if path == "/v1/messages/batches/msgbatch_1":
+            return self._send(200, _batch(server, server.batch_status))
+        if path == "/v1/messages/batches/msgbatch_1/results":
+            lines = []
+            for req in server.batch_requests:
+                post = req["params"]["messages"][0]["content"].split('TARGET POST:\n"', 1)[1].split('"', 1)[0]
+                lines.append(json.dumps({"custom_id": req["custom_id"], "result": {"type": "succeeded", "message": _message(f"draft for {post}")}}))
+            return self._send(200, ("\n".join(lines) + "\n").encode())
+        self._send(404, {"type": "error", "error": {"type": "not_found_error", "message": self.path}})
+
+
+@pytest.fixture
+def fake_anthropic():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeAnthropicHandler)
+    server.base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    server.lock = threading.Lock()
+    server.calls, server.failures, server.requests = [], {}, []
+    server.cached_prefixes = set()
+    server.in_flight = server.peak = 0
+    server.latency = 0.05
+    server.batch_requests, server.batch_status = [], "ended"
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def _agent(server, **overrides):
+    agent = InteractionAgent(api_key="sk-test", base_url=server.base_url)
+    agent.backoff_base = 0.01
+    for k, v in overrides.items():
+        setattr(agent, k, v)
+    return agent
+
+
+def _targets(*texts):
+    return [Interaction(platform="Twitter", external_post_id=f"id{i}", post_content=t, tag="bip") for i, t in enumerate(texts)]
+
+
+def test_batch_keeps_input_order_and_bounds_concurrency(fake_anthropic):
+    agent = _agent(fake_anthropic, concurrency=3)
+    texts = [f"post number {i}" for i in range(10)]
+    # Make early posts slow so completions arrive out of order
+    fake_anthropic.failures = {"post number 0": ["slow"], "post number 1": ["slow"]}
+
+    replies = agent.generate_comments_batch(_targets(*texts), context=[])
+
+    assert replies == [f"re: {t}" for t in texts]
+    assert fake_anthropic.peak == 3
+
+
+def test_batch_retries_rate_limits_and_overload(fake_anthropic):
+    agent = _agent(fake_anthropic)
+    fake_anthropic.failures = {"flaky": [429, 529, 500]}
+
+    replies = agent.generate_comments_batch(_targets("flaky", "fine"), context=[])
+
+    assert replies == ["re: flaky", "re: fine"]
+    assert fake_anthropic.calls.count("flaky") == 4
+
+
+def test_batch_gives_up_on_timeouts_and_client_errors(fake_anthropic):
+    agent = _agent(fake_anthropic, request_timeout=0.3, max_retries=1)
+    fake_anthropic.failures = {"hangs": ["slow", "slow"], "bad": [400]}
+
+    start = time.perf_counter()
+    replies = agent.generate_comments_batch(_targets("hangs", "bad", "ok"), context=[])
+
+    assert replies == [None, None, "re: ok"]
+    # 400s aren't retried; timeouts are, up to max_retries
+    assert fake_anthropic.calls.count("bad") == 1
+    assert fake_anthropic.calls.count("hangs") == 2
+    assert time.perf_counter() - start < 2.5
+
+
+def test_draft_backlog_through_message_batches(fake_anthropic, db_session):
+    db_session.add_all([
+        Interaction(platform="Twitter", external_post_id="a1", post_content="shipping my app", status="ARCHIVED", tag="bip"),
+        Interaction(platform="Twitter", external_post_id="a2", post_content="day 3 of building", status="ARCHIVED", tag="bip"),
+        Interaction(platform="Twitter", external_post_id="b1", post_content="other tag", status="ARCHIVED", tag="saas"),
+        Interaction(platform="Twitter", external_post_id="p1", post_content="done", status="POSTED", tag="bip", bot_comment="hi"),
+    ])
+    db_session.commit()
+    agent = _agent(fake_anthropic)
+
+    batch_id = agent.submit_draft_batch(tag="bip")
+    assert batch_id == "msgbatch_1"
+    assert sorted(r["custom_id"] for r in fake_anthropic.batch_requests) == ["draft-a1", "draft-a2"]
+
+    fake_anthropic.batch_status = "in_progress"
+    assert agent.collect_draft_batch(batch_id) is None
+
+    fake_anthropic.batch_status = "ended"
+    assert agent.collect_draft_batch(batch_id) == 2
+
+    db_session.expire_all()
+    drafted = db_session.query(Interaction).filter_by(external_post_id="a1").one()
+    assert drafted.status == "PLANNED"
+    assert drafted.bot_comment == "draft for shipping my app"
+    assert drafted.post_content == "shipping my app"
+
+
+def test_prompt_caches_guidelines_and_style_history(fake_anthropic, db_session):
+    save_interaction("Twitter", "old1", "my first launch", status="POSTED", bot_comment="congrats, what stack?")
+    agent = _agent(fake_anthropic)
+    agent.history.refresh_every = 2
+
+    with patch.object(agent_module, "get_recent_replies", wraps=get_recent_replies) as history_query:
+        for text in ("first", "second", "third"):
+            assert agent.generate_comment(Interaction(platform="Twitter", external_post_id=text, post_content=text)) == f"re: {text}"
+        # History is rendered once and survives a single new post...
+        save_interaction("Twitter", "old2", "shipped v2", status="POSTED", bot_comment="v2 looks slick")
+        agent.generate_comment(Interaction(platform="Twitter", external_post_id="fourth", post_content="fourth"))
+        assert history_query.call_count == 1
+
+        # ...and is re-rendered once refresh_every replies have gone out
+        save_interaction("Twitter", "old3", "launched on ph", status="POSTED", bot_comment="ph day is brutal")
+        agent.generate_comment(Interaction(platform="Twitter", external_post_id="fifth", post_content="fifth"))
+        assert history_query.call_count == 2
+
+    first, last = fake_anthropic.requests[0], fake_anthropic.requests[-1]
+    assert first["system"][0] == {"type": "text", "text": SYSTEM_PROMPT, "cache_control": {"type": "ephemeral"}}
+    assert first["system"][1]["cache_control"] == {"type": "ephemeral"}
+    assert "congrats, what stack?" in first["system"][1]["text"]
+    assert fake_anthropic.requests[3]["system"] == first["system"]
+    assert "ph day is brutal" in last["system"][1]["text"]
+    # Only the tweet itself goes out as fresh input
+    assert "GUIDELINES" not in first["messages"][0]["content"]
+    assert "TARGET POST" in first["messages"][0]["content"]
+
+    stats = agent.usage.stats()
+    assert stats["requests"] == 5
+    assert stats["cache_read_tokens"] > 0 and stats["cache_write_tokens"] > 0
+    # Two prefixes written (old and new history), three read back
+    assert 0.4 < stats["cache_hit_ratio"] < 0.7
+    assert stats["avg_latency_ms"] is not None
+
+
+def test_draft_backlog_command_line(fake_anthropic, db_session):
+    from src.utils import draft_backlog
+    db_session.add_all([
+        Interaction(platform="Twitter", external_post_id="a1", post_content="shipping my app", status="ARCHIVED", tag="bip"),
+        Interaction(platform="Twitter", external_post_id="b1", post_content="other tag", status="ARCHIVED", tag="saas"),
+    ])
+    db_session.commit()
+
+    with patch.object(draft_backlog, "interaction_agent", _agent(fake_anthropic)):
+        assert draft_backlog.main(["submit", "--tag", "bip"]) == 0
+        fake_anthropic.batch_status = "in_progress"
+        assert draft_backlog.main(["collect", "msgbatch_1"]) == 2
+        fake_anthropic.batch_status = "ended"
+        assert draft_backlog.main(["collect", "msgbatch_1"]) == 0
+        # The rest of the backlog right away, without the Batches API
+        assert draft_backlog.main(["generate"]) == 0
+
+    db_session.expire_all()
+    drafts = {i.external_post_id: (i.status, i.bot_comment) for i in db_session.query(Interaction)}
+    assert drafts == {"a1": ("PLANNED", "draft for shipping my app"), "b1": ("PLANNED", "re: other tag")}
+
+
+def test_requests_put_cached_blocks_first_in_a_stable_order(db_session):
+    save_interaction("Twitter", "old1", "my first launch", status="POSTED", bot_comment="congrats, what stack?")
+    agent = InteractionAgent(api_key="sk-test")
+    history = agent.history.block()
+
+    params = [agent._request_params(t, history) for t in _targets("shipping v1", "day 40 of building")]
+
+    # Byte-identical system blocks for every tweet: guidelines, then history, both cache breakpoints
+    assert json.dumps(params[0]["system"]) == json.dumps(params[1]["system"])
+    assert [b["text"] for b in params[0]["system"]] == [SYSTEM_PROMPT, history]
+    assert all(b["cache_control"] == {"type": "ephemeral"} for b in params[0]["system"])
+    assert list(params[0]) == ["model", "max_tokens", "system", "messages"]
+    assert "shipping v1" in params[0]["messages"][0]["content"]
+    assert "shipping v1" not in json.dumps(params[0]["system"])
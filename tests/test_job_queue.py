@@ -0,0 +1,137 @@
+import threading
+import time
+from unittest.mock import patch
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from datetime import datetime, timedelta
+from src.database import Base, ScoutJob, finish_job
+from src.utils.job_queue import PRIORITY_AUTO, PRIORITY_MANUAL, JobQueue
+
+
+def _statuses(db_session):
+    db_session.expire_all()
+    return {job.query: job.status for job in db_session.query(ScoutJob)}
+
+
+def test_manual_jobs_run_before_auto_and_duplicates_merge(db_session):
+    ran = []
+    queue = JobQueue(handler=lambda job, ctx: ran.append(job.query) or 3)
+
+    queue.submit("indie hacker", 10, source="auto")
+    auto_id = queue.submit("saas mvp", 10, source="auto")
+    # Same mission again before it ran, this time by hand: merged and promoted
+    assert queue.submit("SaaS MVP", 10) == auto_id
+    queue.submit("vibe coding", 10)
+
+    while queue.run_next():
+        pass
+
+    assert ran == ["saas mvp", "vibe coding", "indie hacker"]
+    merged = db_session.get(ScoutJob, auto_id)
+    assert (merged.coalesced, merged.priority, merged.source) == (1, PRIORITY_MANUAL, "auto")
+    assert merged.status == "DONE" and merged.result_count == 3
+    assert merged.started_at >= merged.created_at and merged.finished_at >= merged.started_at
+    # A different limit or engage mode is a different mission
+    assert queue.submit("saas mvp", 10, auto_comment=True) != auto_id
+
+
+def test_cancel_and_failure(db_session):
+    def handler(job, ctx):
+        if job.query == "boom":
+            raise RuntimeError("browser crashed")
+        if job.query == "long":
+            queue.cancel(job.id)  # as if from the /jobs page while running
+            assert ctx.cancelled()
+            return 1
+        return 0
+
+    queue = JobQueue(handler=handler)
+    pending = queue.submit("never runs", 10)
+    queue.submit("long", 10)
+    queue.submit("boom", 10)
+    assert queue.cancel(pending) == "CANCELLED"
+    assert queue.cancel(999) is None
+
+    while queue.run_next():
+        pass
+
+    assert _statuses(db_session) == {"never runs": "CANCELLED", "long": "CANCELLED", "boom": "FAILED"}
+    assert db_session.query(ScoutJob).filter_by(query="long").one().result_count == 1
+    assert db_session.query(ScoutJob).filter_by(query="boom").one().error == "browser crashed"
+
+
+def test_worker_pool_is_bounded_and_survives_restart(tmp_path):
+    # A file database, so worker threads get their own connections
+    engine = create_engine(f"sqlite:///{tmp_path / 'jobs.db'}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine)
+
+    lock = threading.Lock()
+    running = {"now": 0, "peak": 0}
+
+    def handler(job, ctx):
+        with lock:
+            running["now"] += 1
+            running["peak"] = max(running["peak"], running["now"])
+        time.sleep(0.1)
+        with lock:
+            running["now"] -= 1
+        return 1
+
+    with patch("src.database.engine", engine), patch("src.database.SessionLocal", Session):
+        # Left RUNNING by a process that died mid-mission
+        session = Session()
+        session.add(ScoutJob(query="interrupted", limit=5, status="RUNNING", priority=PRIORITY_AUTO))
+        session.commit()
+
+        queue = JobQueue(handler=handler, workers=2, poll_seconds=0.05)
+        for i in range(5):
+            queue.submit(f"kw {i}", 10)
+        queue.start()
+        try:
+            deadline = time.time() + 10
+            while time.time() < deadline:
+                session.expire_all()
+                if session.query(ScoutJob).filter(ScoutJob.status != "DONE").count() == 0:
+                    break
+                time.sleep(0.05)
+        finally:
+            queue.stop()
+
+        assert session.query(ScoutJob).filter_by(status="DONE").count() == 6
+        assert running["peak"] == 2
+        session.close()
+
+
+def test_cancel_after_the_last_check_still_finishes_done(db_session):
+    def handler(job, ctx):
+        assert not ctx.cancelled()
+        queue.cancel(job.id)  # too late: the handler already did all its work
+        return 4
+
+    queue = JobQueue(handler=handler)
+    queue.submit("quick", 10)
+    queue.run_next()
+
+    assert _statuses(db_session) == {"quick": "DONE"}
+
+
+def test_only_jobs_with_a_lapsed_lease_are_requeued(db_session):
+    now = datetime.utcnow()
+    db_session.add_all([
+        ScoutJob(query="sibling", limit=5, status="RUNNING", worker_id="other:1:a", heartbeat_at=now - timedelta(seconds=10)),
+        ScoutJob(query="crashed", limit=5, status="RUNNING", worker_id="other:2:b", heartbeat_at=now - timedelta(minutes=10)),
+    ])
+    db_session.commit()
+
+    queue = JobQueue(handler=lambda job, ctx: 0, lease_seconds=60)
+    assert queue.requeue_stale() == 1
+    assert _statuses(db_session) == {"sibling": "RUNNING", "crashed": "PENDING"}
+
+    # The requeued job is claimed under this queue's id; the dead owner can't finish it any more
+    assert queue.run_next()
+    finish_job(db_session.query(ScoutJob).filter_by(query="crashed").one().id, "FAILED", worker_id="other:2:b")
+    db_session.expire_all()
+    crashed = db_session.query(ScoutJob).filter_by(query="crashed").one()
+    assert (crashed.status, crashed.worker_id) == ("DONE", queue.worker_id)
+    assert _statuses(db_session)["sibling"] == "RUNNING"
@@ -0,0 +1,105 @@
+import asyncio
+import pytest
+from src.utils.pacing import Pace, Pacer
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+        self.slept = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.slept.append(seconds)
+        self.now += seconds
+
+
+def _pacer(clock, **paces):
+    return Pacer(paces=paces, clock=clock, sleep=clock.sleep)
+
+
+def test_burst_then_min_spacing():
+    clock = FakeClock()
+    pacer = _pacer(clock, like=Pace(min_interval=10, burst=2))
+
+    # A full bucket lets the burst through immediately
+    assert pacer.reserve("like") == 0
+    assert pacer.reserve("like") == 0
+    # Then callers queue one interval apart instead of bunching
+    assert pacer.reserve("like") == 10
+    assert pacer.reserve("like") == 20
+
+
+def test_never_waits_longer_than_required():
+    clock = FakeClock()
+    pacer = _pacer(clock, reply=Pace(min_interval=15))
+
+    assert pacer.wait("reply") == 0
+    clock.now += 11
+    assert pacer.wait("reply") == pytest.approx(4)
+    assert clock.slept == [pytest.approx(4)]
+
+    # After a long idle spell the bucket is full again, but only up to burst
+    clock.now += 1000
+    assert pacer.wait("reply") == 0
+    assert pacer.delay("reply") == 15
+
+
+def test_delay_peeks_without_taking_a_token():
+    clock = FakeClock()
+    pacer = _pacer(clock, search=Pace(min_interval=10))
+
+    assert pacer.delay("search") == 0
+    assert pacer.delay("search") == 0
+    pacer.reserve("search")
+    assert pacer.delay("search") == 10
+
+
+def test_try_reserve_takes_all_tokens_or_none():
+    clock = FakeClock()
+    pacer = _pacer(clock, navigate=Pace(min_interval=3, burst=2), like=Pace(min_interval=10))
+
+    assert pacer.try_reserve("navigate", "like") == 0
+    # The like bucket is empty: nothing is taken, not even the free navigate token
+    assert pacer.try_reserve("navigate", "like") == 10
+    assert pacer.delay("navigate") == 0
+    assert pacer.reserve("navigate") == 0
+
+    clock.now += 10
+    assert pacer.try_reserve("navigate", "like") == 0
+    assert clock.slept == []
+
+
+def test_buckets_are_per_action_and_jitter_only_when_throttled():
+    clock = FakeClock()
+    pacer = _pacer(clock, like=Pace(min_interval=5, jitter=2), navigate=Pace(min_interval=3))
+
+    assert pacer.reserve("like") == 0
+    assert pacer.reserve("navigate") == 0
+    throttled = pacer.reserve("like")
+    assert 5 <= throttled <= 7
+
+    stats = pacer.stats()
+    assert stats["like"]["actions"] == 2
+    assert stats["like"]["throttled"] == 1
+    assert stats["navigate"]["throttled"] == 0
+
+
+def test_disabled_and_async():
+    clock = FakeClock()
+    pacer = Pacer(paces={"like": Pace(min_interval=60)}, enabled=False, clock=clock, sleep=clock.sleep)
+    assert [pacer.wait("like") for _ in range(5)] == [0] * 5
+    assert clock.slept == []
+
+    # Unknown actions are never limited
+    assert Pacer(paces={}).reserve("anything") == 0
+
+    pacer = Pacer(paces={"search": Pace(min_interval=0.05)})
+    waited = asyncio.run(_twice(pacer))
+    assert waited[0] == 0 and 0 < waited[1] <= 0.05
+
+
+async def _twice(pacer):
+    return [await pacer.wait_async("search"), await pacer.wait_async("search")]
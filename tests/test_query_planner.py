@@ -0,0 +1,39 @@
+from src.utils.query_planner import Demultiplexer, plan_searches, split_terms
+
+
+def test_plans_pack_keywords_within_limits():
+    keywords = ["build in public", "vibe coding", "indie hacker", "saas mvp", "startup", "side project"]
+    plans = plan_searches(keywords)
+    assert len(plans) == 1
+    assert plans[0].keywords == keywords
+    assert plans[0].query == '"build in public" OR "vibe coding" OR "indie hacker" OR "saas mvp" OR "startup" OR "side project"'
+
+    # Duplicates (any case) are searched once
+    assert plan_searches(["Startup", "startup"] + keywords)[0].query.lower().count("startup") == 1
+
+    small = plan_searches(keywords, max_chars=40, max_terms=3)
+    assert sorted(k for p in small for k in p.keywords) == sorted(keywords)
+    assert all(len(p.query) <= 40 and len(p.keywords) <= 3 for p in small)
+    assert len(small) == 3
+
+
+def test_split_terms():
+    assert split_terms('"saas" OR "indie hacker"') == ['"saas"', '"indie hacker"']
+    assert split_terms('"saas"') == ['"saas"']
+    assert split_terms('saas OR indie lang:en') == ['saas OR indie lang:en']
+
+
+def test_demultiplex_by_text():
+    plan = plan_searches(["saas mvp", "indie hacker", "startup"])[0]
+    demux = Demultiplexer(plan)
+    posts = [
+        {"id": "1", "text": "My SaaS MVP is live"},
+        {"id": "2", "text": "indie hacker startup update"},
+        {"id": "3", "text": "check this out https://t.co/x", "handle": "@startupguy"},
+        {"id": "4", "text": "no visible keyword"},
+    ]
+    groups = demux.split(posts)
+    assert [p["id"] for p in groups["saas mvp"]] == ["1", "4"]
+    assert [p["id"] for p in groups["indie hacker"]] == ["2"]
+    assert [p["id"] for p in groups["startup"]] == ["2", "3"]
+    assert demux.tag_for(posts[1]) == "indie hacker"
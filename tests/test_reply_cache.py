@@ -0,0 +1,86 @@
+from datetime import datetime, timedelta
+from unittest.mock import MagicMock
+from src.agents.interaction_agent import InteractionAgent
+from src.database import Interaction, ReplyCacheEntry
+from src.utils.reply_cache import ReplyCache, hamming, normalize, simhash
+
+LAUNCH = "Just launched my AI-powered todo app after 6 months of building in public, would love feedback"
+
+
+def test_fingerprints_ignore_links_and_retweet_prefix():
+    assert normalize(f"RT @maker: {LAUNCH}  https://t.co/abc") == normalize(LAUNCH)
+    assert hamming(simhash(LAUNCH), simhash(LAUNCH + " today")) <= 6
+    assert hamming(simhash(LAUNCH), simhash("Hiring a senior backend engineer in Berlin, remote friendly, DM me")) > 6
+
+
+def _agent(near_policy="skip"):
+    agent = InteractionAgent(api_key="sk-test")
+    agent.reply_cache = ReplyCache(agent.model, ttl_seconds=3600, near_policy=near_policy)
+    agent.client = MagicMock()
+    replies = iter(["congrats! what was the hardest part?", "berlin is great for that"])
+    def create(**params):
+        response = MagicMock()
+        response.content = [MagicMock(text=next(replies))]
+        return response
+    agent.client.messages.create.side_effect = create
+    return agent
+
+
+def _post(post_id, text, tag="bip"):
+    return Interaction(platform="Twitter", external_post_id=post_id, post_content=text, tag=tag)
+
+
+def test_agent_reuses_replies_for_retries_and_duplicates(db_session):
+    agent = _agent(near_policy="reuse")
+
+    first = agent.generate_comment(_post("a", LAUNCH))
+    # Posting failed and auto-pilot runs again: no second LLM call
+    assert agent.generate_comment(_post("a", LAUNCH)) == first
+    # Copypasta of the same launch from another account
+    assert agent.generate_comment(_post("b", f"RT @maker: {LAUNCH} today")) == first
+    assert agent.generate_comment(_post("c", "Hiring a senior backend engineer in Berlin, remote friendly, DM me")) == "berlin is great for that"
+
+    assert agent.client.messages.create.call_count == 2
+    stats = agent.reply_cache.stats()
+    assert (stats["exact_hits"], stats["near_hits"], stats["misses"]) == (1, 1, 2)
+    assert stats["calls_saved"] == 2
+    assert db_session.query(ReplyCacheEntry).count() == 2
+
+
+def test_skip_policy_and_ttl(db_session):
+    cache = ReplyCache("m", ttl_seconds=3600)
+    cache.store("a", LAUNCH, "bip", "nice")
+
+    # The same post still gets its own reply back; a duplicate elsewhere is skipped
+    assert cache.lookup("a", LAUNCH, "bip").reply == "nice"
+    skipped = cache.lookup("b", LAUNCH + " today", "bip")
+    assert (skipped.reply, skipped.kind, skipped.source_post_id) == (None, "skip", "a")
+    # Near-duplicates are only matched within a tag
+    assert cache.lookup("b", LAUNCH + " today", "saas") is None
+
+    db_session.query(ReplyCacheEntry).update({ReplyCacheEntry.created_at: datetime.utcnow() - timedelta(hours=2)})
+    db_session.commit()
+    assert ReplyCache("m", ttl_seconds=3600).lookup("a", LAUNCH, "bip") is None
+
+
+def test_duplicates_are_skipped_unless_reuse_is_opted_in(monkeypatch):
+    from src.agents.interaction_agent import _build_reply_cache
+
+    monkeypatch.setenv("REPLY_CACHE_TTL_HOURS", "72")
+    monkeypatch.delenv("REPLY_CACHE_DUPLICATES", raising=False)
+    assert _build_reply_cache("m").near_policy == "skip"
+    monkeypatch.setenv("REPLY_CACHE_DUPLICATES", "reuse")
+    assert _build_reply_cache("m").near_policy == "reuse"
+
+
+def test_store_evicts_expired_entries_from_the_index(db_session, monkeypatch):
+    now = [1_000_000.0]
+    monkeypatch.setattr("src.utils.reply_cache.time.time", lambda: now[0])
+    cache = ReplyCache("m", ttl_seconds=3600)
+    cache.store("a", LAUNCH, "bip", "nice")
+
+    now[0] += 7200
+    cache.store("c", "Hiring a senior backend engineer in Berlin, remote friendly, DM me", "bip", "berlin!")
+
+    assert [entry[3] for entry in cache._entries.values()] == ["c"]
+    assert set().union(*cache._bands.values()) == set(cache._entries)
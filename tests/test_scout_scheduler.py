@@ -0,0 +1,87 @@
+import math
+from src.utils.query_planner import MAX_OR_TERMS
+from src.utils.scout_scheduler import ScoutScheduler
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class FakeDiscovery:
+    def __init__(self, topics):
+        self.topics = topics
+
+    def get_suggested_topics(self, limit=5):
+        return self.topics[:limit]
+
+
+def _scheduler(clock, **overrides):
+    options = dict(searches_per_hour=100, base_interval=600, min_interval=300, max_interval=4800,
+                   search_limit=10, max_discovered=0, clock=clock)
+    options.update(overrides)
+    return ScoutScheduler(["quiet", "busy", "steady"], **options)
+
+
+def test_intervals_back_off_on_empty_runs_and_speed_up_when_saturated():
+    clock = FakeClock()
+    scheduler = _scheduler(clock)
+    assert sorted(scheduler.due()) == ["busy", "quiet", "steady"]
+    # Nothing is due again until an interval has passed
+    assert scheduler.due() == []
+
+    for _ in range(4):
+        scheduler.record("quiet", new_posts=0, kept=0)
+        scheduler.record("busy", new_posts=10, kept=6)
+        scheduler.record("steady", new_posts=4, kept=2)
+
+    intervals = {k["keyword"]: k["interval_seconds"] for k in scheduler.stats()["keywords"]}
+    assert intervals == {"quiet": 4800, "busy": 300, "steady": 600}
+
+    clock.now += 300
+    assert scheduler.due() == ["busy"]
+    assert math.isclose(scheduler.seconds_until_next(), 300)
+
+
+def test_budget_counts_merged_searches_not_keywords():
+    clock = FakeClock()
+    scheduler = _scheduler(clock, searches_per_hour=2)
+    # All three keywords fit in one OR search, which is one unit of budget
+    assert sorted(scheduler.due()) == ["busy", "quiet", "steady"]
+    assert scheduler.stats()["budget_left"] == 1
+
+
+def test_budget_goes_to_best_yield_and_unexplored_first():
+    clock = FakeClock()
+    keywords = [f"topic {i}" for i in range(10)]
+    scheduler = ScoutScheduler(keywords, searches_per_hour=1, base_interval=600, max_discovered=0, clock=clock)
+    # One search holds at most MAX_OR_TERMS keywords; the rest wait for budget
+    assert len(scheduler.due()) == MAX_OR_TERMS
+    assert scheduler.stats()["budget_left"] == 0
+
+    clock.now += 3600
+    for i, kw in enumerate(keywords):
+        for _ in range(3):
+            scheduler.record(kw, new_posts=5, kept=i)
+    clock.now += 3600
+    assert scheduler.due() == [f"topic {i}" for i in range(9, 9 - MAX_OR_TERMS, -1)]
+
+
+def test_discovered_topics_are_tried_and_retired_when_useless():
+    clock = FakeClock()
+    scheduler = _scheduler(clock, max_discovered=2, discovery=FakeDiscovery(["AI Agents", "Quiet", "Micro-SaaS"]))
+
+    due = scheduler.due()
+    # Already-tracked keywords aren't duplicated (case-insensitively)
+    assert "AI Agents" in due and "Micro-SaaS" in due and "Quiet" not in due
+
+    for _ in range(3):
+        scheduler.record("AI Agents", new_posts=5, kept=0)
+        scheduler.record("Micro-SaaS", new_posts=5, kept=1)
+
+    stats = scheduler.stats()
+    assert stats["retired"] == ["ai agents"]
+    assert [k["keyword"] for k in stats["keywords"] if k["source"] == "discovered"] == ["Micro-SaaS"]
@@ -0,0 +1,102 @@
+import contextvars
+import json
+import threading
+import pytest
+from unittest.mock import patch
+from src.database import TraceSpan
+from src.utils.tracing import Tracer
+
+
+def test_spans_nest_into_one_trace(db_session, tmp_path):
+    tracer = Tracer(jsonl_path=str(tmp_path / "traces.jsonl"))
+    with tracer.span("mission", query="saas") as mission:
+        with tracer.span("search.navigate"):
+            pass
+        tracer.record("search.scroll", 0.25, count=3)
+        with pytest.raises(ValueError):
+            with tracer.span("filter.semantic", count=10):
+                raise ValueError("model not loaded")
+        mission.set(count=7)
+    tracer.flush()
+
+    spans = {s.name: s for s in db_session.query(TraceSpan).all()}
+    root = spans["mission"]
+    assert root.parent_id is None and root.count == 7
+    assert {s.trace_id for s in spans.values()} == {root.trace_id}
+    assert all(s.parent_id == root.span_id for name, s in spans.items() if name != "mission")
+    assert (spans["search.scroll"].duration_ms, spans["search.scroll"].count) == (250, 3)
+    assert spans["filter.semantic"].status == "error"
+    assert "model not loaded" in spans["filter.semantic"].attrs_json
+
+    lines = [json.loads(line) for line in (tmp_path / "traces.jsonl").read_text().splitlines()]
+    assert sorted(line["name"] for line in lines) == sorted(spans)
+
+
+def test_trace_follows_work_handed_to_threads(db_session):
+    tracer = Tracer()
+    with tracer.span("mission"):
+        # The way BrowserService and the engage LLM pool submit work
+        worker = threading.Thread(target=contextvars.copy_context().run, args=(lambda: tracer.record("llm.reply", 0.1),))
+        worker.start()
+        worker.join()
+        parent = tracer.current()
+    # The way the async engine re-enters the caller's trace on its loop thread
+    with tracer.attach(parent):
+        tracer.record("search.parse", 0.01)
+    tracer.flush()
+
+    assert len({s.trace_id for s in db_session.query(TraceSpan).all()}) == 1
+
+
+def test_stage_stats_and_recent_missions(db_session):
+    tracer = Tracer()
+    for i in range(1, 21):
+        with tracer.span("mission", query="auto"):
+            tracer.record("search.navigate", i / 100)
+            tracer.record("llm.reply", 1.0, count=1)
+
+    stats = {s["stage"]: s for s in tracer.stage_stats(hours=1)}
+    assert stats["search.navigate"]["spans"] == 20
+    assert (stats["search.navigate"]["p50_ms"], stats["search.navigate"]["p95_ms"], stats["search.navigate"]["max_ms"]) == (100, 190, 200)
+    assert stats["llm.reply"]["items"] == 20
+    # Slowest total first
+    assert next(iter(stats)) == "llm.reply"
+
+    missions = tracer.recent_traces("mission", limit=5)
+    assert len(missions) == 5
+    assert missions[0]["attrs"] == {"query": "auto"}
+    assert missions[0]["stages"]["llm.reply"] == 1000
+
+
+def test_disabled_tracer_stores_nothing(db_session):
+    tracer = Tracer(enabled=False)
+    with tracer.span("mission") as span:
+        span.set(count=1)
+        tracer.record("search.scroll", 1.0)
+    tracer.flush()
+    assert db_session.query(TraceSpan).count() == 0
+
+
+def test_spans_are_written_off_the_calling_thread(db_session):
+    """Closing spans (e.g. on the async engine's loop) only buffers; a background thread writes."""
+    writers = []
+    written = threading.Event()
+
+    def save_spans(rows, expire_before=None):
+        writers.append((threading.current_thread().name, len(rows)))
+        written.set()
+
+    tracer = Tracer(flush_size=3, flush_seconds=60)
+    with patch("src.utils.tracing.database.save_spans", side_effect=save_spans):
+        for _ in range(2):
+            tracer.record("search.parse", 0.01)
+        assert writers == []
+        with tracer.span("search.navigate"):
+            pass
+        assert written.wait(5)
+        assert writers == [("trace-flush", 3)]
+
+        # Whatever is still buffered at shutdown gets written
+        tracer.record("search.parse", 0.01)
+        tracer.close()
+    assert sum(n for _, n in writers) == 4
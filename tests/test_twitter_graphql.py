@@ -0,0 +1,110 @@
+import asyncio
+import json
+import os
+from unittest.mock import AsyncMock, MagicMock
+from urllib.parse import parse_qs, urlsplit
+from src.agents.async_twitter_scout import AsyncTwitterScout
+from src.agents.twitter_graphql import FixtureReplayer, SearchTimelineCapture, parse_search_timeline, with_cursor
+from src.database import Interaction
+
+FIXTURE = os.path.join(os.path.dirname(__file__), "fixtures", "search_timeline.json")
+
+
+def _pages():
+    with open(FIXTURE) as f:
+        return [p["payload"] for p in json.load(f)["pages"]]
+
+
+def test_parse_search_timeline():
+    """Tweets come out in timeline order with exact integer metrics."""
+    tweets, cursor = parse_search_timeline(_pages()[0])
+
+    # The tombstone entry is dropped; the visibility-wrapped tweet is unwrapped
+    assert [t["id"] for t in tweets] == ["1849000000000000003", "1849000000000000002", "1849000000000000001"]
+    first = tweets[0]
+    assert first["handle"] == "@shipfast"
+    assert first["author"] == "Ship Fast"
+    assert first["href"] == "/shipfast/status/1849000000000000003"
+    assert first["metrics"] == {"replies": 78, "retweets": 56, "likes": 1234, "quotes": 9, "views": 45210}
+    assert tweets[1]["media"] == "https://pbs.twimg.com/media/abc.jpg"
+    assert cursor == "DAACCgACGPAGE2"
+
+
+def test_fixture_replayer_paginates_and_dedupes():
+    """Cursor pages are followed until the cursor runs out, without repeats."""
+    replayer = FixtureReplayer(FIXTURE)
+    tweets = asyncio.run(replayer.collect(limit=10, accept=lambda t: not t["media"]))
+
+    assert [t["id"] for t in tweets] == ["1849000000000000003", "1849000000000000001", "1848999999999999999"]
+    # Long tweets use the untruncated note_tweet text
+    assert tweets[2]["text"].startswith("Shipping notes: the full text")
+    assert len(replayer.recorded) == 2
+
+    # A limit the first page satisfies doesn't fetch the second
+    replayer = FixtureReplayer(FIXTURE)
+    assert len(asyncio.run(replayer.collect(limit=2))) == 2
+    assert len(replayer.recorded) == 1
+
+    # Reaching an already-seen tweet ends the walk before the next page
+    replayer = FixtureReplayer(FIXTURE)
+    tweets = asyncio.run(replayer.collect(limit=10, stop=lambda t: t["id"] == "1849000000000000001"))
+    assert [t["id"] for t in tweets] == ["1849000000000000003", "1849000000000000002"]
+    assert tweets[0]["created_at"] == "2026-10-17T12:00:00+00:00"
+    assert len(replayer.recorded) == 1
+
+
+def test_with_cursor():
+    url = 'https://x.com/i/api/graphql/abc/SearchTimeline?variables={"rawQuery":"vibe","count":20}&features={}'
+    variables = json.loads(parse_qs(urlsplit(with_cursor(url, "NEXT")).query)["variables"][0])
+    assert variables == {"rawQuery": "vibe", "count": 20, "cursor": "NEXT"}
+
+
+def test_engine_captures_search_timeline(db_session, tmp_path):
+    """GraphQL mode archives tweets from the responses, following the cursor for page two."""
+    page1, page2 = _pages()
+    page = MagicMock()
+    handlers = []
+    page.on.side_effect = lambda event, handler: handlers.append(handler)
+
+    async def goto(url):
+        response = MagicMock(url="https://x.com/i/api/graphql/abc/SearchTimeline?variables={}")
+        response.request.url = response.url
+        response.request.all_headers = AsyncMock(return_value={"x-csrf-token": "t"})
+        response.json = AsyncMock(return_value=page1)
+        for handler in handlers:
+            handler(response)
+
+    page.goto = goto
+    next_page = MagicMock(ok=True)
+    next_page.json = AsyncMock(return_value=page2)
+    page.request.get = AsyncMock(return_value=next_page)
+
+    engine = AsyncTwitterScout(storage_state=dict, record_dir=str(tmp_path))
+    found = asyncio.run(engine._search_on_page(page, "build in public", 3, "bip"))
+
+    assert [t["id"] for t in found] == ["1849000000000000003", "1849000000000000001", "1848999999999999999"]
+    assert page.request.get.call_args.kwargs["headers"] == {"x-csrf-token": "t"}
+
+    saved = db_session.query(Interaction).filter_by(external_post_id="1849000000000000003").one()
+    assert saved.metrics["likes"] == 1234
+    assert saved.tag == "bip"
+
+    # The capture was recorded and replays to the same result
+    recording = next(tmp_path.iterdir())
+    replayed = asyncio.run(FixtureReplayer(str(recording)).collect(limit=3, accept=lambda t: not t["media"]))
+    assert [t["id"] for t in replayed] == [t["id"] for t in found]
+
+
+def test_failed_first_response_falls_back_to_dom():
+    """A 429 SearchTimeline response yields None (DOM fallback), not an empty result."""
+    page = MagicMock()
+    handlers = []
+    page.on.side_effect = lambda event, handler: handlers.append(handler)
+    capture = SearchTimelineCapture(page)
+
+    response = MagicMock(url="https://x.com/i/api/graphql/abc/SearchTimeline?variables={}", ok=False, status=429)
+    response.json = AsyncMock(return_value={})
+    handlers[0](response)
+
+    assert asyncio.run(capture.collect(limit=5, first_timeout=1)) is None
+    response.json.assert_not_called()
@@ -3,17 +3,22 @@ from fastapi.testclient import TestClient
 from unittest.mock import MagicMock, patch
 from src.web.app import app
 from src.database import Interaction
+from src.utils.tracing import Tracer
 
 @pytest.fixture
-def client(db_session):
+def client(db_session, monkeypatch):
     """
     Test client for the app.
     Mocks background threads and external agents.
     """
-    # Mock threading to prevent auto-scout loop
-    with patch("src.web.app.threading.Thread"):
+    monkeypatch.setenv("SEMANTIC_WARMUP", "0")
+    # Mock the app's threading module to prevent auto-scout loop
+    # (patching threading.Thread itself would also break TestClient's portal thread)
+    # ...and keep the job queue's workers from starting; tests drive it with run_next()
+    with patch("src.web.app.threading"), \
+         patch("src.web.app.job_queue.start"), patch("src.web.app.job_queue.stop"):
         # Mock agents to prevent API calls
-        with patch("src.web.app.reddit_scout") as mock_reddit, \
+        with patch("src.web.app.reddit_scout", create=True) as mock_reddit, \
              patch("src.web.app.twitter_scout") as mock_twitter, \
              patch("src.web.app.interaction_agent") as mock_agent:
             
@@ -60,13 +65,33 @@ def test_like_interaction(client, db_session):
     db_session.commit()
     db_session.refresh(interaction)
     
-    with patch("src.web.app.reddit_scout") as mock_reddit:
+    with patch("src.web.app.reddit_scout", create=True) as mock_reddit:
          mock_reddit.like_post.return_value = True
          response = client.post(f"/interactions/{interaction.id}/like")
          # Redirects
          assert response.status_code == 200 
          mock_reddit.like_post.assert_called_with("r1")
 
+def test_like_twitter_interaction_reserves_tokens_up_front(client, db_session):
+    """The like route takes its pacing tokens at once and likes without waiting."""
+    interaction = Interaction(platform="Twitter", external_post_id="t1")
+    db_session.add(interaction)
+    db_session.commit()
+    db_session.refresh(interaction)
+
+    with patch("src.web.app.twitter_scout") as mock_twitter, patch("src.web.app.pacer") as mock_pacer:
+        mock_pacer.try_reserve.return_value = 0.0
+        assert client.post(f"/interactions/{interaction.id}/like").status_code == 200
+        mock_pacer.try_reserve.assert_called_once_with("navigate", "like")
+        mock_twitter.like_post.assert_called_once_with("t1", paced=False)
+
+        # Budget spent: nothing is liked and nothing sleeps
+        mock_twitter.reset_mock()
+        mock_pacer.try_reserve.return_value = 8.0
+        assert client.post(f"/interactions/{interaction.id}/like").status_code == 200
+        mock_twitter.like_post.assert_not_called()
+        mock_pacer.wait.assert_not_called()
+
 def test_comment_interaction(client, db_session):
     interaction = Interaction(platform="Twitter", external_post_id="t1")
     db_session.add(interaction)
@@ -83,10 +108,112 @@ def test_comment_interaction(client, db_session):
         assert response.status_code == 200
         
         mock_agent.generate_comment.assert_called()
-        mock_twitter.comment_post.assert_called_with("t1", "Test Comment")
+        mock_twitter.comment_post.assert_called_with("t1", "Test Comment", paced=False)
         
         # Verify DB update
         db_session.expire_all()
         updated = db_session.query(Interaction).filter_by(id=interaction.id).first()
         assert updated.bot_comment == "Test Comment"
         assert updated.status == "POSTED"
+
+def test_comment_rate_limited_does_not_block(client, db_session):
+    """When the reply budget is spent the route returns at once without generating or posting."""
+    interaction = Interaction(platform="Twitter", external_post_id="t2")
+    db_session.add(interaction)
+    db_session.commit()
+    db_session.refresh(interaction)
+
+    with patch("src.web.app.twitter_scout") as mock_twitter, \
+         patch("src.web.app.interaction_agent") as mock_agent, \
+         patch("src.web.app.pacer") as mock_pacer:
+        mock_pacer.try_reserve.return_value = 12.0
+        response = client.post(f"/interactions/{interaction.id}/comment")
+
+        assert response.status_code == 200
+        mock_pacer.wait.assert_not_called()
+        mock_agent.generate_comment.assert_not_called()
+        mock_twitter.comment_post.assert_not_called()
+
+def _seed_feed(db_session, n):
+    from datetime import datetime, timedelta
+    base = datetime(2024, 1, 1)
+    for i in range(n):
+        # Two rows share each timestamp so the id tie-breaker is exercised
+        db_session.add(Interaction(platform="Twitter", external_post_id=f"t{i}", post_content=f"Post {i}",
+                                   created_at=base + timedelta(minutes=i // 2)))
+    db_session.commit()
+
+def test_api_interactions_keyset_pagination(client, db_session):
+    _seed_feed(db_session, 5)
+
+    seen, cursor = [], None
+    while True:
+        params = {"limit": 2}
+        if cursor:
+            params["cursor"] = cursor
+        body = client.get("/api/interactions", params=params).json()
+        seen.extend(item["external_post_id"] for item in body["items"])
+        cursor = body["next_cursor"]
+        if not cursor:
+            break
+
+    assert seen == ["t4", "t3", "t2", "t1", "t0"]
+    assert client.get("/api/interactions", params={"cursor": "garbage"}).status_code == 400
+
+def test_interactions_page_links_older_posts(client, db_session, monkeypatch):
+    monkeypatch.setattr("src.web.app.FEED_PAGE_SIZE", 3)
+    _seed_feed(db_session, 5)
+
+    first = client.get("/interactions")
+    assert "Post 4" in first.text and "Post 1" not in first.text
+    assert "Older posts" in first.text
+
+    from src.database import encode_cursor
+    last_shown = db_session.query(Interaction).filter_by(external_post_id="t2").one()
+    older = client.get("/interactions", params={"cursor": encode_cursor(last_shown.created_at, last_shown.id)})
+    assert "Post 1" in older.text and "Post 4" not in older.text
+
+def test_export_streams_ndjson(client, db_session):
+    import json
+    _seed_feed(db_session, 5)
+
+    response = client.get("/api/interactions/export.ndjson")
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert [r["external_post_id"] for r in rows] == ["t4", "t3", "t2", "t1", "t0"]
+    assert "metrics_json" in rows[0]
+
+def test_llm_stats(client):
+    with patch("src.web.app.interaction_agent") as mock_agent:
+        mock_agent.usage.stats.return_value = {"requests": 3, "cache_hit_ratio": 0.5}
+        response = client.get("/stats/llm")
+    assert response.status_code == 200
+    assert response.json()["cache_hit_ratio"] == 0.5
+
+def test_scout_missions_are_queued_as_jobs(client, db_session):
+    form = {"platform": "twitter", "limit": 5, "query": "build in public"}
+    client.post("/scout", data=form)
+    client.post("/scout", data=form)
+
+    jobs = client.get("/api/jobs").json()
+    assert len(jobs) == 1
+    assert (jobs[0]["status"], jobs[0]["coalesced"], jobs[0]["source"]) == ("PENDING", 1, "manual")
+    assert "build in public" in client.get("/jobs").text
+
+    response = client.post(f"/jobs/{jobs[0]['id']}/cancel")
+    assert response.status_code == 200
+    assert client.get("/api/jobs").json()[0]["status"] == "CANCELLED"
+    assert client.post("/jobs/999/cancel").status_code == 404
+
+def test_perf_page_shows_stage_percentiles(client, db_session):
+    tracer = Tracer()
+    with patch("src.web.app.tracer", tracer):
+        with tracer.span("mission", query="saas mvp") as mission:
+            for ms in (100, 200, 300):
+                tracer.record("search.navigate", ms / 1000)
+            mission.set(count=4)
+
+        stages = {s["stage"]: s for s in client.get("/api/perf").json()["stages"]}
+        assert (stages["search.navigate"]["spans"], stages["search.navigate"]["p50_ms"]) == (3, 200)
+        page = client.get("/perf").text
+    assert "search.navigate" in page and "saas mvp" in page